@@ -1,9 +1,12 @@
 import pygame
 import sys
-import time
-import random
 import math
 from collections import deque
+from itertools import islice
+from rng import make_streams, new_seed
+from text_cache import TextCache
+from sim_clock import FixedStepClock
+from constants import TIME_SCALES
 
 pygame.init()
 pygame.mixer.init()
@@ -32,10 +35,14 @@ font_large = pygame.font.Font(None, 36)
 font_medium = pygame.font.Font(None, 28)
 font_small = pygame.font.Font(None, 22)
 font_tiny = pygame.font.Font(None, 18)
+text_cache = TextCache()
 
 
 
 
+EVENT_HISTORY_LENGTH = 20  # events each village remembers, as many as its detail view lists
+BAD_EVENTS = ('Plague', 'Drought', 'Famine', 'Bandits')
+
 SEASONS = ['Spring', 'Summer', 'Fall', 'Winter']
 SEASON_EFFECTS = {
     'Spring': {'crops': 1.2, 'grain': 1.2, 'population_growth': 1.1},
@@ -81,7 +88,7 @@ class Village:
         self.production = production
         self.trade_queue = []
         self.labor_limit = population // 10
-        self.event_history = []
+        self.event_history = deque(maxlen=EVENT_HISTORY_LENGTH)
         self.tax_rate = 0.1
         self.sustainability_score = 100
         self.happiness = 100
@@ -142,7 +149,7 @@ class Village:
             self.happiness -= 10
         
     
-        recent_bad = sum(1 for e in self.event_history[-5:] if e in ['Plague', 'Drought', 'Famine', 'Bandits'])
+        recent_bad = sum(1 for e in islice(reversed(self.event_history), 5) if e in BAD_EVENTS)
         self.happiness -= recent_bad * 5
         
         self.happiness = max(0, min(100, self.happiness))
@@ -255,7 +262,7 @@ class Notification:
             ])
         
         
-        text = font_small.render(self.message, True, WHITE)
+        text = text_cache.render(font_small, self.message, True, WHITE)
         text_surface = pygame.Surface((text.get_width(), text.get_height()))
         text_surface.set_alpha(self.alpha)
         text_surface.blit(text, (0, 0))
@@ -263,8 +270,14 @@ class Notification:
 
 
 class Kingdom:
-    def __init__(self, villages):
+    def __init__(self, villages, seed=None):
         self.villages = villages
+        
+        self.seed = seed if seed is not None else new_seed()
+        streams = make_streams(self.seed, ('events', 'event_types'))
+        self.event_rng = streams['events']
+        self.event_type_rng = streams['event_types']
+        self.event_schedule = []  # (time, village index, event index)
         self.time = 0
         self.prosperity_score = 0
         self.total_taxes = 0
@@ -279,7 +292,7 @@ class Kingdom:
     def update(self):
         
         if self.paused:
-            return
+            return False
         
         self.time += 1
         
@@ -303,7 +316,7 @@ class Kingdom:
         
      
         for village in self.villages:
-            if random.random() < 0.08:  
+            if self.event_rng.random() < 0.08:  
                 self.trigger_event(village)
         
         
@@ -381,7 +394,9 @@ class Kingdom:
             }
         ]
         
-        event = random.choice(events)
+        choice = self.event_type_rng.randrange(len(events))
+        event = events[choice]
+        self.event_schedule.append((self.time, self.villages.index(village), choice))
         event['effect'](village)
         self.event_log.append(f"{village.name}: {event['name']}")
         village.event_history.append(event['name'])
@@ -560,14 +575,14 @@ def draw_map():
                 icon_y = y - 45
                 pygame.draw.rect(screen, PURPLE, (icon_x, icon_y, 10, 10))
         
-        text = font_small.render(village.name, True, BLACK)
+        text = text_cache.render(font_small, village.name, True, BLACK)
         screen.blit(text, (x-70, y-60))
         
         
-        pop_text = font_tiny.render(f"Pop: {village.population}", True, BLACK)
+        pop_text = text_cache.render(font_tiny, f"Pop: {village.population}", True, BLACK)
         screen.blit(pop_text, (x-40, y+35))
         
-        happiness_text = font_tiny.render(f"😊 {int(village.happiness)}%", True, BLACK)
+        happiness_text = text_cache.render(font_tiny, f"😊 {int(village.happiness)}%", True, BLACK)
         screen.blit(happiness_text, (x-40, y+50))
     
     draw_dashboard()
@@ -592,11 +607,11 @@ def draw_dashboard():
     pygame.draw.rect(screen, BLACK, (panel_x, panel_y, panel_w, panel_h), 3)
     
    
-    title = font_medium.render("Kingdom Dashboard", True, BLACK)
+    title = text_cache.render(font_medium, "Kingdom Dashboard", True, BLACK)
     screen.blit(title, (panel_x + 10, panel_y + 10))
     
     
-    season_text = font_small.render(f"Season: {kingdom.current_season}", True, BLUE)
+    season_text = text_cache.render(font_small, f"Season: {kingdom.current_season}", True, BLUE)
     screen.blit(season_text, (panel_x + 10, panel_y + 45))
     
     
@@ -612,7 +627,7 @@ def draw_dashboard():
     ]
     
     for stat in stats:
-        text = font_small.render(stat, True, BLACK)
+        text = text_cache.render(font_small, stat, True, BLACK)
         screen.blit(text, (panel_x + 10, y_offset))
         y_offset += 25
     
@@ -620,7 +635,7 @@ def draw_dashboard():
     ach_button = pygame.Rect(panel_x + 10, panel_y + panel_h - 40, 150, 30)
     pygame.draw.rect(screen, GOLD, ach_button)
     pygame.draw.rect(screen, BLACK, ach_button, 2)
-    ach_text = font_small.render("Achievements", True, BLACK)
+    ach_text = text_cache.render(font_small, "Achievements", True, BLACK)
     screen.blit(ach_text, (panel_x + 25, panel_y + panel_h - 35))
     
    
@@ -631,12 +646,12 @@ def draw_dashboard():
     screen.blit(log_panel, (20, log_y))
     pygame.draw.rect(screen, BLACK, (20, log_y, 450, 200), 3)
     
-    log_title = font_medium.render("Recent Events", True, BLACK)
+    log_title = text_cache.render(font_medium, "Recent Events", True, BLACK)
     screen.blit(log_title, (30, log_y + 10))
     
     y_offset = log_y + 45
     for event in list(kingdom.event_log)[-7:]:
-        text = font_tiny.render(event, True, BLACK)
+        text = text_cache.render(font_tiny, event, True, BLACK)
         screen.blit(text, (30, y_offset))
         y_offset += 22
 
@@ -881,7 +896,7 @@ def draw_events_tab(village, y):
             'Festival': ('good', '')
         }
         
-        for i, event in enumerate(village.event_history[-20:]):
+        for i, event in enumerate(village.event_history):
             event_type, icon = event_types.get(event, ('info', ''))
             color = RED if event_type == 'bad' else GREEN if event_type == 'good' else BLUE
             
@@ -969,10 +984,14 @@ def draw_controls():
     pygame.draw.rect(screen, BLACK, reset_rect, 3)
     reset_text = font_medium.render("Reset", True, WHITE)
     screen.blit(reset_text, (WIDTH - 115, button_y + 12))
+    
+    speed_text = text_cache.render(font_small, f"Speed: {sim_clock.scale_label()} (1-4)", True, BLACK, slot='speed')
+    screen.blit(speed_text, (WIDTH - 260 - speed_text.get_width() - 15, button_y + 15))
 
-last_update = time.time()
 running = True
 clock = pygame.time.Clock()
+# One kingdom tick every half second of game time, whatever the frame rate
+sim_clock = FixedStepClock(step=0.5)
 
 while running:
     for event in pygame.event.get():
@@ -985,6 +1004,8 @@ while running:
                     show_achievements = False
                 elif zoomed:
                     zoomed = False
+            elif pygame.K_1 <= event.key < pygame.K_1 + len(TIME_SCALES):
+                sim_clock.set_scale(TIME_SCALES[event.key - pygame.K_1])
         
         if event.type == pygame.MOUSEBUTTONDOWN:
             mx, my = pygame.mouse.get_pos()
@@ -1017,7 +1038,7 @@ while running:
                     
                     kingdom = Kingdom(villages)
                     for v in villages:
-                        v.event_history = []
+                        v.event_history.clear()
                         v.buildings = []
                     
             else:
@@ -1050,9 +1071,7 @@ while running:
                             y_check += 120
     
     
-    if time.time() - last_update > 0.5:
-        kingdom.update()
-        last_update = time.time()
+    sim_clock.advance(clock.tick(60) / 1000.0, lambda dt: kingdom.update())
     
     
     if show_achievements:
@@ -1066,7 +1085,6 @@ while running:
         draw_controls()
     
     pygame.display.flip()
-    clock.tick(60)
 
 pygame.quit()
 sys.exit()
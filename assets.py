@@ -0,0 +1,126 @@
+"""
+Assets - images pre-scaled once, cached on disk, converted on first use
+"""
+
+import json
+import os
+import pygame
+import constants as C
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class AssetBundle:
+    """Named images at the size they are drawn, cached as raw pixels
+    
+    specs maps name -> (file name, size), where size is (w, h) or None to
+    keep the source size. The first run decodes the source PNGs, scales
+    them down and writes the raw pixels to C.ASSET_CACHE_DIR; later runs
+    read those back with no PNG decoding at all. The cache is rebuilt when
+    a source file or a requested size changes. Each image is only turned
+    into a surface (and converted to the display format) when first asked
+    for, and missing files come back as None. The raw pixels are dropped
+    once every image has been turned into a surface.
+    """
+    def __init__(self, specs, cache_dir=None):
+        self.specs = specs
+        self.cache_dir = cache_dir or os.path.join(ASSET_DIR, C.ASSET_CACHE_DIR)
+        self.manifest = None  # name -> (offset, width, height, mode), or None if missing
+        self.data = None
+        self.pending = set()  # Names in the manifest not yet turned into surfaces
+        self.surfaces = {}
+    
+    def _signature(self):
+        signature = {}
+        for name, (file_name, size) in sorted(self.specs.items()):
+            path = os.path.join(ASSET_DIR, file_name)
+            stat = os.stat(path) if os.path.exists(path) else None
+            signature[name] = [file_name, list(size) if size else None,
+                               stat and stat.st_mtime_ns, stat and stat.st_size]
+        return signature
+    
+    def _load(self):
+        signature = self._signature()
+        manifest_path = os.path.join(self.cache_dir, 'manifest.json')
+        data_path = os.path.join(self.cache_dir, 'bundle.bin')
+        
+        try:
+            with open(manifest_path) as f:
+                cached = json.load(f)
+            if cached['signature'] == signature:
+                with open(data_path, 'rb') as f:
+                    self.data = f.read()
+                self.manifest = cached['images']
+                self._track_pending()
+                return
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        self._build()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(data_path, 'wb') as f:
+                f.write(self.data)
+            with open(manifest_path, 'w') as f:
+                json.dump({'signature': signature, 'images': self.manifest}, f)
+        except OSError:
+            pass  # Read-only checkout: keep the bundle in memory only
+        self._track_pending()
+    
+    def _track_pending(self):
+        self.pending = {name for name, entry in self.manifest.items()
+                        if entry is not None and name not in self.surfaces}
+    
+    def _build(self):
+        """Decode, scale and flatten every source image"""
+        self.manifest = {}
+        chunks = []
+        offset = 0
+        for name, (file_name, size) in self.specs.items():
+            try:
+                image = pygame.image.load(os.path.join(ASSET_DIR, file_name))
+            except (pygame.error, FileNotFoundError):
+                self.manifest[name] = None
+                continue
+            
+            mode = 'RGBA' if image.get_flags() & pygame.SRCALPHA else 'RGB'
+            if image.get_bitsize() < 24:
+                # Palette images: smoothscale needs 24 or 32 bits per pixel
+                full = pygame.Surface(image.get_size(), pygame.SRCALPHA if mode == 'RGBA' else 0, 32)
+                full.blit(image, (0, 0))
+                image = full
+            if size and tuple(size) != image.get_size():
+                image = pygame.transform.smoothscale(image, size)
+            raw = pygame.image.tobytes(image, mode)
+            self.manifest[name] = (offset, image.get_width(), image.get_height(), mode)
+            chunks.append(raw)
+            offset += len(raw)
+        self.data = b''.join(chunks)
+    
+    def __contains__(self, name):
+        return self.get(name) is not None
+    
+    def get(self, name):
+        """The image as a display-format surface, or None if its file is missing"""
+        if name in self.surfaces:
+            return self.surfaces[name]
+        if self.manifest is None or (self.data is None and self.manifest.get(name)):
+            self._load()  # First use, or a released image asked for again
+        
+        entry = self.manifest.get(name)
+        surface = None
+        if entry is not None:
+            offset, width, height, mode = entry
+            raw = self.data[offset:offset + width * height * len(mode)]
+            surface = pygame.image.frombytes(raw, (width, height), mode)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha() if mode == 'RGBA' else surface.convert()
+        self.surfaces[name] = surface
+        self.pending.discard(name)
+        if not self.pending:
+            self.data = None
+        return surface
+    
+    def release(self, name):
+        """Forget a surface that has been copied elsewhere (e.g. into an atlas)"""
+        self.surfaces.pop(name, None)
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Batch runner - Monte Carlo over many independent kingdoms at once
+"""
+
+import sys
+import time
+import warnings
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import constants as C
+from vector_engine import KingdomState, EVENT_TYPES, EVENT_INDEX
+
+DELIVERY_MODES = ('instant', 'monthly')
+SIMULATION_MONTHS = (C.SIMULATION_END_YEAR - C.SIMULATION_START_YEAR) * C.MONTHS_PER_YEAR
+TRADE_MODEL = 'nearest first in straight lines'  # GameEngine trades by min-cost flow over roads
+
+
+class BatchKingdom:
+    """Steps `runs` copies of one city layout together, one RNG stream per run.
+    
+    Every array carries a leading run axis; events and the sustainability
+    score follow GameEngine month for month, while trades use the original
+    greedy nearest-first allocation, shipped in a straight line, rather
+    than TradeSystem's min-cost flow over roads with limited capacity. A
+    batch is only comparable with other batches, not with engine runs.
+    """
+    def __init__(self, seeds, cities=None, delivery='instant'):
+        if delivery not in DELIVERY_MODES:
+            raise ValueError(f"Unknown delivery mode: {delivery}")
+        
+        cities = cities if cities is not None else C.CITIES
+        self.seeds = list(seeds)
+        self.runs = len(self.seeds)
+        self.delivery = delivery
+        
+        self.state = KingdomState(cities, runs=self.runs, record_history=False)
+        self.n = self.state.n_cities
+        
+        positions = self.state.positions[:self.n]
+        delta = positions[:, None, :] - positions[None, :, :]
+        self.distances = np.sqrt((delta ** 2).sum(axis=2))
+        # Stable sort keeps village order on ties, like TradeSystem's list.sort
+        self.nearest = np.argsort(self.distances, axis=1, kind='stable')
+        
+        # Draw every run's uniforms up front so a run depends only on its seed
+        self.schedule = np.stack([
+            np.random.default_rng(seed).random((SIMULATION_MONTHS, 3 + self.n))
+            for seed in self.seeds
+        ])
+        
+        self.current_year = C.SIMULATION_START_YEAR
+        self.current_month = 1
+        self.month_index = 0
+        
+        self.in_transit = np.zeros((self.runs, self.n, len(C.RESOURCES)))
+        self.sustainability_score = np.full(self.runs, 500)
+        self.total_trades = np.zeros(self.runs, dtype=np.int64)
+        self.total_deaths = np.zeros(self.runs, dtype=np.int64)
+        self.total_events = np.zeros(self.runs, dtype=np.int64)
+    
+    @property
+    def resources(self):
+        return self.state.per_run(self.state.resources)
+    
+    @property
+    def alive(self):
+        return self.state.per_run(self.state.alive)
+    
+    def run(self):
+        """Run every kingdom to the end of the simulation"""
+        while self.current_year < C.SIMULATION_END_YEAR:
+            self.update_month()
+        return self
+    
+    def update_month(self):
+        """Vectorized equivalent of GameEngine.update_month for every run"""
+        if self.delivery == 'monthly':
+            self._deliver()
+        
+        self.current_month += 1
+        if self.current_month > C.MONTHS_PER_YEAR:
+            self.current_month = 1
+            self.current_year += 1
+        
+        self._spawn_events(self.schedule[:, self.month_index])
+        self.month_index += 1
+        
+        self.state.step_month()
+        self.total_deaths = (~self.alive).sum(axis=1)
+        
+        self._trade()
+        if self.delivery == 'instant':
+            self._deliver()
+        
+        self._update_sustainability_score()
+    
+    def _spawn_events(self, draws):
+        """EventSystem.spawn_random_event for every run from pre-drawn uniforms"""
+        spawn = draws[:, 0] < C.EVENT_BASE_CHANCE
+        event_type = (draws[:, 1] * len(EVENT_TYPES)).astype(np.int64)
+        
+        eligible = self.alive & ~self.state.per_run(self.state.is_capital)
+        n_eligible = eligible.sum(axis=1)
+        spawn &= n_eligible > 0
+        if not spawn.any():
+            return
+        
+        count = 1 + (draws[:, 2] * np.minimum(3, n_eligible)).astype(np.int64)
+        keys = np.where(eligible, draws[:, 3:], np.inf)
+        rank = np.argsort(np.argsort(keys, axis=1), axis=1)
+        hit = eligible & spawn[:, None] & (rank < count[:, None])
+        
+        runs, villages = np.nonzero(hit)
+        types = event_type[runs]
+        durations = np.array([C.EVENT_TYPES[e]['duration'] for e in EVENT_TYPES])[types]
+        
+        events = self.state.per_run(self.state.events)
+        events[runs, villages, types, durations - 1] += 1
+        
+        pirates = hit & (event_type == EVENT_INDEX['pirates'])[:, None]
+        self.resources[pirates] *= 0.5
+        
+        self.total_events += spawn
+    
+    def _event_active(self, event_type):
+        return self.state.per_run(self.state.event_active(event_type))
+    
+    def _trade(self):
+        """Greedy trade allocation + delivery queueing, vectorized over runs.
+        
+        This is the allocation TradeSystem used before min-cost flow: deficits by urgency, then
+        unblocked surplus villages nearest first, at most 60% of what is
+        left and only shipments above 5 units.
+        """
+        survival, growth = self.state.calculate_thresholds()
+        survival = self.state.per_run(survival)
+        growth = self.state.per_run(growth)
+        
+        alive = self.alive
+        blocked = self._event_active('plague') | self._event_active('lightning')
+        
+        resources = self.resources
+        run_index = np.arange(self.runs)
+        
+        for r in range(len(C.RESOURCES)):
+            current = resources[:, :, r].copy()
+            
+            is_surplus = alive & (current > growth * 1.5)
+            surplus = np.where(is_surplus, current - growth, 0.0)
+            available = is_surplus & ~blocked
+            
+            is_deficit = alive & ~is_surplus & (current < growth) & ~blocked
+            deficit = growth - current
+            urgency = np.where(current < survival, 1000.0, deficit / growth)
+            urgency = np.where(is_deficit, urgency, -np.inf)
+            order = np.argsort(-urgency, axis=1, kind='stable')
+            
+            sent = np.zeros((self.runs, self.n))
+            received = np.zeros((self.runs, self.n))
+            
+            for k in range(self.n):
+                target = order[:, k]
+                needed = np.where(is_deficit[run_index, target], deficit[run_index, target], 0.0)
+                if not (needed > 0).any():
+                    break
+                
+                for source in self.nearest[target].T:
+                    amount = surplus[run_index, source]
+                    send = np.minimum(needed, amount * 0.6)
+                    ok = available[run_index, source] & (amount > 0) & (needed > 0) & (send > 5)
+                    send = np.where(ok, send, 0.0)
+                    
+                    surplus[run_index, source] -= send
+                    sent[run_index, source] += send
+                    received[run_index, target] += send
+                    needed -= send
+                    self.total_trades += ok
+            
+            resources[:, :, r] -= sent
+            self.in_transit[:, :, r] += received * C.TRADE_EFFICIENCY
+    
+    def _deliver(self):
+        self.resources[...] += self.in_transit
+        self.in_transit[...] = 0.0
+    
+    def _update_sustainability_score(self):
+        """GameEngine._update_sustainability_score for every run"""
+        weights = C.SUSTAINABILITY_WEIGHTS
+        alive = self.alive
+        n_alive = alive.sum(axis=1)
+        score = np.zeros(self.runs)
+        
+        totals = (self.resources * alive[:, :, None]).sum(axis=1)
+        ratio = totals.max(axis=1) / (totals.min(axis=1) + 1)
+        balance = np.maximum(0, 1.0 - (ratio - 1) / 10)
+        score += np.where(totals.mean(axis=1) > 0, balance * weights['resource_balance'], 0.0)
+        
+        growth = self.state.per_run(self.state.growth_rate)
+        avg_growth = (growth * alive).sum(axis=1) / np.maximum(n_alive, 1)
+        stability = np.clip(0.5 + avg_growth * 5, 0, 1.0)
+        stability *= 1 - self.total_deaths / self.n
+        score += np.where(n_alive > 0, stability * weights['population_stability'], 0.0)
+        
+        if self.current_month > 1:
+            months = (self.current_year - C.SIMULATION_START_YEAR) * 12 + self.current_month
+            score += np.minimum(1.0, self.total_trades / months / 20) * weights['trade_efficiency']
+        
+        recovery = np.where(self.total_events > 0, n_alive / self.n, 0.5)
+        score += recovery * weights['disaster_recovery']
+        
+        self.sustainability_score = np.trunc(score).astype(np.int64)
+    
+    def results(self):
+        return {
+            'seeds': np.array(self.seeds),
+            'sustainability_score': self.sustainability_score.copy(),
+            'total_deaths': self.total_deaths.copy(),
+            'total_trades': self.total_trades.copy(),
+            'alive': self.alive.copy(),
+        }
+
+
+def _run_chunk(seeds, delivery, overrides):
+    """Worker entry point: run one chunk of seeds with constant overrides"""
+    saved = {name: getattr(C, name) for name in overrides}
+    try:
+        for name, value in overrides.items():
+            setattr(C, name, value)
+        return BatchKingdom(seeds, delivery=delivery).run().results()
+    finally:
+        for name, value in saved.items():
+            setattr(C, name, value)
+
+
+def run_batch(runs, seed=0, workers=None, chunk_size=256, delivery='instant', overrides=None):
+    """Run `runs` independent kingdoms and return the outcome distributions.
+    
+    Run i is seeded with seed + i, so results do not depend on how the
+    runs are chunked. overrides maps constants names (e.g.
+    'MAX_GROWTH_RATE') to values applied inside every worker.
+    results['trade_model'] names the trade allocation the runs used.
+    """
+    warnings.warn(f"Batch runs trade {TRADE_MODEL}, not over roads like GameEngine; "
+                  "compare their outcomes with other batches only", stacklevel=2)
+    overrides = overrides or {}
+    seeds = [seed + i for i in range(runs)]
+    chunks = [seeds[i:i + chunk_size] for i in range(0, runs, chunk_size)]
+    
+    if workers == 1 or len(chunks) == 1:
+        parts = [_run_chunk(chunk, delivery, overrides) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, chunks, [delivery] * len(chunks), [overrides] * len(chunks)))
+    
+    results = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+    results['trade_model'] = TRADE_MODEL
+    results['survival'] = {
+        city['name']: float(results['alive'][:, i].mean())
+        for i, city in enumerate(C.CITIES)
+    }
+    return results
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    
+    start = time.perf_counter()
+    results = run_batch(runs)
+    elapsed = time.perf_counter() - start
+    
+    scores = results['sustainability_score']
+    print(f"{runs} runs in {elapsed:.2f}s (trades {results['trade_model']})")
+    print(f"Sustainability: mean {scores.mean():.1f}, p5 {np.percentile(scores, 5):.0f}, "
+          f"p50 {np.percentile(scores, 50):.0f}, p95 {np.percentile(scores, 95):.0f}")
+    print(f"Deaths: mean {results['total_deaths'].mean():.1f}")
+    for name, rate in results['survival'].items():
+        print(f"  {name}: {rate * 100:.1f}% survive")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Benchmarks - times the engine, trade, event and render hot paths
+
+A pytest-benchmark suite, kept out of the default test run by its name:
+
+    python -m pytest benchmark.py                          run everything
+    python -m pytest benchmark.py -k render                run the render cases
+    python -m pytest benchmark.py --benchmark-autosave     also store the results under .benchmarks
+    python -m pytest benchmark.py --benchmark-compare --benchmark-compare-fail=min:25%
+                                                           fail on cases 25% slower than the last save
+
+Each case runs at several kingdom sizes (11 is the hand-made map, larger
+ones come from scenario.py) or cart counts.
+"""
+
+import os
+import numpy as np
+import pytest
+import constants as C
+from game_engine import GameEngine
+from scenario import generate_engine
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+VILLAGES = (11, 1000, 10000)
+TRADE_VILLAGES = (11, 300, 1000)  # Past this the road searches of a cold month take seconds
+CARTS = (100, 1000, 10000)
+QUIET_MONTHS = 7  # Months before stockpiles run low and trade starts, at every size
+
+villages = pytest.mark.parametrize('villages', VILLAGES)
+trade_villages = pytest.mark.parametrize('villages', TRADE_VILLAGES)
+carts = pytest.mark.parametrize('carts', CARTS)
+
+
+def _engine(villages):
+    """A kingdom QUIET_MONTHS in: starting stock still covers everyone, the next month trades"""
+    engine = GameEngine(seed=0) if villages == len(C.CITIES) else generate_engine(villages, 'clustered', seed=0)
+    for _ in range(QUIET_MONTHS):
+        engine.update_month()
+        engine.trade_system.deliver_all()
+    return engine
+
+
+def _fill_fleet(engine, carts):
+    """Put `carts` random carts on real routes; they never arrive, so the count holds
+    
+    The next month is taken off the clock as well, so ticks can run on
+    without a refresh.
+    """
+    engine.scheduler.cancel(engine._month_due)
+    trade_system = engine.trade_system
+    rng = np.random.default_rng(0)
+    villages = engine.villages
+    for source in rng.integers(len(villages), size=carts).tolist():
+        routes = villages[source].connected_routes
+        destination = routes[int(rng.integers(len(routes)))]
+        trade_system.fleet.launch(source, destination, int(rng.integers(len(C.RESOURCES))), 10.0,
+                                  villages[source].position, villages[destination].position,
+                                  duration=C.SECONDS_PER_MONTH * 1e6)
+    return engine
+
+
+_screen = None
+
+
+def _renderer(engine):
+    global _screen
+    from ui_renderer import UIRenderer
+    if _screen is None:
+        pygame.init()
+        _screen = pygame.display.set_mode((1600, 900))
+    renderer = UIRenderer(_screen, engine)
+    
+    # Look at the middle of the kingdom, so every size has a full view
+    x, y = np.median([v.position for v in engine.villages], axis=0)
+    renderer.camera_x = renderer.width / 2 - x * renderer.zoom
+    renderer.camera_y = renderer.height / 2 - y * renderer.zoom
+    renderer.render()  # Warm the sprite, text and map caches
+    return renderer
+
+
+_screen = None
+
+
+def _renderer(engine):
+    global _screen
+    from ui_renderer import UIRenderer
+    if _screen is None:
+        pygame.init()
+        _screen = pygame.display.set_mode((1600, 900))
+    renderer = UIRenderer(_screen, engine)
+    
+    # Look at the middle of the kingdom, so every size has a full view
+    x, y = np.median([v.position for v in engine.villages], axis=0)
+    renderer.camera_x = renderer.width / 2 - x * renderer.zoom
+    renderer.camera_y = renderer.height / 2 - y * renderer.zoom
+    renderer.render()  # Warm the sprite, text and map caches
+    return renderer
+
+
+# Engine
+
+@trade_villages
+def test_update_month(benchmark, villages):
+    engine = _engine(villages)
+    
+    def month():
+        engine.update_month()
+        engine.trade_system.deliver_all()  # Headless 'instant' delivery, so carts don't pile up
+    benchmark(month)
+
+
+@villages
+def test_update_sustainability_score(benchmark, villages):
+    benchmark(_engine(villages)._update_sustainability_score)
+
+
+@villages
+def test_calculate_growth_rate(benchmark, villages):
+    alive = [v for v in _engine(villages).villages if v.is_alive]
+    
+    def growth():
+        for village in alive:
+            village.calculate_growth_rate()
+    benchmark(growth)
+
+
+@villages
+def test_spawn_random_event(benchmark, villages):
+    engine = _engine(villages)
+    benchmark(engine.event_system.spawn_random_event, engine.current_year, engine.current_month)
+
+
+# Trade
+
+@trade_villages
+def test_calculate_trades(benchmark, villages):
+    # What the first trading month solves: villages updated, no carts out yet
+    engine = _engine(villages)
+    engine._update_villages()
+    benchmark(engine.trade_system.calculate_trades)
+
+
+@carts
+def test_tick(benchmark, carts):
+    engine = _fill_fleet(_engine(1000), carts)
+    benchmark(engine.update, 1.0 / C.SIM_TICK_RATE)
+
+
+# Render
+
+@villages
+def test_map_view_full_redraw(benchmark, villages):
+    renderer = _renderer(_engine(villages))
+    
+    def full():
+        renderer.layer_keys = {}
+        renderer._render_map_view()
+    benchmark(full)
+
+
+@carts
+def test_map_view_carts_only(benchmark, carts):
+    engine = _fill_fleet(_engine(1000), carts)
+    renderer = _renderer(engine)
+    
+    def frame():
+        engine.update(1.0 / C.SIM_TICK_RATE)
+        renderer._render_map_view()
+    benchmark(frame)
+
+
+@carts
+def test_render_trade_carts(benchmark, carts):
+    renderer = _renderer(_fill_fleet(_engine(1000), carts))
+    benchmark(lambda: renderer._render_trade_carts(renderer._cart_marks()))
+
+
+@villages
+@pytest.mark.parametrize('name', ['_render_background', '_render_trade_routes', '_render_cities',
+                                  '_render_ui_overlay', '_render_end_summary',
+                                  '_render_completion_message', '_render_city_detail'])
+def test_render_pass(benchmark, name, villages):
+    """One UIRenderer._render_* pass drawn on its own"""
+    renderer = _renderer(_engine(villages))
+    if name == '_render_city_detail':
+        renderer.selected_village = renderer.engine.villages[0]
+        renderer.view_mode = 'city_detail'
+    benchmark(getattr(renderer, name))
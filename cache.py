@@ -0,0 +1,69 @@
+"""
+LRU cache - bounded by entry count and/or total bytes
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least-recently-used cache for rendered surfaces and similar values
+    
+    sizeof(value) gives each entry's cost in bytes; the oldest entries are
+    evicted once max_bytes or max_items is exceeded. The newest entry is
+    always kept, even if it alone is over budget.
+    """
+    def __init__(self, max_items=None, max_bytes=None, sizeof=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __contains__(self, key):
+        return key in self.entries
+    
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+    
+    def put(self, key, value):
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        size = self.sizeof(value)
+        self.entries[key] = (value, size)
+        self.bytes += size
+        
+        while len(self.entries) > 1 and (
+            (self.max_items is not None and len(self.entries) > self.max_items)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+        return value
+    
+    def get_or_create(self, key, create):
+        """Cached value for key, building it with create() on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, create())
+        return value
+    
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+    
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
\ No newline at end of file
@@ -4,21 +4,35 @@ REAL_TIME_DURATION = 600
 SECONDS_PER_YEAR = REAL_TIME_DURATION / (SIMULATION_END_YEAR - SIMULATION_START_YEAR)
 SECONDS_PER_MONTH = SECONDS_PER_YEAR / 12
 MONTHS_PER_YEAR = 12
+HISTORY_CAPACITY = 1200  # months of per-village history kept (100 years)
+HISTORY_START_CAPACITY = 12  # months a history buffer starts with; it doubles up to HISTORY_CAPACITY
+HISTORY_ARCHIVE_YEARS = 1000  # yearly means kept past that, for series with an archive
+EVENT_LOG_CAPACITY = 100  # latest entries of each village's event log
+EVENT_HISTORY_CAPACITY = 1000  # latest kingdom-wide events kept for display
+
+# Simulation clock (see sim_clock.py)
+SIM_TICK_RATE = 60  # fixed steps per simulated second
+TIME_SCALES = [1, 10, 100, None]  # None: as fast as the frame budget allows
+SIM_FRAME_BUDGET = 0.012  # real seconds per frame the simulation may use
+SIM_MAX_BACKLOG = 0.25  # real seconds the simulation may fall behind before skipping
+WORKER_PUBLISH_INTERVAL = 1.0 / 120  # how often the worker thread publishes a frame
+WORKER_WORLD_INTERVAL = 0.1  # most often it re-copies the villages
+WORKER_SWITCH_INTERVAL = 0.001  # GIL switch interval while the worker runs
 
 RESOURCES = ['wood', 'iron', 'livestock', 'grain', 'gold']
 
 CITIES = [
-    {'name': 'Goblin Stadium', 'produces': 'wood', 'pos': (300, 600)},
-    {'name': 'Bone Pit', 'produces': 'iron', 'pos': (500, 700)},
-    {'name': 'Barbarian Bowl', 'produces': 'livestock', 'pos': (700, 650)},
-    {'name': 'P.E.K.K.A\'s Playhouse', 'produces': 'grain', 'pos': (900, 600)},
-    {'name': 'Spell Valley', 'produces': 'wood', 'pos': (400, 400)},
-    {'name': 'Builder\'s Workshop', 'produces': 'iron', 'pos': (600, 450)},
-    {'name': 'Royal Arena', 'produces': 'livestock', 'pos': (800, 400)},
-    {'name': 'Frozen Peak', 'produces': 'grain', 'pos': (1000, 450)},
-    {'name': 'Jungle Arena', 'produces': 'wood', 'pos': (500, 250)},
-    {'name': 'Hog Mountain', 'produces': 'iron', 'pos': (700, 200)},
-    {'name': 'Windsor', 'produces': None, 'pos': (650, 500), 'is_capital': True},
+    {'name': 'Goblin Stadium', 'image': 'goblin_stadium.png', 'produces': 'wood', 'pos': (300, 600)},
+    {'name': 'Bone Pit', 'image': 'bone_pit.png', 'produces': 'iron', 'pos': (500, 700)},
+    {'name': 'Barbarian Bowl', 'image': 'barbarian_bowl.png', 'produces': 'livestock', 'pos': (700, 650)},
+    {'name': 'P.E.K.K.A\'s Playhouse', 'image': 'pekkas_playhouse.png', 'produces': 'grain', 'pos': (900, 600)},
+    {'name': 'Spell Valley', 'image': 'spell_valley.png', 'produces': 'wood', 'pos': (400, 400)},
+    {'name': 'Builder\'s Workshop', 'image': 'builders_workshop.png', 'produces': 'iron', 'pos': (600, 450)},
+    {'name': 'Royal Arena', 'image': 'royal_arena.png', 'produces': 'livestock', 'pos': (800, 400)},
+    {'name': 'Frozen Peak', 'image': 'frozen_peak.png', 'produces': 'grain', 'pos': (1000, 450)},
+    {'name': 'Jungle Arena', 'image': 'jungle_arena.png', 'produces': 'wood', 'pos': (500, 250)},
+    {'name': 'Hog Mountain', 'image': 'hog_mountain.png', 'produces': 'iron', 'pos': (700, 200)},
+    {'name': 'Windsor', 'image': 'windsor_capital.png', 'produces': None, 'pos': (650, 500), 'is_capital': True},
 ]
 
 INITIAL_POPULATION = 1000
@@ -46,6 +60,15 @@ MAX_DECLINE_RATE = -0.03
 
 TRADE_CART_SPEED = 200
 TRADE_EFFICIENCY = 0.98
+TRADE_MAX_CANDIDATES = 8
+TRADE_MIN_AMOUNT = 5  # smaller shipments aren't worth a cart
+
+# Roads: trade follows connected_routes. A road carries at most
+# ROUTE_CAPACITY units a month; road searches stop after ROUTE_SEARCH_NODES villages
+ROUTE_CAPACITY = 200
+ROUTE_SEARCH_NODES = 64
+
+SCENARIO_SPACING = 180  # mean distance between generated villages, as on the hand-made map
 
 EVENT_BASE_CHANCE = 0.20
 
@@ -140,6 +163,28 @@ COLOR_CAPITAL = (200, 100, 100)
 COLOR_ROUTE = (150, 150, 150)
 COLOR_CART = (200, 150, 50)
 
+MAP_CACHE_BYTES = 64 * 1024 * 1024
+SPRITE_CACHE_BYTES = 16 * 1024 * 1024
+SPRITE_ATLAS_WIDTH = 2048
+TEXT_CACHE_ITEMS = 1024
+CHART_CACHE_ITEMS = 16
+ASSET_CACHE_DIR = '.asset_cache'  # pre-scaled image bundle, next to the sources
+MAX_DIRTY_RECTS = 256
+
+# Profiler: frames kept for percentiles, timed calls kept for export
+PROFILE_WINDOW = 300
+PROFILE_TRACE_EVENTS = 200_000
+PROFILE_REFRESH = 10  # frames between overlay redraws
+PROFILE_PANEL_WIDTH = 460
+PROFILE_TRACE_PATH = 'profile_trace'  # .json and .csv are appended
+
+# Level of detail: below LOD_FAR_ZOOM carts are drawn as flows, above
+# LOD_NEAR_ZOOM cities show their production and population
+LOD_FAR_ZOOM = 1.0
+LOD_NEAR_ZOOM = 1.8
+CULL_MARGIN = 100  # screen pixels drawn around the window edge
+CITY_EXTENT = 120  # world units a city's labels reach from its center
+
 RESOURCE_COLORS = {
     'wood': (139, 90, 43),
     'iron': (128, 128, 128),
@@ -1,31 +1,69 @@
-
-import random
+from collections import deque
+import numpy as np
 import constants as C
+from rng import make_streams, new_seed
+
+EVENT_TYPES = list(C.EVENT_TYPES.keys())
+MAX_AFFECTED = 3
 
 class EventSystem:
-    """Manages random disaster events"""
-    def __init__(self, villages):
+    """Manages random disaster events
+    
+    Draws come from two private streams: 'events' decides whether and which
+    event happens, 'sampling' picks the villages. Every event is recorded
+    in a schedule that can be replayed into another run.
+    """
+    def __init__(self, villages, seed=None, schedule=None):
         self.villages = villages
-        self.event_history = []
+        self.event_history = deque(maxlen=C.EVENT_HISTORY_CAPACITY)  # (year, month, type, village names)
+        
+        self.seed = seed if seed is not None else new_seed()
+        streams = make_streams(self.seed)
+        self.rng = streams['events']
+        self.sampling_rng = streams['sampling']
+        
+        # Rows of (month index, event type id, village ids padded with -1);
+        # the first event_count are filled and the array doubles when full.
+        # event_count counts every event, including those event_history has dropped
+        self.recorded = np.zeros((C.HISTORY_START_CAPACITY, 2 + MAX_AFFECTED), dtype=np.int32)
+        self.event_count = 0
+        self.replay = None
+        if schedule is not None:
+            self.replay = {}
+            for row in np.asarray(schedule).tolist():
+                self.replay.setdefault(row[0], []).append(row)
     
     def check_and_spawn_events(self, year, month):
         """Check if events should spawn this month"""
+        if self.replay is not None:
+            for row in self.replay.get(self._month_index(year, month), ()):
+                self._apply(year, month, EVENT_TYPES[row[1]], [self.villages[i] for i in row[2:] if i >= 0])
+            return
+        
         # Random chance for event
-        if random.random() < C.EVENT_BASE_CHANCE:
+        if self.rng.random() < C.EVENT_BASE_CHANCE:
             self.spawn_random_event(year, month)
     
     def spawn_random_event(self, year, month):
         """Spawn a random disaster event"""
         # Choose random event type
-        event_type = random.choice(list(C.EVENT_TYPES.keys()))
+        event_type = self.rng.choice(EVENT_TYPES)
         
         alive_villages = [v for v in self.villages if v.is_alive and not v.is_capital]
         
         if not alive_villages:
             return
         
-        num_affected = random.randint(1, min(3, len(alive_villages)))
-        affected_villages = random.sample(alive_villages, num_affected)
+        num_affected = self.sampling_rng.randint(1, min(MAX_AFFECTED, len(alive_villages)))
+        affected_villages = self.sampling_rng.sample(alive_villages, num_affected)
+        
+        return self._apply(year, month, event_type, affected_villages)
+    
+    def _apply(self, year, month, event_type, affected_villages):
+        # A replayed village may already be dead in this run
+        affected_villages = [v for v in affected_villages if v.is_alive]
+        if not affected_villages:
+            return
         
         for village in affected_villages:
             village.add_event(event_type)
@@ -33,4 +71,26 @@ class EventSystem:
         village_names = [v.name for v in affected_villages]
         self.event_history.append((year, month, event_type, village_names))
         
-        return event_type, village_names
\ No newline at end of file
+        ids = [v.id for v in affected_villages]
+        ids += [-1] * (MAX_AFFECTED - len(ids))
+        if self.event_count == len(self.recorded):
+            self.recorded = np.concatenate((self.recorded, np.zeros_like(self.recorded)))
+        self.recorded[self.event_count] = [self._month_index(year, month), EVENT_TYPES.index(event_type)] + ids
+        self.event_count += 1
+        
+        return event_type, village_names
+    
+    @staticmethod
+    def _month_index(year, month):
+        return (year - C.SIMULATION_START_YEAR) * C.MONTHS_PER_YEAR + month - 1
+    
+    def schedule(self):
+        """Every event so far as an int32 array of (month, type, id, id, id) rows"""
+        return self.recorded[:self.event_count].copy()
+    
+    def load(self, schedule):
+        """Carry on from a run that recorded schedule, as saved by a snapshot"""
+        schedule = np.asarray(schedule, dtype=np.int32).reshape(-1, 2 + MAX_AFFECTED)
+        self.recorded = np.zeros((max(C.HISTORY_START_CAPACITY, len(schedule)), 2 + MAX_AFFECTED), dtype=np.int32)
+        self.recorded[:len(schedule)] = schedule
+        self.event_count = len(schedule)
\ No newline at end of file
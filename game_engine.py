@@ -1,78 +1,168 @@
-
 import constants as C
-from village import Village
+from village import Village, VillageRegistry
 from trade_system import TradeSystem
 from events import EventSystem
+from geometry import SpatialIndex, nearest_sites
+from profiler import timed
+from scheduler import Scheduler
+from sustainability import SustainabilityScorer
+from timeseries import TimeSeries
 
 class GameEngine:
     """Main game engine managing simulation"""
-    def __init__(self):
+    def __init__(self, cities=None, seed=None, event_schedule=None):
         self.current_year = C.SIMULATION_START_YEAR
         self.current_month = 1
-        self.elapsed_time = 0.0
-        self.month_timer = 0.0
         
-        self.villages = []
-        for city_data in C.CITIES:
-            village = Village(
-                city_data['name'],
-                city_data['produces'],
-                city_data['pos'],
-                city_data.get('is_capital', False)
-            )
-            self.villages.append(village)
+        # Month boundaries and cart arrivals all run off one clock
+        self.scheduler = Scheduler()
+        self.next_month = None
+        
+        self.registry = VillageRegistry(self._create_villages(cities if cities is not None else C.CITIES))
+        self.villages = self.registry.villages
+        self.geometry = SpatialIndex(v.position for v in self.villages)
         
         self._setup_trade_routes()
+        self._assign_tax_capitals()
         
-        self.trade_system = TradeSystem(self.villages)
-        self.event_system = EventSystem(self.villages)
+        self.trade_system = TradeSystem(self.registry, self.scheduler)
+        # event_schedule replays another run's disasters instead of drawing new ones
+        self.event_system = EventSystem(self.villages, seed, event_schedule)
+        self.seed = self.event_system.seed
         
+        self.scorer = SustainabilityScorer(self.villages)
         self.sustainability_score = 500  
-        self.sustainability_history = []
+        # Monthly scores for C.HISTORY_CAPACITY months, then yearly means
+        self.sustainability_history = TimeSeries(dtype=int, archive=(C.MONTHS_PER_YEAR, C.HISTORY_ARCHIVE_YEARS))
         
         self.is_running = True
         self.is_paused = False
         self.simulation_complete = False
         
         self.total_trades = 0
-        self.total_deaths = 0
         self.total_events = 0
+        
+        # Bumped whenever villages change, so renderers know to redraw
+        self.version = 0
+        
+        self.set_clock(0.0)
+    
+    @property
+    def elapsed_time(self):
+        """Simulated seconds since the start"""
+        return self.scheduler.now
+    
+    def set_clock(self, elapsed_time, next_month=None):
+        """Put the clock at elapsed_time with the next month due at next_month (default: a month on)"""
+        self.scheduler.cancel(self._month_due)
+        self.scheduler.now = elapsed_time
+        self.next_month = next_month if next_month is not None else elapsed_time + C.SECONDS_PER_MONTH
+        self.scheduler.schedule(self.next_month, self._month_due, priority=1)
+    
+    @property
+    def total_deaths(self):
+        """Villages that have died, each counted once"""
+        return self.scorer.deaths
+    
+    def _create_villages(self, cities):
+        """Build a Village for every city definition"""
+        villages = []
+        for city_data in cities:
+            village = Village(
+                city_data['name'],
+                city_data['produces'],
+                city_data['pos'],
+                city_data.get('is_capital', False)
+            )
+            villages.append(village)
+        return villages
     
     def _setup_trade_routes(self):
         """Setup trade route connections between villages"""
-        import math
-        
-        for i, village in enumerate(self.villages):
-            distances = []
-            for j, other in enumerate(self.villages):
-                if i != j:
-                    dx = village.position[0] - other.position[0]
-                    dy = village.position[1] - other.position[1]
-                    dist = math.sqrt(dx*dx + dy*dy)
-                    distances.append((other.name, dist))
-            
-            distances.sort(key=lambda x: x[1])
-            num_connections = 4 if village.is_capital else 3
-            village.connected_routes = [name for name, _ in distances[:num_connections]]
+        for village in self.villages:
+            self._connect_village(village)
     
-    def update(self, dt):
-        """Main update loop"""
-        if self.simulation_complete:
+    def _connect_village(self, village):
+        """Connect a village to its nearest neighbours (by village id)"""
+        num_connections = 4 if village.is_capital else 3
+        village.connected_routes = self.geometry.nearest_to(village.id, num_connections)
+    
+    def _assign_tax_capitals(self):
+        """Each village pays its tax to the nearest capital (None: it is one, or there are none)"""
+        capitals = [v.id for v in self.villages if v.is_capital]
+        self.tax_capitals = [None] * len(self.villages)
+        if not capitals:
             return
         
-        if not self.is_paused:
-            self.elapsed_time += dt
-            self.month_timer += dt
-            
-            if self.month_timer >= C.SECONDS_PER_MONTH:
-                self.month_timer -= C.SECONDS_PER_MONTH
-                self.update_month()
-            
-            if self.current_year >= C.SIMULATION_END_YEAR:
-                self.simulation_complete = True
+        nearest = nearest_sites([v.position for v in self.villages], [self.villages[i].position for i in capitals])
+        for village, k in zip(self.villages, nearest.tolist()):
+            if not village.is_capital:
+                self.tax_capitals[village.id] = capitals[k]
+    
+    def add_village(self, city_data):
+        """Found a new village mid-simulation and connect it to its neighbours"""
+        village = self._new_village(city_data)
+        self.registry.add(village)
+        self.geometry.add(village.position)
+        self.scorer.village_added(village)
+        self._connect_village(village)
+        self._assign_tax_capitals()
+        self.version += 1
+        return village
+    
+    def _new_village(self, city_data):
+        """A Village for a city founded mid-simulation"""
+        return self._create_villages([city_data])[0]
+    
+    def get_village(self, key):
+        """Look up a village by id or by name"""
+        if isinstance(key, int):
+            return self.registry[key]
+        return self.registry.get(key)
+    
+    def build_structure(self, village, building_type):
+        """Build on behalf of the ruler, keeping the score aggregates current"""
+        if not village.is_alive or not village.build_structure(building_type):
+            return False
         
-        self.trade_system.update(dt)
+        self.scorer.building_built(building_type)
+        for resource, amount in C.BUILDINGS[building_type]['cost'].items():
+            self.scorer.resources_moved(resource, -amount)
+        self.version += 1
+        return True
     
+    @timed('engine.update')
+    def update(self, dt):
+        """Main update loop: move the clock on dt, running whatever falls due
+        
+        Returns False, doing nothing, while paused or once the simulation
+        is complete.
+        """
+        if self.simulation_complete or self.is_paused:
+            return False
+        self.run_until(self.scheduler.now + dt)
+        return True
+    
+    def run_until(self, time):
+        """Run every month boundary and cart arrival up to time, in order
+        
+        Nothing happens in between, so however far time is, the cost is
+        only that of what falls due.
+        """
+        if not self.simulation_complete:
+            self.scheduler.run_until(time)
+    
+    def _month_due(self):
+        self.update_month()
+        if self.current_year >= C.SIMULATION_END_YEAR:
+            self.simulation_complete = True
+            return
+        # After the carts due at the same moment, so a cart taking exactly
+        # a month arrives before the next refresh
+        self.next_month += C.SECONDS_PER_MONTH
+        self.scheduler.schedule(self.next_month, self._month_due, priority=1)
+    
+    @timed('engine.update_month')
     def update_month(self):
         """Process one month cycle"""
         self.current_month += 1
@@ -82,8 +172,23 @@ class GameEngine:
         
         self.event_system.check_and_spawn_events(self.current_year, self.current_month)
         
-        capital = None
-        total_tax = 0
+        self._update_villages()
+        
+        trades = self.trade_system.calculate_trades()
+        self.trade_system.execute_trades(trades)
+        self.total_trades += len(trades)
+        
+        # Shipped resources leave the stockpiles until their cart arrives
+        for _, _, resource, amount in trades:
+            self.scorer.resources_moved(resource, -amount)
+        
+        self._update_sustainability_score()
+        self.version += 1
+    
+    def _update_villages(self):
+        """Apply production, consumption, tax and growth to every village"""
+        taxes = {}  # capital id -> tax collected for it
+        self.scorer.begin_month()
         
         for village in self.villages:
             if not village.is_alive:
@@ -95,76 +200,38 @@ class GameEngine:
             tax = 0
             if not village.is_capital:
                 tax = production.get('gold', 0) * C.CAPITAL_TAX_RATE
-                total_tax += tax
-            else:
-                capital = village
+                capital_id = self.tax_capitals[village.id]
+                if capital_id is not None:
+                    taxes[capital_id] = taxes.get(capital_id, 0) + tax
             
             village.update_month(production, consumption, tax)
+            
+            if village.is_alive:
+                self.scorer.village_updated(village)
+            else:
+                self.scorer.village_died(village)
         
-        if capital and capital.is_alive:
-            capital.resources['gold'] += total_tax
-        
-        trades = self.trade_system.calculate_trades()
-        self.trade_system.execute_trades(trades)
-        self.total_trades += len(trades)
-        
-        self._update_sustainability_score()
-        
-        for village in self.villages:
-            if not village.is_alive:
-                self.total_deaths += 1
+        for capital_id, total_tax in taxes.items():
+            capital = self.villages[capital_id]
+            if capital.is_alive:
+                capital.resources['gold'] += total_tax
+                self.scorer.resources_moved('gold', total_tax)
     
     def _update_sustainability_score(self):
         """Calculate sustainability score based on kingdom state"""
-        score = 0
-        weights = C.SUSTAINABILITY_WEIGHTS
-        
-        resource_variance = []
-        for resource in C.RESOURCES:
-            total = sum(v.resources[resource] for v in self.villages if v.is_alive)
-            resource_variance.append(total)
-        
-        if resource_variance:
-            avg = sum(resource_variance) / len(resource_variance)
-            if avg > 0:
-                variance_ratio = max(resource_variance) / (min(resource_variance) + 1)
-                balance_score = max(0, 1.0 - (variance_ratio - 1) / 10)  # Lower variance = higher score
-                score += balance_score * weights['resource_balance']
-        
-        alive_villages = [v for v in self.villages if v.is_alive]
-        if alive_villages:
-            avg_growth = sum(v.growth_rate for v in alive_villages) / len(alive_villages)
-            stability_score = max(0, min(1.0, 0.5 + avg_growth * 5))
-            
-            death_penalty = self.total_deaths / len(self.villages)
-            stability_score *= (1 - death_penalty)
-            
-            score += stability_score * weights['population_stability']
-        
-        if self.current_month > 1:
-            trade_rate = self.total_trades / ((self.current_year - C.SIMULATION_START_YEAR) * 12 + self.current_month)
-            efficiency_score = min(1.0, trade_rate / 20)  # Optimal around 20 trades/month
-            score += efficiency_score * weights['trade_efficiency']
-        
-        total_events = len(self.event_system.event_history)
-        if total_events > 0:
-            recovery_rate = len(alive_villages) / len(self.villages)
-            score += recovery_rate * weights['disaster_recovery']
-        else:
-            score += 0.5 * weights['disaster_recovery']
-        
-        total_buildings = sum(len(v.buildings) for v in alive_villages)
-        building_types = set()
-        for v in alive_villages:
-            building_types.update(v.buildings)
-        
-        if total_buildings > 0:
-            diversity_score = len(building_types) / len(C.BUILDINGS)
-            score += diversity_score * weights['building_diversity']
-        
-        self.sustainability_score = int(score)
+        months_elapsed = (self.current_year - C.SIMULATION_START_YEAR) * 12 + self.current_month
+        
+        self.sustainability_score = self.scorer.update(
+            months_elapsed if self.current_month > 1 else 0,
+            self.total_trades,
+            self.event_system.event_count
+        )
         self.sustainability_history.append(self.sustainability_score)
     
+    def get_score_breakdown(self):
+        """Points each sustainability component contributed this month"""
+        return self.scorer.breakdown()
+    
     def get_capital(self):
         """Get the capital village"""
         for village in self.villages:
@@ -0,0 +1,164 @@
+"""
+Geometry - shared spatial index over village positions
+"""
+
+import heapq
+import math
+import numpy as np
+
+
+class SpatialIndex:
+    """A uniform grid over fixed points, for nearest, radius and box queries
+    
+    Points are addressed by their index in the positions list, which for the
+    engine is the village's index in engine.villages.
+    """
+    def __init__(self, positions, cell_size=None):
+        self.positions = [tuple(p) for p in positions]
+        self.active = [True] * len(self.positions)
+        
+        self.cell_size = cell_size or self._pick_cell_size()
+        self.cells = {}  # (cx, cy) -> list of point indices
+        self.bounds = None  # (min_cx, min_cy, max_cx, max_cy) of occupied cells
+        for i in range(len(self.positions)):
+            self._insert(i)
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def _pick_cell_size(self):
+        # Aim for a couple of points per cell over the bounding box
+        if len(self.positions) < 2:
+            return 100.0
+        xs = [p[0] for p in self.positions]
+        ys = [p[1] for p in self.positions]
+        area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+        return max(math.sqrt(2 * area / len(self.positions)), 1.0)
+    
+    def _cell(self, point):
+        return (int(math.floor(point[0] / self.cell_size)), int(math.floor(point[1] / self.cell_size)))
+    
+    def _insert(self, i):
+        cell = self._cell(self.positions[i])
+        self.cells.setdefault(cell, []).append(i)
+        
+        if self.bounds is None:
+            self.bounds = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            min_cx, min_cy, max_cx, max_cy = self.bounds
+            self.bounds = (min(min_cx, cell[0]), min(min_cy, cell[1]), max(max_cx, cell[0]), max(max_cy, cell[1]))
+    
+    def add(self, position):
+        """Add a point and return its index"""
+        i = len(self.positions)
+        self.positions.append(tuple(position))
+        self.active.append(True)
+        self._insert(i)
+        return i
+    
+    def remove(self, i):
+        """Drop a point from spatial queries; its index stays valid"""
+        if not self.active[i]:
+            return
+        self.active[i] = False
+        self.cells[self._cell(self.positions[i])].remove(i)
+    
+    def nearest(self, point, k=1, exclude=(), predicate=None):
+        """Indices of the k nearest active points to (x, y), closest first
+        
+        Ties go to the lower index. exclude skips indices outright and
+        predicate, if given, must accept an index for it to count.
+        """
+        if k <= 0 or self.bounds is None:
+            return []
+        
+        cx, cy = self._cell(point)
+        min_cx, min_cy, max_cx, max_cy = self.bounds
+        max_ring = max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+        
+        best = []  # max-heap of (-distance, -index) holding the k closest so far
+        for ring in range(max_ring + 1):
+            # Everything in this ring or beyond is at least (ring - 1) cells away
+            if len(best) == k and -best[0][0] < (ring - 1) * self.cell_size:
+                break
+            
+            for cell in self._ring(cx, cy, ring):
+                for i in self.cells.get(cell, ()):
+                    if i in exclude or (predicate is not None and not predicate(i)):
+                        continue
+                    entry = (-math.dist(point, self.positions[i]), -i)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+        
+        return [-i for _, i in sorted(best, reverse=True)]
+    
+    def nearest_to(self, i, k=1, predicate=None):
+        """The k nearest active points to point i, excluding i itself"""
+        return self.nearest(self.positions[i], k, exclude=(i,), predicate=predicate)
+    
+    def within(self, point, radius):
+        """Indices of active points strictly closer than radius, closest first"""
+        x, y = point
+        min_cx, min_cy = self._cell((x - radius, y - radius))
+        max_cx, max_cy = self._cell((x + radius, y + radius))
+        
+        found = []
+        for gx in range(min_cx, max_cx + 1):
+            for gy in range(min_cy, max_cy + 1):
+                for i in self.cells.get((gx, gy), ()):
+                    d = math.dist(point, self.positions[i])
+                    if d < radius:
+                        found.append((d, i))
+        
+        found.sort()
+        return [i for _, i in found]
+    
+    def in_rect(self, x0, y0, x1, y1):
+        """Indices of active points inside the box [x0, x1] x [y0, y1], in index order"""
+        if self.bounds is None:
+            return []
+        min_cx, min_cy = self._cell((x0, y0))
+        max_cx, max_cy = self._cell((x1, y1))
+        min_cx, min_cy = max(min_cx, self.bounds[0]), max(min_cy, self.bounds[1])
+        max_cx, max_cy = min(max_cx, self.bounds[2]), min(max_cy, self.bounds[3])
+        
+        found = []
+        for gx in range(min_cx, max_cx + 1):
+            for gy in range(min_cy, max_cy + 1):
+                for i in self.cells.get((gx, gy), ()):
+                    x, y = self.positions[i]
+                    if x0 <= x <= x1 and y0 <= y <= y1:
+                        found.append(i)
+        
+        found.sort()
+        return found
+    
+    @staticmethod
+    def _ring(cx, cy, ring):
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for gx in range(cx - ring, cx + ring + 1):
+            yield (gx, cy - ring)
+            yield (gx, cy + ring)
+        for gy in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, gy)
+            yield (cx + ring, gy)
+
+
+def nearest_sites(points, sites, chunk=4096):
+    """For each point, the index of the closest site (ties to the lower index)
+    
+    Brute force over the sites in chunks of points, which suits a few
+    sites (capitals, say) against many points.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    sites = np.asarray(sites, dtype=np.float64).reshape(-1, 2)
+    nearest = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), chunk):
+        block = points[start:start + chunk]
+        d2 = ((block[:, None, :] - sites[None, :, :]) ** 2).sum(axis=2)
+        nearest[start:start + chunk] = d2.argmin(axis=1)
+    return nearest
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Headless simulation - runs the kingdom month by month without pygame
+"""
+
+import sys
+import time
+import constants as C
+from game_engine import GameEngine
+
+DELIVERY_MODES = ('instant', 'monthly')
+
+
+def run_headless(engine=None, delivery='instant', months=None):
+    """Run the simulation back-to-back with no display or cart animation.
+    
+    The clock jumps from one scheduled happening to the next, so a month
+    costs only the refresh and its cart arrivals.
+    delivery='instant' hands carts over as soon as they are dispatched,
+    delivery='monthly' lets them run their month on the clock, turning
+    from road to road and landing just before the next monthly refresh,
+    exactly as in the GUI.
+    """
+    if delivery not in DELIVERY_MODES:
+        raise ValueError(f"Unknown delivery mode: {delivery}")
+    
+    if engine is None:
+        engine = GameEngine()
+    
+    if months is None:
+        months = (C.SIMULATION_END_YEAR - C.SIMULATION_START_YEAR) * C.MONTHS_PER_YEAR
+    
+    for _ in range(months):
+        if engine.simulation_complete:
+            break
+        
+        engine.run_until(engine.next_month)
+        
+        if delivery == 'instant':
+            engine.trade_system.deliver_all()
+    
+    return engine
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    delivery = sys.argv[2] if len(sys.argv) > 2 else 'instant'
+    
+    start = time.perf_counter()
+    for _ in range(runs):
+        engine = run_headless(delivery=delivery)
+        alive = sum(1 for v in engine.villages if v.is_alive)
+        print(f"Year: {engine.current_year}, Alive: {alive}/{len(engine.villages)}, "
+              f"Trades: {engine.total_trades}, Score: {engine.sustainability_score}")
+    elapsed = time.perf_counter() - start
+    
+    print(f"{runs} run(s) in {elapsed:.3f}s ({elapsed / runs * 1000:.1f} ms/run)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
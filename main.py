@@ -1,7 +1,11 @@
 import pygame
 import sys
+import constants as C
 from game_engine import GameEngine
+from profiler import profiler
 from ui_renderer import UIRenderer
+from sim_clock import FixedStepClock
+from sim_worker import SimulationWorker
 
 pygame.init()
 
@@ -9,13 +13,28 @@ SCREEN_WIDTH = 1600
 SCREEN_HEIGHT = 900
 FPS = 60
 
-def main():
+def main(threaded=False, profile=False):
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Windsor Kingdom Resource Management System")
     clock = pygame.time.Clock()
     
     engine = GameEngine()
-    renderer = UIRenderer(screen, engine)
+    # The simulation runs in fixed steps on its own clock; frames only draw
+    sim_clock = FixedStepClock()
+    
+    # Threaded: the engine steps on a worker thread and the renderer draws
+    # the worker's latest published frame
+    worker = None
+    if threaded:
+        worker = SimulationWorker(engine, sim_clock)
+        worker.start()
+        renderer = UIRenderer(screen, worker.front, worker)
+    else:
+        renderer = UIRenderer(screen, engine, sim_clock)
+    
+    # F3 shows the profiler panel, F4 writes the trace; --profile records
+    # from the start and writes the trace on exit
+    profiler.enabled = profile
     
     running = True
     frame_count = 0
@@ -27,19 +46,29 @@ def main():
                 running = False
             renderer.handle_event(event)
         
-        engine.update(dt)
+        if worker:
+            renderer.engine = worker.front
+        else:
+            sim_clock.advance(dt, engine.update)
         
+        view = renderer.engine
         if frame_count % 60 == 0:
-            print(f"Year: {engine.current_year}, Month: {engine.current_month}, Carts: {len(engine.trade_system.active_carts)}, Alive: {sum(1 for v in engine.villages if v.is_alive)}")
+            print(f"Year: {view.current_year}, Month: {view.current_month}, Carts: {len(view.trade_system.fleet)}, Alive: {sum(1 for v in view.villages if v.is_alive)}")
         
         renderer.render()
         
-        pygame.display.flip()
+        pygame.display.update(renderer.dirty_rects)
         
+        profiler.end_frame()
         frame_count += 1
     
+    if worker:
+        worker.stop()
+    if profile:
+        profiler.export(C.PROFILE_TRACE_PATH + '.json')
+        profiler.export(C.PROFILE_TRACE_PATH + '.csv')
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(threaded='--threaded' in sys.argv, profile='--profile' in sys.argv)
\ No newline at end of file
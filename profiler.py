@@ -0,0 +1,142 @@
+"""
+Profiler - named timers with rolling percentiles and trace export
+"""
+
+import csv
+import functools
+import json
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+import numpy as np
+import constants as C
+
+
+class Profiler:
+    """Collects named timings per frame while enabled
+    
+    Code is instrumented with @profiler.timed(name) or `with
+    profiler.section(name)`; both cost one attribute check while disabled.
+    Each frame's time per name is summed, and the last C.PROFILE_WINDOW
+    frames of those sums feed the percentiles. Every timed call is also
+    kept (up to C.PROFILE_TRACE_EVENTS) for export().
+    """
+    def __init__(self, window=C.PROFILE_WINDOW, trace_limit=C.PROFILE_TRACE_EVENTS):
+        self.enabled = False
+        self.window = window
+        
+        self.frame = 0
+        self.frame_start = None
+        self.frame_times = deque(maxlen=window)
+        self.allocations = deque(maxlen=window)  # net allocated blocks per frame
+        self.phases = {}  # name -> deque of per-frame totals
+        self.current = defaultdict(float)  # name -> seconds so far this frame
+        self.calls = defaultdict(int)
+        self.last_calls = {}
+        
+        self.origin = time.perf_counter()
+        self.trace = deque(maxlen=trace_limit)  # (frame, name, thread, start, duration)
+        self.blocks = sys.getallocatedblocks()
+    
+    def _record(self, name, start, duration):
+        self.current[name] += duration
+        self.calls[name] += 1
+        self.trace.append((self.frame, name, threading.get_ident(), start - self.origin, duration))
+    
+    def timed(self, name):
+        """Decorator timing every call of a function under name"""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._record(name, start, time.perf_counter() - start)
+            return wrapper
+        return decorate
+    
+    def section(self, name):
+        """Context manager timing a block under name"""
+        return _Section(self, name)
+    
+    def end_frame(self):
+        """Close the current frame; call once per pass of the main loop"""
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times.append(now - self.frame_start)
+        self.frame_start = now
+        
+        blocks = sys.getallocatedblocks()
+        self.allocations.append(blocks - self.blocks)
+        self.blocks = blocks
+        
+        for name in self.phases.keys() | self.current.keys():
+            if name not in self.phases:
+                self.phases[name] = deque(maxlen=self.window)
+            self.phases[name].append(self.current.get(name, 0.0))
+        self.last_calls = dict(self.calls)
+        self.current.clear()
+        self.calls.clear()
+        self.frame += 1
+    
+    def reset(self):
+        self.__init__(self.window, self.trace.maxlen)
+    
+    def summary(self, percentiles=(50, 95, 99)):
+        """{name: [p50, p95, p99] in ms} over the window, 'frame' first, slowest phase next"""
+        stats = {}
+        if self.frame_times:
+            stats['frame'] = (np.percentile(self.frame_times, percentiles) * 1000).tolist()
+        phases = {
+            name: (np.percentile(times, percentiles) * 1000).tolist()
+            for name, times in self.phases.items() if times
+        }
+        for name in sorted(phases, key=lambda n: -phases[n][-1]):
+            stats[name] = phases[name]
+        return stats
+    
+    def export(self, path):
+        """Write the trace to path: Chrome trace JSON for .json, one row per call for .csv"""
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['frame', 'name', 'thread', 'start_ms', 'duration_ms'])
+                for frame, name, thread, start, duration in self.trace:
+                    writer.writerow([frame, name, thread, f"{start * 1000:.4f}", f"{duration * 1000:.4f}"])
+            return
+        
+        # Loads in chrome://tracing and Perfetto
+        events = [
+            {'name': name, 'ph': 'X', 'pid': 0, 'tid': thread, 'ts': start * 1e6, 'dur': duration * 1e6,
+             'args': {'frame': frame}}
+            for frame, name, thread, start, duration in self.trace
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'summary': self.summary()}, f)
+
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        if self.profiler.enabled:
+            self.profiler._record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+# The one profiler every module reports to
+profiler = Profiler()
+timed = profiler.timed
\ No newline at end of file
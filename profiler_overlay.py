@@ -0,0 +1,88 @@
+"""
+Profiler overlay - the F3 panel drawn over every view
+"""
+
+import numpy as np
+import pygame
+import constants as C
+
+
+class ProfilerOverlay:
+    """Panel with the frame-time graph, per-phase percentiles, carts and allocations
+    
+    The panel is opaque, so redrawing it over itself every frame is safe
+    with dirty-rect updates; its contents refresh every
+    C.PROFILE_REFRESH frames.
+    """
+    def __init__(self, profiler, font=None, width=C.PROFILE_PANEL_WIDTH):
+        self.profiler = profiler
+        self.font = font
+        self.width = width
+        self.visible = False
+        self.panel = None
+        self.drawn_frame = None
+        self.was_enabled = False
+    
+    def toggle(self):
+        """Show or hide the panel; the profiler runs at least while it is shown"""
+        self.visible = not self.visible
+        if self.visible:
+            self.was_enabled = self.profiler.enabled
+            self.profiler.enabled = True
+        else:
+            self.profiler.enabled = self.was_enabled
+        self.panel = None
+    
+    def draw(self, screen, carts):
+        """Blit the panel in the top-right corner; returns its rect, or None when hidden"""
+        if not self.visible:
+            return None
+        
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+        
+        profiler = self.profiler
+        if self.panel is None or profiler.frame - self.drawn_frame >= C.PROFILE_REFRESH:
+            self.panel = self._draw_panel(carts)
+            self.drawn_frame = profiler.frame
+        
+        rect = self.panel.get_rect(topright=(screen.get_width() - 10, 10))
+        screen.blit(self.panel, rect)
+        return rect
+    
+    def _draw_panel(self, carts):
+        profiler = self.profiler
+        stats = profiler.summary()
+        line_height = self.font.get_linesize()
+        graph_height = 80
+        rows = [('ms', 'p50', 'p95', 'p99')]
+        rows += [(name, *(f"{v:.2f}" for v in values)) for name, values in stats.items()]
+        allocations = np.median(profiler.allocations) if profiler.allocations else 0
+        footer = f"Carts: {carts}   Alloc blocks/frame: {allocations:+.0f}   Frame: {profiler.frame}"
+        
+        panel = pygame.Surface((self.width, graph_height + 16 + line_height * (len(rows) + 1)))
+        panel.fill((20, 20, 20))
+        
+        # Frame times against the 60 FPS budget (the dim line), 2x budget full height
+        budget = 1.0 / 60
+        graph = pygame.Rect(8, 8, self.width - 16, graph_height)
+        pygame.draw.rect(panel, (45, 45, 45), graph)
+        budget_y = graph.bottom - graph.height // 2
+        pygame.draw.line(panel, (90, 90, 90), (graph.left, budget_y), (graph.right, budget_y))
+        times = np.array(profiler.frame_times)
+        if len(times) > 1:
+            x = graph.left + np.arange(len(times)) * (graph.width / (profiler.window - 1))
+            y = graph.bottom - np.minimum(times / (2 * budget), 1.0) * graph.height
+            pygame.draw.lines(panel, (120, 220, 120), False, np.column_stack((x, y)).tolist(), 1)
+        
+        # Name on the left, percentiles right-aligned in fixed columns
+        columns = [self.width - 8 - 70 * i for i in (2, 1, 0)]
+        y = graph.bottom + 8
+        for name, *values in rows:
+            panel.blit(self.font.render(name, True, (230, 230, 230)), (8, y))
+            for right, value in zip(columns, values):
+                text = self.font.render(value, True, (230, 230, 230))
+                panel.blit(text, text.get_rect(topright=(right, y)))
+            y += line_height
+        panel.blit(self.font.render(footer, True, (230, 230, 230)), (8, y))
+        return panel
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+Random streams - independent, reproducible RNGs derived from one seed
+"""
+
+import random
+
+STREAMS = ('events', 'sampling')
+
+
+def new_seed():
+    """A fresh seed, drawn from the global random module so random.seed() still pins it"""
+    return random.getrandbits(63)
+
+
+def make_streams(seed, names=STREAMS):
+    """One random.Random per name, all derived from seed
+    
+    Streams are seeded from "<seed>/<name>" strings, which random hashes
+    with SHA-512, so adding a new stream never shifts the draws of the
+    existing ones.
+    """
+    return {name: random.Random(f"{seed}/{name}") for name in names}
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Route graph - the roads between villages, shortest paths and road capacity
+"""
+
+import heapq
+import math
+import numpy as np
+import constants as C
+
+
+def _road(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+class RouteGraph:
+    """Roads along every village's connected_routes, usable both ways
+    
+    Carts only travel on roads. Shortest road distances are searched from
+    a village outwards with Dijkstra, stopping after C.ROUTE_SEARCH_NODES
+    villages, and each search is cached until a village is founded, or
+    until a village it settled dies or is closed by plague or lightning
+    (closed villages neither trade nor let carts through), or one next to
+    it reopens. Every road carries at most C.ROUTE_CAPACITY units a month,
+    all resources together; once it has no room left for a cart, searches
+    go round it until the next month.
+    """
+    def __init__(self, villages):
+        self.villages = villages
+        self.adjacency = None  # village id -> {neighbour id: road length}
+        self.closed = frozenset()
+        self.trees = {}  # village id -> (settled [(distance, id)], previous hop toward it, settled ids)
+        self.ids = None  # nearby() of each searched village as a row of ids, padded with -1
+        self.distances = None  # and its road distances, padded with inf
+        self.load = {}  # road -> units carried this month
+        self.full = set()  # roads with no room left this month
+        self.detours = set()  # origins searched while a road was full
+    
+    def _build(self):
+        self.adjacency = [{} for _ in self.villages]
+        for village in self.villages:
+            for j in village.connected_routes:
+                length = math.dist(village.position, self.villages[j].position)
+                self.adjacency[village.id][j] = length
+                self.adjacency[j][village.id] = length
+        self.trees = {}
+        self.ids = np.full((len(self.villages), C.ROUTE_SEARCH_NODES), -1)
+        self.distances = np.full((len(self.villages), C.ROUTE_SEARCH_NODES), math.inf)
+    
+    def refresh(self, closed):
+        """Start a month's trading; closed holds the ids of villages carts can't pass"""
+        closed = frozenset(closed)
+        if self.adjacency is None or len(self.adjacency) != len(self.villages):
+            self._build()
+        if closed != self.closed:
+            # Searches that never settled a closed village, nor next to a
+            # reopened one, would come out the same
+            changed = set(closed - self.closed)
+            for i in self.closed - closed:
+                changed.add(i)
+                changed.update(self.adjacency[i])
+            self.trees = {origin: tree for origin, tree in self.trees.items() if changed.isdisjoint(tree[2])}
+            self.closed = closed
+        
+        # Last month's full roads are open again
+        for origin in self.detours:
+            self.trees.pop(origin, None)
+        self.load = {}
+        self.full = set()
+        self.detours = set()
+    
+    def _tree(self, origin):
+        tree = self.trees.get(origin)
+        if tree is None:
+            tree = self.trees[origin] = self._search(origin)
+        return tree
+    
+    def nearby(self, origin):
+        """[(road distance, village id)] of the villages closest to origin by road, origin first"""
+        return self._tree(origin)[0]
+    
+    def nearby_table(self, origins):
+        """nearby() of every origin as (ids, distances) arrays, one row each
+        
+        Rows are C.ROUTE_SEARCH_NODES long; searches that ran out of roads
+        are padded with id -1 at distance inf.
+        """
+        for origin in origins:
+            self._tree(origin)
+        return self.ids[origins], self.distances[origins]
+    
+    def _search(self, origin):
+        adjacency, closed, full = self.adjacency, self.closed, self.full
+        if full:
+            self.detours.add(origin)
+        dist = {origin: 0.0}
+        previous = {origin: None}
+        settled = []
+        done = set()
+        heap = [(0.0, origin)]
+        while heap and len(settled) < C.ROUTE_SEARCH_NODES:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            settled.append((d, u))
+            
+            for v, length in adjacency[u].items():
+                if v in closed or v in done or (full and _road(u, v) in full):
+                    continue
+                nd = d + length
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    previous[v] = u
+                    heapq.heappush(heap, (nd, v))
+        
+        self.ids[origin] = -1
+        self.distances[origin] = math.inf
+        self.distances[origin, :len(settled)], self.ids[origin, :len(settled)] = zip(*settled)
+        return settled, previous, done
+    
+    def path(self, source, sink):
+        """Village ids from source to sink along the shortest road; source must be nearby(sink)"""
+        previous = self.trees[sink][1]
+        path = [source]
+        while path[-1] != sink:
+            path.append(previous[path[-1]])
+        return path
+    
+    def capacity_left(self, path):
+        """Most that can still go along path this month"""
+        return min(C.ROUTE_CAPACITY - self.load.get(_road(a, b), 0.0) for a, b in zip(path, path[1:]))
+    
+    def carry(self, path, amount):
+        """Load amount onto every road along path"""
+        for a, b in zip(path, path[1:]):
+            road = _road(a, b)
+            self.load[road] = self.load.get(road, 0.0) + amount
+            if C.ROUTE_CAPACITY - self.load[road] <= C.TRADE_MIN_AMOUNT:
+                self._fill(road)
+    
+    def _fill(self, road):
+        """Close a road with no room for another cart; searches that used it are redone around it"""
+        self.full.add(road)
+        a, b = road
+        self.trees = {origin: tree for origin, tree in self.trees.items()
+                      if tree[1].get(a) != b and tree[1].get(b) != a}
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Scenario generator - procedural kingdoms of any size for stress tests
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+import numpy as np
+import constants as C
+from game_engine import GameEngine
+from geometry import nearest_sites
+from profiler import profiler
+from rng import new_seed
+
+LAYOUTS = ('uniform', 'clustered', 'coastline')
+
+# Production shares of the hand-made map: wood and iron 3 each, livestock and grain 2
+DEFAULT_MIX = dict(Counter(c['produces'] for c in C.CITIES if c['produces'] and not c.get('is_capital')))
+
+
+def generate_cities(count, layout='uniform', capitals=1, mix=None, seed=None, spacing=C.SCENARIO_SPACING):
+    """City definitions for a kingdom of count villages, in the shape of C.CITIES
+    
+    The map is a square sized so villages sit about spacing apart on
+    average, as on the hand-made map. layout picks where they go:
+    uniform scatters them evenly, clustered gathers them into towns around
+    roughly sqrt(count) / 2 centres, and coastline strings them along a
+    winding shore, thinning out inland. mix maps resources to relative
+    shares of producers (default: the hand-made map's). The capitals are
+    spread out across the villages, each collecting tax from its region.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+    if not 0 <= capitals <= count:
+        raise ValueError(f"Can't place {capitals} capitals among {count} villages")
+    
+    rng = np.random.default_rng(seed if seed is not None else new_seed())
+    side = spacing * np.sqrt(count)
+    
+    if layout == 'uniform':
+        positions = rng.uniform(0, side, (count, 2))
+    elif layout == 'clustered':
+        n_clusters = max(1, round(np.sqrt(count) / 2))
+        centres = rng.uniform(0.1 * side, 0.9 * side, (n_clusters, 2))
+        spread = side / (4 * np.sqrt(n_clusters))
+        positions = centres[rng.integers(n_clusters, size=count)] + rng.normal(0, spread, (count, 2))
+    else:
+        # Shore along x from a few random sine waves; villages inland below it
+        x = rng.uniform(0, side, count)
+        waves = rng.uniform(1, 4, 3)
+        phases = rng.uniform(0, 2 * np.pi, 3)
+        shore = 0.25 * side + 0.08 * side * np.sin(np.outer(x / side * 2 * np.pi, waves) + phases).sum(axis=1)
+        inland = rng.exponential(0.15 * side, count)
+        positions = np.column_stack((x, shore + inland))
+    positions = np.clip(positions, 0, side).round(1)
+    
+    mix = mix or DEFAULT_MIX
+    resources = list(mix)
+    shares = np.array([mix[r] for r in resources], dtype=np.float64)
+    produces = rng.choice(len(resources), size=count, p=shares / shares.sum())
+    
+    cities = [
+        {'name': f"Village {i + 1}", 'produces': resources[p], 'pos': (x, y)}
+        for i, (p, (x, y)) in enumerate(zip(produces.tolist(), positions.tolist()))
+    ]
+    for n, i in enumerate(_spread_out(positions, capitals)):
+        cities[i] = {'name': f"Capital {n + 1}", 'produces': None, 'pos': cities[i]['pos'], 'is_capital': True}
+    return cities
+
+
+def _spread_out(positions, k, rounds=10):
+    """k distinct indices whose regions hold similar shares of the villages
+    
+    Farthest-point picks seed a few rounds of k-means, and each capital is
+    the village closest to its region's centre.
+    """
+    if k == 0:
+        return []
+    picks = [int(((positions - positions.mean(axis=0)) ** 2).sum(axis=1).argmin())]
+    d2 = ((positions - positions[picks[0]]) ** 2).sum(axis=1)
+    while len(picks) < k:
+        i = int(d2.argmax())
+        picks.append(i)
+        d2 = np.minimum(d2, ((positions - positions[i]) ** 2).sum(axis=1))
+    
+    centres = positions[picks]
+    for _ in range(rounds):
+        region = nearest_sites(positions, centres)
+        for j in range(k):
+            members = positions[region == j]
+            if len(members):
+                centres[j] = members.mean(axis=0)
+    
+    taken = np.zeros(len(positions), dtype=bool)
+    picks = []
+    for centre in centres:
+        d2 = np.where(taken, np.inf, ((positions - centre) ** 2).sum(axis=1))
+        i = int(d2.argmin())
+        taken[i] = True
+        picks.append(i)
+    return picks
+
+
+def generate_engine(count, layout='uniform', capitals=1, mix=None, seed=None, engine_cls=GameEngine):
+    """A fresh engine (GameEngine or VectorGameEngine) on a generated map; seed drives map and events"""
+    seed = seed if seed is not None else new_seed()
+    return engine_cls(generate_cities(count, layout, capitals, mix, seed), seed=seed)
+
+
+def measure(count, layout='uniform', capitals=1, months=3, render=False, seed=0):
+    """Time building an engine of count villages and running months on it
+    
+    Returns {phase: median ms per month} for the profiler's phases, plus
+    'build' (engine construction, once) and, with render, 'render' (one
+    full map frame on the dummy video driver, median of a few).
+    """
+    start = time.perf_counter()
+    engine = generate_engine(count, layout, capitals, seed=seed)
+    results = {'build': (time.perf_counter() - start) * 1000}
+    
+    was_enabled = profiler.enabled
+    profiler.reset()
+    profiler.enabled = True
+    try:
+        for _ in range(months):
+            engine.update_month()
+            engine.trade_system.deliver_all()
+            profiler.end_frame()
+    finally:
+        profiler.enabled = was_enabled
+    for name in ('engine.update_month', 'trades.calculate', 'trades.execute'):
+        results[name] = profiler.summary((50,)).get(name, [0.0])[0]
+    
+    if render:
+        results['render'] = _measure_render(engine)
+    return results
+
+
+def _measure_render(engine, frames=5):
+    # pygame only comes in here, so engine-only sweeps never open a display
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from ui_renderer import UIRenderer
+    
+    pygame.init()
+    screen = pygame.display.set_mode((1600, 900))
+    renderer = UIRenderer(screen, engine)
+    times = []
+    for _ in range(frames):
+        renderer.layer_keys = {}  # Full redraw, not just the carts
+        start = time.perf_counter()
+        renderer.render()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def main():
+    """python scenario.py [counts...] [--layout=clustered] [--capitals=4] [--months=3] [--render]"""
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    counts = [int(arg) for arg in sys.argv[1:] if not arg.startswith('--')] or [100, 1000, 10000]
+    layout = options.get('layout', 'uniform')
+    capitals = int(options.get('capitals', 1))
+    months = int(options.get('months', 3))
+    render = '--render' in sys.argv
+    
+    columns = ['build', 'engine.update_month', 'trades.calculate', 'trades.execute'] + (['render'] if render else [])
+    print(f"{layout}, {capitals} capital(s), median ms over {months} month(s)")
+    print(f"{'villages':>9}" + ''.join(f"{name:>22}" for name in columns))
+    for count in counts:
+        results = measure(count, layout, capitals, months, render)
+        print(f"{count:>9}" + ''.join(f"{results[name]:>22.1f}" for name in columns))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Scheduler - the simulation clock and everything due on it, soonest first
+"""
+
+import heapq
+import itertools
+
+
+class Scheduler:
+    """A priority queue of actions due at known simulated times
+    
+    Month boundaries and carts reaching the end of a road are known as
+    soon as they are set up, so rather than every part of the simulation
+    checking each tick whether its moment has come, each one is scheduled
+    once and run_until() jumps straight from one to the next. Actions due
+    at the same time run lowest priority first, then in the order they
+    were scheduled. now only moves forward, and an action runs with now
+    set to its own due time.
+    """
+    def __init__(self, now=0.0):
+        self.now = now
+        self.queue = []  # (time, priority, order, action, args)
+        self.order = itertools.count()
+    
+    def __len__(self):
+        return len(self.queue)
+    
+    def schedule(self, time, action, *args, priority=0):
+        """Run action(*args) when the clock reaches time"""
+        heapq.heappush(self.queue, (time, priority, next(self.order), action, args))
+    
+    def next_time(self):
+        """When the next action is due, or None if nothing is scheduled"""
+        return self.queue[0][0] if self.queue else None
+    
+    def run_until(self, time):
+        """Run every action due up to and including time, then set the clock to time"""
+        queue = self.queue
+        while queue and queue[0][0] <= time:
+            due, _, _, action, args = heapq.heappop(queue)
+            self.now = max(self.now, due)
+            action(*args)
+        self.now = max(self.now, time)
+    
+    def cancel(self, action):
+        """Drop every pending call of action"""
+        self.queue = [entry for entry in self.queue if entry[3] != action]
+        heapq.heapify(self.queue)
\ No newline at end of file
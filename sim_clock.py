@@ -0,0 +1,66 @@
+"""
+Simulation clock - fixed-step simulation decoupled from the frame rate
+"""
+
+import time
+import constants as C
+
+
+class FixedStepClock:
+    """Runs the simulation in fixed steps, however long frames take
+    
+    Each frame adds its real duration times the time scale to an
+    accumulator, and step(dt) is called once per whole step in it. What is
+    left over (lag) is how far the world has moved past the last step, so
+    the renderer can draw carts lag seconds further along their roads.
+    
+    A scale of None runs as many steps as fit in the frame budget. At any
+    scale the simulation gets at most C.SIM_FRAME_BUDGET seconds per frame;
+    backlog beyond C.SIM_MAX_BACKLOG seconds of real time is dropped rather
+    than letting a slow frame make the next one slower. A step that returns
+    False made no progress (the engine is paused or finished), which ends
+    the frame's stepping and drops the backlog.
+    """
+    def __init__(self, step=1.0 / C.SIM_TICK_RATE, scale=1):
+        self.step = step
+        self.scale = scale
+        self.accumulator = 0.0
+        self.steps = 0  # steps run in the last advance()
+    
+    @property
+    def lag(self):
+        """Simulated seconds since the last step, for interpolation"""
+        return min(self.accumulator, self.step)
+    
+    def set_scale(self, scale):
+        self.scale = scale
+        self.accumulator = 0.0
+    
+    def scale_label(self):
+        return "MAX" if self.scale is None else f"{self.scale}x"
+    
+    def advance(self, frame_dt, step):
+        """Run step(dt) for every fixed step that frame_dt covers; returns steps run"""
+        deadline = time.perf_counter() + C.SIM_FRAME_BUDGET
+        self.steps = 0
+        
+        if self.scale is None:
+            while time.perf_counter() < deadline:
+                if step(self.step) is False:
+                    break
+                self.steps += 1
+            self.accumulator = 0.0
+            return self.steps
+        
+        self.accumulator += frame_dt * self.scale
+        while self.accumulator >= self.step:
+            if step(self.step) is False:
+                self.accumulator = 0.0
+                break
+            self.accumulator -= self.step
+            self.steps += 1
+            if time.perf_counter() >= deadline:
+                break
+        
+        self.accumulator = min(self.accumulator, max(C.SIM_MAX_BACKLOG * self.scale, self.step))
+        return self.steps
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Simulation worker - runs the engine on a background thread
+
+The worker owns the engine. After every batch of steps it publishes a
+Frame, a read-only copy of what the renderer draws, by swapping a single
+reference, so the render thread never waits on the simulation and never
+sees a half-updated kingdom. Anything that changes the kingdom (building,
+pausing, changing speed) is queued and run by the worker between steps.
+Village histories are only copied for the villages the renderer reads.
+"""
+
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+import constants as C
+from game_engine import GameEngine
+from timeseries import TimeSeries
+from village import Village
+
+VILLAGE_FIELDS = ('id', 'name', 'produces', 'position', 'is_capital', 'population', 'growth_rate',
+                  'is_alive', 'connected_routes', 'buildings', 'active_events')
+HISTORY_FIELDS = ('population_history', 'growth_history', 'event_log')
+NO_HISTORY = (TimeSeries(capacity=1, dtype=int), TimeSeries(capacity=1), deque())
+
+
+def _copy_history(village):
+    return tuple(getattr(village, name).copy() for name in HISTORY_FIELDS)
+
+
+class FrozenVillage(Village):
+    """A Village holding a copy of the fields the map draws
+    
+    The histories and event log are looked up in histories, the copies
+    published with this world. Reading them asks the worker (through
+    watch) to copy this village's in the next world; until then they are
+    empty.
+    """
+    def __init__(self, village, histories, watch):
+        for name in VILLAGE_FIELDS:
+            value = getattr(village, name)
+            setattr(self, name, value.copy() if isinstance(value, list) else value)
+        self.resources = dict(village.resources.items())
+        self.histories = histories
+        self.watch = watch
+    
+    def _history(self, field):
+        self.watch(self.id)
+        return self.histories.get(self.id, NO_HISTORY)[field]
+    
+    population_history = property(lambda self: self._history(0))
+    growth_history = property(lambda self: self._history(1))
+    event_log = property(lambda self: self._history(2))
+
+
+class Frame:
+    """What the renderer reads in place of the engine
+    
+    Villages are frozen copies, refreshed when engine.version changes (at
+    most every C.WORKER_WORLD_INTERVAL seconds) or the renderer reads the
+    history of a village the world has none for; the carts, scores and
+    clock are copied on every publish. geometry is shared with the engine:
+    its points only ever get added, which is safe to read alongside.
+    """
+    get_time_string = GameEngine.get_time_string
+    get_progress_percent = GameEngine.get_progress_percent
+    
+    def __init__(self, worker, villages, event_history):
+        engine = worker.engine
+        self.worker = worker
+        self.villages = villages
+        self.geometry = engine.geometry
+        self.trade_system = SimpleNamespace(fleet=engine.trade_system.fleet.copy())
+        self.event_system = SimpleNamespace(event_history=event_history, event_count=engine.event_system.event_count)
+        self.lag = worker.clock.lag
+        
+        for name in ('version', 'current_year', 'current_month', 'elapsed_time', 'is_paused',
+                     'simulation_complete', 'sustainability_score', 'total_trades', 'total_events',
+                     'total_deaths'):
+            setattr(self, name, getattr(engine, name))
+        self.sustainability_history = worker.score_history()
+    
+    def toggle_pause(self):
+        self.worker.submit(lambda engine: engine.toggle_pause())
+    
+    def build_structure(self, village, building_type):
+        self.worker.submit(lambda engine: engine.build_structure(engine.villages[village.id], building_type))
+
+
+class SimulationWorker:
+    """Steps an engine on its own thread through a FixedStepClock
+    
+    front is the latest Frame. The worker also stands in for the clock in
+    UIRenderer (lag, scale, set_scale, scale_label), so the speed keys and
+    cart interpolation work the same as in the single-threaded loop.
+    """
+    def __init__(self, engine, clock):
+        self.engine = engine
+        self.clock = clock
+        self.commands = queue.SimpleQueue()
+        
+        self.world = None  # (version, frozen villages, event history, histories) last published
+        self.world_time = 0.0
+        self.watched = queue.SimpleQueue()  # ids of villages the renderer read histories of
+        self.watching = set()  # ids asked for since the last world
+        self.scores = None  # sustainability history copy last published
+        self.front = None
+        self._publish()
+        
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+    
+    def start(self):
+        # A long month holds the GIL in pure Python; switching more often
+        # lets the render thread in between
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(C.WORKER_SWITCH_INTERVAL)
+        self.thread.start()
+    
+    def stop(self):
+        self.stopping = True
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+    
+    def submit(self, command):
+        """Run command(engine) on the worker thread before its next step"""
+        self.commands.put(command)
+    
+    def watch(self, village_id):
+        """Publish village_id's histories with every world until the renderer stops reading them"""
+        self.watched.put(village_id)
+    
+    def score_history(self):
+        """A copy of the sustainability history, shared between frames until it changes"""
+        history = self.engine.sustainability_history
+        if self.scores is None or self.scores.total != history.total:
+            self.scores = history.copy()
+        return self.scores
+    
+    @property
+    def lag(self):
+        return self.front.lag
+    
+    @property
+    def scale(self):
+        return self.clock.scale
+    
+    def set_scale(self, scale):
+        self.submit(lambda engine: self.clock.set_scale(scale))
+    
+    def scale_label(self):
+        return self.clock.scale_label()
+    
+    def _run(self):
+        last = time.perf_counter()
+        while not self.stopping:
+            now = time.perf_counter()
+            dt, last = now - last, now
+            
+            while not self.commands.empty():
+                self.commands.get()(self.engine)
+            
+            self.clock.advance(dt, self.engine.update)
+            self._publish()
+            
+            # Leave the rest of the publish interval to the render thread
+            idle = C.WORKER_PUBLISH_INTERVAL - (time.perf_counter() - now)
+            if idle > 0:
+                time.sleep(idle)
+    
+    def _publish(self):
+        engine = self.engine
+        now = time.perf_counter()
+        published = self.world[3] if self.world else {}
+        asked = False
+        while not self.watched.empty():
+            village_id = self.watched.get()
+            self.watching.add(village_id)
+            asked = asked or village_id not in published
+        
+        if self.world is None or asked:
+            stale = True
+        elif len(engine.villages) != len(self.world[1]):
+            stale = True  # A new village must be published at once: geometry already has it
+        else:
+            stale = engine.version != self.world[0] and now - self.world_time >= C.WORKER_WORLD_INTERVAL
+        
+        if stale:
+            histories = {i: _copy_history(engine.villages[i]) for i in self.watching}
+            villages = [FrozenVillage(v, histories, self.watch) for v in engine.villages]
+            self.world = (engine.version, villages, engine.event_system.event_history.copy(), histories)
+            self.world_time = now
+            self.watching = set()
+        
+        frame = Frame(self, self.world[1], self.world[2])
+        frame.version = self.world[0]  # The villages' version, not the engine's
+        self.front = frame
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""
+Snapshots - save, restore and fork a running kingdom as a binary blob
+"""
+
+import struct
+import numpy as np
+import constants as C
+from game_engine import GameEngine
+from vector_engine import VectorGameEngine, EVENT_TYPES, EVENT_INDEX, BUILDING_TYPES, BUILDING_INDEX, MAX_EVENT_DURATION
+
+MAGIC = b'WKSN'
+VERSION = 4
+
+# Blob layout: header, then one record per array. Each record is a
+# fixed-size descriptor followed by the raw array bytes, padded to 8.
+HEADER = struct.Struct('<4sHH')          # magic, version, array count
+DESCRIPTOR = struct.Struct('<24s4sB3x7Q')  # name, dtype, ndim, shape (up to 7 dims); 88 bytes
+
+FLEET_FIELDS = ('start', 'end', 'leg_start', 'leg_end', 'resource', 'amount', 'source', 'destination')
+
+
+def _pack_strings(strings):
+    """UTF-8 bytes of every string back to back, plus each string's end offset"""
+    encoded = [s.encode('utf-8') for s in strings]
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    ends = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+    return data, ends
+
+
+def _unpack_strings(data, ends):
+    raw = data.tobytes()
+    starts = [0] + ends[:-1].tolist()
+    return [raw[a:b].decode('utf-8') for a, b in zip(starts, ends.tolist())]
+
+
+def _split(flat, ends):
+    """Cut a flat array back into per-village lists"""
+    starts = [0] + ends[:-1].tolist()
+    return [flat[a:b].tolist() for a, b in zip(starts, ends.tolist())]
+
+
+def _pack_rng(rng):
+    version, state, gauss_next = rng.getstate()
+    return np.array(state, dtype=np.uint32), np.array([version, np.nan if gauss_next is None else gauss_next])
+
+
+def _unpack_rng(rng, state, extra):
+    gauss_next = None if np.isnan(extra[1]) else float(extra[1])
+    rng.setstate((int(extra[0]), tuple(state.tolist()), gauss_next))
+
+
+def _to_bytes(arrays):
+    parts = [HEADER.pack(MAGIC, VERSION, len(arrays))]
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype == object or array.ndim > 7:
+            raise ValueError(f"Cannot snapshot array {name}")
+        shape = list(array.shape) + [0] * (7 - array.ndim)
+        parts.append(DESCRIPTOR.pack(name.encode('ascii'), array.dtype.str.encode('ascii'), array.ndim, *shape))
+        raw = array.tobytes()
+        parts.append(raw + b'\0' * (-len(raw) % 8))
+    return b''.join(parts)
+
+
+def _from_bytes(blob):
+    magic, version, count = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a kingdom snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} (expected {VERSION})")
+    
+    arrays = {}
+    offset = HEADER.size
+    for _ in range(count):
+        name, dtype, ndim, *shape = DESCRIPTOR.unpack_from(blob, offset)
+        offset += DESCRIPTOR.size
+        dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+        shape = tuple(shape[:ndim])
+        size = int(np.prod(shape, dtype=np.int64))
+        # Read-only views into the blob; nothing is copied until restored
+        arrays[name.rstrip(b'\0').decode('ascii')] = np.frombuffer(blob, dtype, size, offset).reshape(shape)
+        offset += size * dtype.itemsize
+        offset += -offset % 8
+    return arrays
+
+
+def save(engine):
+    """Serialize engine, village, cart and event state to bytes"""
+    villages = engine.villages
+    n = len(villages)
+    a = {}
+    
+    a['engine_int'] = np.array([
+        engine.current_year, engine.current_month, engine.total_trades, engine.total_events,
+        engine.sustainability_score, engine.seed, engine.is_running, engine.is_paused,
+        engine.simulation_complete, isinstance(engine, VectorGameEngine),
+    ], dtype=np.int64)
+    a['engine_float'] = np.array([engine.elapsed_time, engine.next_month])
+    scores = engine.sustainability_history
+    a['sustainability_history'] = scores.values().astype(np.int64)
+    a['sustainability_archive'] = scores.archive.values()
+    a['sustainability_total'] = np.array([scores.total], dtype=np.int64)
+    a['score_components'] = np.array([engine.scorer.components[k] for k in C.SUSTAINABILITY_WEIGHTS])
+    
+    # Layout
+    a['names'], a['name_ends'] = _pack_strings([v.name for v in villages])
+    a['produces'] = np.array([C.RESOURCES.index(v.produces) if v.produces else -1 for v in villages], dtype=np.int64)
+    a['positions'] = np.array([v.position for v in villages], dtype=np.float64).reshape(n, 2)
+    a['is_capital'] = np.array([v.is_capital for v in villages], dtype=bool)
+    
+    # Village state
+    a['population'] = np.array([v.population for v in villages], dtype=np.int64)
+    a['growth_rate'] = np.array([v.growth_rate for v in villages])
+    a['resources'] = np.array([[v.resources[r] for r in C.RESOURCES] for v in villages]).reshape(n, len(C.RESOURCES))
+    a['alive'] = np.array([v.is_alive for v in villages], dtype=bool)
+    
+    building_order = np.full((n, len(BUILDING_TYPES)), -1, dtype=np.int8)
+    events = np.zeros((n, len(EVENT_TYPES), MAX_EVENT_DURATION), dtype=np.int16)
+    for i, village in enumerate(villages):
+        for rank, building_type in enumerate(village.buildings):
+            building_order[i, BUILDING_INDEX[building_type]] = rank
+        for event_type, remaining in village.active_events:
+            events[i, EVENT_INDEX[event_type], remaining - 1] += 1
+    a['building_order'] = building_order
+    a['events'] = events
+    
+    routes = np.full((n, max([len(v.connected_routes) for v in villages] + [0])), -1, dtype=np.int64)
+    for i, village in enumerate(villages):
+        routes[i, :len(village.connected_routes)] = village.connected_routes
+    a['routes'] = routes
+    
+    population_history = [v.population_history for v in villages]
+    a['history_ends'] = np.cumsum([len(h) for h in population_history], dtype=np.int64)
+    a['history_totals'] = np.array([h.total for h in population_history], dtype=np.int64)
+    a['population_history'] = np.array([p for h in population_history for p in h], dtype=np.int64)
+    a['growth_history'] = np.array([g for v in villages for g in v.growth_history])
+    
+    a['log_counts'] = np.cumsum([len(v.event_log) for v in villages], dtype=np.int64)
+    a['log_text'], a['log_ends'] = _pack_strings([entry for v in villages for entry in v.event_log])
+    
+    # Carts in flight, compacted
+    fleet = engine.trade_system.fleet
+    slots = fleet.slots()
+    for field in FLEET_FIELDS:
+        a['cart_' + field] = getattr(fleet, field)[slots]
+    legs = [fleet.legs.get(slot, []) for slot in slots.tolist()]
+    a['cart_leg_ends'] = np.cumsum([len(l) for l in legs], dtype=np.int64)
+    a['cart_legs'] = np.array([(x, y, d) for l in legs for (x, y), d in l], dtype=np.float64).reshape(-1, 3)
+    
+    # Events and randomness
+    event_system = engine.event_system
+    a['event_schedule'] = event_system.schedule()
+    a['event_rng'], a['event_rng_extra'] = _pack_rng(event_system.rng)
+    a['sampling_rng'], a['sampling_rng_extra'] = _pack_rng(event_system.sampling_rng)
+    if event_system.replay is not None:
+        a['event_replay'] = np.array([row for rows in event_system.replay.values() for row in rows], dtype=np.int32).reshape(-1, 5)
+    
+    return _to_bytes(a)
+
+
+def restore(blob):
+    """Rebuild a GameEngine (or VectorGameEngine) from save() output"""
+    a = _from_bytes(blob)
+    ints = a['engine_int'].tolist()
+    vectorized = bool(ints[9])
+    
+    names = _unpack_strings(a['names'], a['name_ends'])
+    cities = [
+        {'name': name, 'produces': C.RESOURCES[p] if p >= 0 else None, 'pos': tuple(pos), 'is_capital': capital}
+        for name, p, pos, capital in zip(names, a['produces'].tolist(), a['positions'].tolist(), a['is_capital'].tolist())
+    ]
+    
+    engine_cls = VectorGameEngine if vectorized else GameEngine
+    engine = engine_cls(cities, seed=ints[5], event_schedule=a.get('event_replay'))
+    
+    (engine.current_year, engine.current_month, engine.total_trades, engine.total_events,
+     engine.sustainability_score) = ints[:5]
+    engine.is_running, engine.is_paused, engine.simulation_complete = (bool(x) for x in ints[6:9])
+    engine.set_clock(*a['engine_float'].tolist())
+    engine.sustainability_history.load(a['sustainability_history'].tolist(), int(a['sustainability_total'][0]),
+                                       a['sustainability_archive'].tolist())
+    
+    population_history = _split(a['population_history'], a['history_ends'])
+    growth_history = _split(a['growth_history'], a['history_ends'])
+    log = _unpack_strings(a['log_text'], a['log_ends'])
+    log_starts = [0] + a['log_counts'][:-1].tolist()
+    
+    if vectorized:
+        _restore_state(engine.state, a, population_history, growth_history)
+    else:
+        _restore_villages(engine.villages, a, population_history, growth_history)
+    
+    for i, village in enumerate(engine.villages):
+        village.event_log.extend(log[log_starts[i]:a['log_counts'][i]])
+        village.connected_routes = [j for j in a['routes'][i].tolist() if j >= 0]
+    
+    fleet = engine.trade_system.fleet
+    count = len(a['cart_amount'])
+    while len(fleet.active) < count:
+        fleet._grow()
+    slots = [fleet.free.pop() for _ in range(count)]
+    for field in FLEET_FIELDS:
+        getattr(fleet, field)[slots] = a['cart_' + field]
+    fleet.active[slots] = True
+    fleet.count = count
+    leg_starts = [0] + a['cart_leg_ends'][:-1].tolist()
+    for slot, start, end in zip(slots, leg_starts, a['cart_leg_ends'].tolist()):
+        if end > start:
+            fleet.legs[slot] = [((x, y), d) for x, y, d in a['cart_legs'][start:end].tolist()]
+    engine.trade_system.schedule_carts()
+    
+    event_system = engine.event_system
+    event_system.load(a['event_schedule'])
+    event_system.event_history.extend(
+        (C.SIMULATION_START_YEAR + m // C.MONTHS_PER_YEAR, m % C.MONTHS_PER_YEAR + 1,
+         EVENT_TYPES[e], [names[i] for i in ids if i >= 0])
+        for m, e, *ids in a['event_schedule'][-C.EVENT_HISTORY_CAPACITY:].tolist()
+    )
+    _unpack_rng(event_system.rng, a['event_rng'], a['event_rng_extra'])
+    _unpack_rng(event_system.sampling_rng, a['sampling_rng'], a['sampling_rng_extra'])
+    
+    # Aggregates are rebuilt from the restored villages; only the death count
+    # and last month's breakdown need carrying over
+    scorer = type(engine.scorer)(engine.villages)
+    scorer.deaths = scorer.n_villages - scorer.alive
+    scorer.score = engine.sustainability_score
+    scorer.components = dict(zip(C.SUSTAINABILITY_WEIGHTS, a['score_components'].tolist()))
+    engine.scorer = scorer
+    
+    return engine
+
+
+def _restore_villages(villages, a, population_history, growth_history):
+    population = a['population'].tolist()
+    growth_rate = a['growth_rate'].tolist()
+    resources = a['resources'].tolist()
+    alive = a['alive'].tolist()
+    totals = a['history_totals'].tolist()
+    building_order = a['building_order']
+    
+    for i, village in enumerate(villages):
+        village.population = population[i]
+        village.growth_rate = growth_rate[i]
+        village.resources = dict(zip(C.RESOURCES, resources[i]))
+        village.is_alive = alive[i]
+        
+        built = [(rank, b) for b, rank in enumerate(building_order[i].tolist()) if rank >= 0]
+        village.buildings = [BUILDING_TYPES[b] for _, b in sorted(built)]
+        
+        counts = a['events'][i]
+        village.active_events = [
+            (EVENT_TYPES[e], d + 1)
+            for e, d in zip(*np.nonzero(counts))
+            for _ in range(counts[e, d])
+        ]
+        
+        village.population_history.load(population_history[i], totals[i])
+        village.growth_history.load(growth_history[i], totals[i])
+
+
+def _restore_state(state, a, population_history, growth_history):
+    state.population[:] = a['population']
+    state.growth_rate[:] = a['growth_rate']
+    state.resources[:] = a['resources']
+    state.alive[:] = a['alive']
+    state.events[:] = a['events']
+    state.buildings[:] = a['building_order'] >= 0
+    
+    # Each village's kept months go back in its column of the rings, all
+    # ending at the current month
+    totals = a['history_totals']
+    state.months = int(totals.max()) if len(totals) else 0
+    state.history_length[:] = totals
+    state.history_start[:] = state.months - totals
+    state._reserve_months(state.months)
+    for i in range(len(totals)):
+        kept = np.arange(state.months - len(population_history[i]), state.months) % C.HISTORY_CAPACITY
+        state.population_log[kept, i] = population_history[i]
+        state.growth_log[kept, i] = growth_history[i]
+
+
+def fork(engine):
+    """An independent copy of a running kingdom, to branch what-if futures from"""
+    return restore(save(engine))
\ No newline at end of file
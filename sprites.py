@@ -0,0 +1,54 @@
+"""
+Sprites - texture atlas with a cache of pre-scaled sprites
+"""
+
+import pygame
+import constants as C
+from cache import LRUCache
+
+
+def surface_bytes(surface):
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+
+class SpriteAtlas:
+    """Packs named images into one surface and serves scaled copies
+    
+    Images are packed once with a simple shelf packer (tallest first) and
+    converted to the display format. scaled() returns sprites from an LRU
+    cache keyed by (name, size), so a size is only ever scaled once.
+    """
+    def __init__(self, images, max_width=C.SPRITE_ATLAS_WIDTH):
+        self.rects = {}
+        
+        x = y = shelf_height = width = 0
+        for name, image in sorted(images.items(), key=lambda item: -item[1].get_height()):
+            w, h = image.get_size()
+            if x + w > max_width and x > 0:
+                y += shelf_height
+                x = shelf_height = 0
+            self.rects[name] = pygame.Rect(x, y, w, h)
+            x += w
+            shelf_height = max(shelf_height, h)
+            width = max(width, x)
+        
+        self.surface = pygame.Surface((max(width, 1), max(y + shelf_height, 1)), pygame.SRCALPHA)
+        for name, rect in self.rects.items():
+            self.surface.blit(images[name], rect)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+        
+        self.cache = LRUCache(max_bytes=C.SPRITE_CACHE_BYTES, sizeof=surface_bytes)
+    
+    def __contains__(self, name):
+        return name in self.rects
+    
+    def get(self, name):
+        """The sprite at its packed size, as a view into the atlas"""
+        return self.surface.subsurface(self.rects[name])
+    
+    def scaled(self, name, size):
+        """The sprite scaled to size (an int for square sprites, or (w, h))"""
+        if isinstance(size, int):
+            size = (size, size)
+        return self.cache.get_or_create((name, size), lambda: pygame.transform.scale(self.get(name), size))
\ No newline at end of file
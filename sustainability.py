@@ -0,0 +1,107 @@
+"""
+Sustainability scorer - running aggregates behind the kingdom's score
+"""
+
+import constants as C
+
+
+class SustainabilityScorer:
+    """Keeps the totals the sustainability score needs as villages change
+    
+    GameEngine feeds it from the monthly village pass, trades, deaths and
+    new buildings, so scoring a month only touches the aggregates.
+    """
+    def __init__(self, villages=()):
+        self.n_villages = 0
+        self.alive = 0
+        self.deaths = 0
+        self.growth_sum = 0.0
+        self.resource_totals = dict.fromkeys(C.RESOURCES, 0.0)  # Over alive villages
+        self.building_counts = dict.fromkeys(C.BUILDINGS, 0)    # Over alive villages
+        
+        self.score = 0
+        self.components = dict.fromkeys(C.SUSTAINABILITY_WEIGHTS, 0.0)
+        
+        for village in villages:
+            self.village_added(village)
+    
+    def village_added(self, village):
+        self.n_villages += 1
+        if not village.is_alive:
+            return
+        
+        self.alive += 1
+        self.growth_sum += village.growth_rate
+        for resource in C.RESOURCES:
+            self.resource_totals[resource] += village.resources[resource]
+        for building_type in village.buildings:
+            self.building_counts[building_type] += 1
+    
+    def village_died(self, village):
+        """Count a death once, when the village dies"""
+        self.alive -= 1
+        self.deaths += 1
+        for building_type in village.buildings:
+            self.building_counts[building_type] -= 1
+    
+    def building_built(self, building_type):
+        self.building_counts[building_type] += 1
+    
+    def begin_month(self):
+        """Resources and growth change everywhere each month; refill them in the village pass"""
+        for resource in C.RESOURCES:
+            self.resource_totals[resource] = 0.0
+        self.growth_sum = 0.0
+    
+    def village_updated(self, village):
+        """Add an alive village's post-update numbers to the monthly totals"""
+        self.growth_sum += village.growth_rate
+        for resource in C.RESOURCES:
+            self.resource_totals[resource] += village.resources[resource]
+    
+    def resources_moved(self, resource, amount):
+        """Resources entering (positive) or leaving (negative) alive stockpiles"""
+        self.resource_totals[resource] += amount
+    
+    def update(self, months_elapsed, total_trades, total_events):
+        """Recompute every component from the aggregates and return the score
+        
+        months_elapsed of 0 leaves trade efficiency out, as in January.
+        """
+        weights = C.SUSTAINABILITY_WEIGHTS
+        components = dict.fromkeys(weights, 0.0)
+        
+        totals = list(self.resource_totals.values())
+        if self.alive and sum(totals) / len(totals) > 0:
+            variance_ratio = max(totals) / (min(totals) + 1)
+            balance_score = max(0, 1.0 - (variance_ratio - 1) / 10)  # Lower variance = higher score
+            components['resource_balance'] = balance_score * weights['resource_balance']
+        
+        if self.alive:
+            avg_growth = self.growth_sum / self.alive
+            stability_score = max(0, min(1.0, 0.5 + avg_growth * 5))
+            stability_score *= 1 - self.deaths / self.n_villages
+            components['population_stability'] = stability_score * weights['population_stability']
+        
+        if months_elapsed:
+            trade_rate = total_trades / months_elapsed
+            efficiency_score = min(1.0, trade_rate / 20)  # Optimal around 20 trades/month
+            components['trade_efficiency'] = efficiency_score * weights['trade_efficiency']
+        
+        if total_events > 0:
+            recovery_rate = self.alive / self.n_villages
+            components['disaster_recovery'] = recovery_rate * weights['disaster_recovery']
+        else:
+            components['disaster_recovery'] = 0.5 * weights['disaster_recovery']
+        
+        building_types = sum(1 for count in self.building_counts.values() if count > 0)
+        if building_types:
+            components['building_diversity'] = building_types / len(C.BUILDINGS) * weights['building_diversity']
+        
+        self.components = components
+        self.score = int(sum(components.values()))
+        return self.score
+    
+    def breakdown(self):
+        """Points earned by each component at the last update"""
+        return dict(self.components)
\ No newline at end of file
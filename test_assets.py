@@ -0,0 +1,33 @@
+"""
+Asset tests - the bundle finds every image and lets go of its pixels
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+import constants as C
+from assets import AssetBundle
+
+
+def test_every_city_has_its_image(tmp_path):
+    specs = {city['name']: (city['image'], (50, 50)) for city in C.CITIES}
+    bundle = AssetBundle(specs, cache_dir=str(tmp_path))
+    
+    missing = [name for name in specs if name not in bundle]
+    assert missing == []
+
+
+def test_bundle_drops_raw_pixels_once_decoded(tmp_path):
+    specs = {'wood': ('wood_icon.png', (32, 32)), 'iron': ('iron_icon.png', (32, 32))}
+    for _ in range(2):  # Built from the PNGs, then read back from the cache
+        bundle = AssetBundle(specs, cache_dir=str(tmp_path))
+        bundle.get('wood')
+        assert bundle.data is not None
+        iron = bundle.get('iron')
+        assert bundle.data is None
+    
+    # A released image can still be asked for again
+    bundle.release('iron')
+    again = bundle.get('iron')
+    assert pygame.image.tobytes(again, 'RGBA') == pygame.image.tobytes(iron, 'RGBA')
@@ -0,0 +1,46 @@
+"""
+Event system tests - recorded schedules and their replay
+"""
+
+import numpy as np
+import pytest
+from game_engine import GameEngine
+from headless import run_headless
+from vector_engine import VectorGameEngine
+
+ENGINES = (GameEngine, VectorGameEngine)
+
+
+def _state(engine):
+    """Everything a run's outcome is judged by, in comparable form"""
+    villages = [
+        (v.name, v.population, v.growth_rate, dict(v.resources), v.is_alive, list(v.buildings),
+         sorted(v.active_events), list(v.population_history), list(v.growth_history), list(v.event_log))
+        for v in engine.villages
+    ]
+    return (engine.current_year, engine.current_month, engine.total_trades,
+            list(engine.event_system.event_history), villages)
+
+
+@pytest.mark.parametrize('engine_class', ENGINES)
+def test_event_schedule_replays_a_run(engine_class):
+    original = run_headless(engine_class(seed=11), months=120)
+    schedule = original.event_system.schedule()
+    assert len(schedule) == original.event_system.event_count > 0
+    
+    replay = run_headless(engine_class(seed=99, event_schedule=schedule), months=120)
+    assert _state(replay) == _state(original)
+    assert np.array_equal(replay.event_system.schedule(), schedule)
+
+
+def test_event_schedule_is_a_growing_typed_array():
+    engine = run_headless(GameEngine(seed=11), months=240)
+    system = engine.event_system
+    schedule = system.schedule()
+    assert schedule.dtype == np.int32 and len(schedule) == system.event_count > 12
+    assert len(system.recorded) < 2 * system.event_count
+    
+    # A copy: recording more events leaves it alone
+    system.check_and_spawn_events(1471, 1)
+    system.spawn_random_event(1471, 1)
+    assert np.array_equal(system.schedule()[:len(schedule)], schedule)
@@ -0,0 +1,37 @@
+"""
+Snapshot tests - save, restore and carry on
+"""
+
+import pytest
+import snapshot
+from game_engine import GameEngine
+from headless import run_headless
+from vector_engine import VectorGameEngine
+
+ENGINES = (GameEngine, VectorGameEngine)
+
+
+def _state(engine):
+    """Everything a run's outcome is judged by, in comparable form"""
+    villages = [
+        (v.name, v.population, v.growth_rate, dict(v.resources), v.is_alive, list(v.buildings),
+         sorted(v.active_events), list(v.population_history), list(v.growth_history), list(v.event_log))
+        for v in engine.villages
+    ]
+    return (engine.current_year, engine.current_month, engine.total_trades,
+            list(engine.event_system.event_history), villages)
+
+
+@pytest.mark.parametrize('engine_class', ENGINES)
+def test_snapshot_round_trip(engine_class):
+    engine = run_headless(engine_class(seed=3), delivery='monthly', months=30)
+    restored = snapshot.restore(snapshot.save(engine))
+    
+    assert type(restored) is engine_class
+    assert _state(restored) == _state(engine)
+    assert restored.trade_system.fleet.count == engine.trade_system.fleet.count
+    
+    # Carts in flight, pending months and the event streams all carry on alike
+    run_headless(engine, delivery='monthly', months=20)
+    run_headless(restored, delivery='monthly', months=20)
+    assert _state(restored) == _state(engine)
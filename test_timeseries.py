@@ -0,0 +1,50 @@
+"""
+Time series tests - window aggregates, archives and loading
+"""
+
+import random
+import pytest
+from timeseries import TimeSeries
+
+
+def test_time_series_window_aggregates():
+    rng = random.Random(5)
+    series = TimeSeries(capacity=50, dtype=int)
+    values = []
+    for _ in range(200):
+        values.append(rng.randint(-100, 100))
+        series.append(values[-1])
+        kept = values[-50:]
+        assert list(series) == kept
+        assert len(series) == len(kept) and series.total == len(values)
+        assert series.min() == min(kept)
+        assert series.max() == max(kept)
+        assert series.mean() == pytest.approx(sum(kept) / len(kept))
+    assert len(series.buffer) == 50
+
+
+def test_time_series_archive_keeps_period_means():
+    series = TimeSeries(capacity=12, archive=(12, 3))
+    values = [float(i % 7) for i in range(60)]
+    for value in values:
+        series.append(value)
+    
+    years = [sum(values[i:i + 12]) / 12 for i in range(0, 60, 12)]
+    assert list(series.archive) == pytest.approx(years[-3:])
+    assert list(series) == values[-12:]
+
+
+def test_time_series_load_carries_on():
+    values = [float(i * i % 13) for i in range(90)]
+    series = TimeSeries(capacity=40)
+    series.load(values[20:60], 60)
+    for value in values[60:]:
+        series.append(value)
+    
+    assert series.total == 90
+    assert list(series) == values[-40:]
+    assert (series.min(), series.max()) == (min(values[-40:]), max(values[-40:]))
+    
+    copy = series.copy()
+    series.append(100.0)
+    assert list(copy) == values[-40:]
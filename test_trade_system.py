@@ -0,0 +1,94 @@
+"""
+Trade system tests - allocation optimality and road capacity
+"""
+
+import itertools
+import math
+import random
+from collections import Counter
+import pytest
+import constants as C
+from trade_system import TradeSystem, min_cost_flow
+from village import Village
+
+
+def _best_flow(supply, demand, arcs, arc_limit):
+    """(volume, cost) of the best integral flow, by trying every one"""
+    keys = list(arcs)
+    ranges = [range(int(min(supply[s], demand[d], arc_limit.get(s, math.inf))) + 1) for s, d in keys]
+    best = (0, 0.0)
+    for amounts in itertools.product(*ranges):
+        sent, received = Counter(), Counter()
+        for (s, d), amount in zip(keys, amounts):
+            sent[s] += amount
+            received[d] += amount
+        if any(sent[s] > supply[s] for s in sent) or any(received[d] > demand[d] for d in received):
+            continue
+        volume = sum(amounts)
+        cost = sum(amount * arcs[key] for key, amount in zip(keys, amounts))
+        if volume > best[0] or (volume == best[0] and cost < best[1]):
+            best = (volume, cost)
+    return best
+
+
+@pytest.mark.parametrize('n_sources, n_sinks', [(1, 3), (3, 1), (2, 3), (3, 2)])
+def test_min_cost_flow_is_optimal(n_sources, n_sinks):
+    rng = random.Random(n_sources * 10 + n_sinks)
+    for _ in range(8):
+        supply = {f"s{i}": rng.randint(1, 4) for i in range(n_sources)}
+        demand = {f"d{j}": rng.randint(1, 4) for j in range(n_sinks)}
+        arcs = {(s, d): rng.randint(1, 9) for s in supply for d in demand if rng.random() < 0.8}
+        arc_limit = {s: rng.randint(1, 3) for s in supply if rng.random() < 0.5}
+        
+        flows = min_cost_flow(supply, demand, arcs, arc_limit)
+        
+        for (s, d), amount in flows.items():
+            assert (s, d) in arcs
+            assert amount <= arc_limit.get(s, math.inf) + 1e-9
+        for s in supply:
+            assert sum(a for (u, _), a in flows.items() if u == s) <= supply[s] + 1e-9
+        for d in demand:
+            assert sum(a for (_, v), a in flows.items() if v == d) <= demand[d] + 1e-9
+        
+        volume, cost = _best_flow(supply, demand, arcs, arc_limit)
+        assert sum(flows.values()) == pytest.approx(volume)
+        assert sum(a * arcs[key] for key, a in flows.items()) == pytest.approx(cost)
+
+
+def test_min_cost_flow_beats_nearest_first():
+    # Greedy would send s0's one unit to its nearest sink d0, leaving d1
+    # with the distant s1; sending s0 to d1 instead costs less overall
+    supply = {'s0': 1, 's1': 1}
+    demand = {'d0': 1, 'd1': 1}
+    arcs = {('s0', 'd0'): 1, ('s0', 'd1'): 2, ('s1', 'd0'): 3, ('s1', 'd1'): 10}
+    assert min_cost_flow(supply, demand, arcs) == {('s0', 'd1'): 1, ('s1', 'd0'): 1}
+
+
+def test_min_cost_flow_ships_all_it_can():
+    # Cheapest first fills d0 from s0 and strands s1, which only reaches d0;
+    # moving s0 over to d1 makes room for it
+    supply = {'s0': 1, 's1': 1}
+    demand = {'d0': 1, 'd1': 1}
+    arcs = {('s0', 'd0'): 1, ('s0', 'd1'): 2, ('s1', 'd0'): 3}
+    assert min_cost_flow(supply, demand, arcs) == {('s0', 'd1'): 1, ('s1', 'd0'): 1}
+
+
+def test_full_road_sends_the_rest_round(monkeypatch):
+    # Two ways from a to b: a short one through m1 and a long one through
+    # m2. The short one only has room for part of what b needs
+    monkeypatch.setattr(C, 'ROUTE_CAPACITY', 40)
+    villages = [Village(name, 'wood', position) for name, position in
+                (('a', (0, 0)), ('b', (200, 0)), ('m1', (100, 10)), ('m2', (100, 150)))]
+    for i, routes in enumerate(([2, 3], [2, 3], [0, 1], [0, 1])):
+        villages[i].id = i
+        villages[i].connected_routes = routes
+        villages[i].resources = {resource: 80 for resource in C.RESOURCES}  # Neither short nor spare
+    villages[0].resources['wood'] = 10000
+    villages[1].resources['wood'] = 0
+    trade_system = TradeSystem(villages)
+    
+    trades = trade_system.calculate_trades()
+    
+    assert [(t[0].name, t[1].name, t[2]) for t in trades] == [('a', 'b', 'wood')] * 2
+    assert [t[3] for t in trades] == pytest.approx([40, 30])
+    assert trade_system.paths == [[0, 2, 1], [0, 3, 1]]
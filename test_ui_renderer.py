@@ -0,0 +1,42 @@
+"""
+UI renderer tests - the layered map view draws what direct drawing does
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+import pytest
+from game_engine import GameEngine
+from headless import run_headless
+from ui_renderer import UIRenderer
+
+
+def _direct(renderer):
+    """The map view drawn straight onto the screen, one pass per frame"""
+    renderer._render_background()
+    renderer._render_trade_carts(renderer._cart_marks())
+    renderer._render_cities()
+    renderer._render_overlay_layer()
+    return pygame.surfarray.array3d(renderer.screen).astype(int)
+
+
+@pytest.mark.parametrize('complete', [False, True])
+def test_layered_map_matches_direct_draw(complete):
+    pygame.display.init()
+    screen = pygame.display.set_mode((1200, 800))
+    engine = run_headless(GameEngine(seed=3), months=6)
+    engine.simulation_complete = complete
+    renderer = UIRenderer(screen, engine)
+    
+    renderer.render()
+    layered = pygame.surfarray.array3d(screen).astype(int)
+    direct = _direct(renderer)
+    
+    # Panels match exactly; antialiased text edges are blended onto a
+    # transparent layer first, so they may round a few levels apart
+    diff = np.abs(layered - direct).max(axis=2)
+    assert tuple(layered[100, 600]) == tuple(direct[100, 600])
+    assert diff.max() <= 16
+    assert (diff > 2).mean() < 0.005
@@ -0,0 +1,45 @@
+"""
+Vector engine tests - VillageView against the Village it stands in for
+"""
+
+from game_engine import GameEngine
+from headless import run_headless
+from vector_engine import VectorGameEngine
+
+
+def _village(v):
+    return (v.population, v.growth_rate, v.is_alive, sorted(v.active_events),
+            list(v.population_history), list(v.growth_history),
+            [round(v.resources[r], 6) for r in v.resources])
+
+
+def test_village_view_steps_alone_like_a_village():
+    engine = run_headless(GameEngine(seed=4), months=30)
+    vector = run_headless(VectorGameEngine(seed=4), months=30)
+    
+    for i in (1, 3, 3, 5):
+        village, view = engine.villages[i], vector.villages[i]
+        village.add_event('plague')
+        view.add_event('plague')
+        args = (village.calculate_production(), village.calculate_consumption(), 7.5)
+        village.update_month(*args)
+        view.update_month(*args)
+        assert _village(view) == _village(village)
+    
+    # Villages stepped alone stay a month ahead in their own histories
+    run_headless(engine, months=20)
+    run_headless(vector, months=20)
+    assert [_village(v) for v in vector.villages] == [_village(v) for v in engine.villages]
+
+
+def test_village_view_history_is_built_once_a_month():
+    vector = run_headless(VectorGameEngine(seed=4), months=30)
+    view = vector.villages[2]
+    
+    history = view.population_history
+    assert view.population_history is history
+    assert len(history) == 30
+    
+    run_headless(vector, months=1)
+    assert view.population_history is not history
+    assert list(view.population_history)[:-1] == list(history)
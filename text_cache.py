@@ -0,0 +1,54 @@
+"""
+Text cache - rendered text surfaces reused across frames
+"""
+
+import constants as C
+from cache import LRUCache
+
+
+class TextCache:
+    """font.render() behind an LRU cache keyed by (font, text, color, antialias)
+    
+    Labels that never change render once. For values that do change, pass
+    a slot (e.g. ('pop', village.id)): when the slot's text changes, the
+    surface it replaces is dropped right away instead of waiting to age
+    out of the cache, unless another slot still shows the same text.
+    """
+    def __init__(self, max_items=C.TEXT_CACHE_ITEMS):
+        self.cache = LRUCache(max_items=max_items)
+        self.slots = {}  # slot -> key last rendered for it
+        self.users = {}  # key -> number of slots showing it
+    
+    def render(self, font, text, antialias, color, slot=None):
+        key = (font, text, tuple(color), antialias)
+        
+        if slot is not None:
+            previous = self.slots.get(slot)
+            if previous != key:
+                if previous is not None:
+                    self._release(previous)
+                self.slots[slot] = key
+                self.users[key] = self.users.get(key, 0) + 1
+        
+        return self.cache.get_or_create(key, lambda: font.render(text, antialias, color))
+    
+    def _release(self, key):
+        users = self.users[key] - 1
+        if users:
+            self.users[key] = users
+        else:
+            del self.users[key]
+            self.cache.discard(key)
+    
+    def invalidate(self, font=None):
+        """Drop every cached surface, or only those rendered with font"""
+        if font is None:
+            self.cache.clear()
+            self.slots.clear()
+            self.users.clear()
+            return
+        
+        for key in [k for k in self.cache.entries if k[0] is font]:
+            self.cache.discard(key)
+        self.slots = {slot: key for slot, key in self.slots.items() if key[0] is not font}
+        self.users = {key: users for key, users in self.users.items() if key[0] is not font}
\ No newline at end of file
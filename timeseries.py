@@ -0,0 +1,161 @@
+"""
+Time series - bounded monthly history with running aggregates, archives and downsampling
+"""
+
+from collections import deque
+import numpy as np
+import constants as C
+
+
+class TimeSeries:
+    """The latest capacity values of a series, in a typed ring buffer
+    
+    Appends are amortized O(1), and min(), max() and mean() over the kept
+    window are O(1) too (monotonic queues and a running sum). Iterating,
+    len() and indexing see the kept values oldest first, like the list
+    this replaces. total counts every value ever appended, so it doubles
+    as a version number for caches. The buffer starts at
+    C.HISTORY_START_CAPACITY values and doubles as they come, up to
+    capacity, so a young series costs next to nothing.
+    
+    archive=(period, capacity) also keeps the mean of every period values
+    (a year of months, say) in archive, itself a TimeSeries, so a long run
+    keeps its shape once its months have left the window.
+    """
+    def __init__(self, values=(), capacity=C.HISTORY_CAPACITY, dtype=np.float64, archive=None):
+        self.capacity = capacity
+        self.buffer = np.zeros(min(capacity, C.HISTORY_START_CAPACITY), dtype=dtype)
+        self.total = 0
+        self._sum = 0
+        self._min = deque()  # (index, value), values increasing
+        self._max = deque()  # (index, value), values decreasing
+        
+        self.period = None
+        self.archive = None
+        if archive:
+            self.period, archive_capacity = archive
+            if self.period > capacity:
+                raise ValueError(f"Archive period {self.period} is longer than the window ({capacity})")
+            self.archive = TimeSeries(capacity=archive_capacity)
+        
+        for value in values:
+            self.append(value)
+    
+    def load(self, values, total, archived=()):
+        """Carry on from a series that had total values appended
+        
+        values are that series' kept values and archived its archive's, as
+        saved by a snapshot. Anything already here is replaced.
+        """
+        size = min(self.capacity, max(total, C.HISTORY_START_CAPACITY))
+        self.buffer = np.zeros(size, dtype=self.buffer.dtype)
+        self.total = total - len(values)
+        self._sum = 0
+        self._min.clear()
+        self._max.clear()
+        
+        archive, self.archive = self.archive, None
+        for value in values:
+            self.append(value)
+        self.archive = archive
+        if archive is not None:
+            archive.load(archived, len(archived))
+    
+    def _grow(self):
+        # Nothing has wrapped yet: the values are buffer[:total] in order
+        grown = np.zeros(min(2 * len(self.buffer), self.capacity), dtype=self.buffer.dtype)
+        grown[:len(self.buffer)] = self.buffer
+        self.buffer = grown
+    
+    def append(self, value):
+        i = self.total
+        if i == len(self.buffer) < self.capacity:
+            self._grow()
+        slot = i % self.capacity
+        if i >= self.capacity:
+            self._sum -= self.buffer[slot].item()
+        self.buffer[slot] = value
+        value = self.buffer[slot].item()  # As stored, in the buffer's type
+        self._sum += value
+        self.total += 1
+        
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((i, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((i, value))
+        
+        # Drop the extreme that just fell out of the window
+        oldest = self.total - self.capacity
+        for queue in (self._min, self._max):
+            if queue[0][0] < oldest:
+                queue.popleft()
+        
+        if slot == self.capacity - 1:
+            self._sum = self.buffer.sum().item()  # Once a lap, so float error can't build up
+        
+        if self.archive is not None and self.total % self.period == 0:
+            recent = np.arange(self.total - self.period, self.total) % self.capacity
+            self.archive.append(self.buffer[recent].mean())
+    
+    def __len__(self):
+        return min(self.total, self.capacity)
+    
+    def __iter__(self):
+        return iter(self.values().tolist())
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.values()[index].tolist()
+        return self.values()[index].item()
+    
+    def values(self):
+        """Kept values, oldest first, as an array"""
+        if self.total <= self.capacity:
+            return self.buffer[:self.total]
+        start = self.total % self.capacity
+        return np.concatenate((self.buffer[start:], self.buffer[:start]))
+    
+    def min(self):
+        return self._min[0][1]
+    
+    def max(self):
+        return self._max[0][1]
+    
+    def mean(self):
+        return self._sum / len(self)
+    
+    def copy(self):
+        series = TimeSeries.__new__(TimeSeries)
+        series.capacity = self.capacity
+        series.buffer = self.buffer.copy()
+        series.total = self.total
+        series._sum = self._sum
+        series._min = deque(self._min)
+        series._max = deque(self._max)
+        series.period = self.period
+        series.archive = self.archive.copy() if self.archive is not None else None
+        return series
+    
+    def downsample(self, buckets):
+        """(x, y) arrays of at most 2 * buckets points that keep every bucket's extremes
+        
+        x is the position in values(). A series longer than 2 * buckets is
+        cut into equal buckets (one per pixel column, say) and each becomes
+        its min and max, in the order that keeps the line continuous.
+        """
+        values = self.values()
+        count = len(values)
+        if count <= 2 * buckets:
+            return np.arange(count), values
+        
+        edges = np.linspace(0, count, buckets + 1).astype(np.int64)
+        starts, ends = edges[:-1], edges[1:]
+        lows = np.minimum.reduceat(values, starts)
+        highs = np.maximum.reduceat(values, starts)
+        rising = values[starts] <= values[ends - 1]
+        
+        x = np.repeat(starts, 2)
+        y = np.where(rising[:, None], np.column_stack((lows, highs)), np.column_stack((highs, lows))).ravel()
+        return x, y
\ No newline at end of file
@@ -2,170 +2,452 @@
 Trade system - balances resources between villages
 """
 
+import itertools
 import math
+import numpy as np
 import constants as C
+from profiler import timed
+from route_graph import RouteGraph
+from scheduler import Scheduler
+from village import VillageRegistry
 
-class TradeCart:
-    """Represents a cart traveling between villages with resources"""
-    def __init__(self, from_village, to_village, resources, start_pos, end_pos):
-        self.from_village = from_village
-        self.to_village = to_village
-        self.resources = resources  # Dict of resources being transported
-        self.position = list(start_pos)  # Current position [x, y]
-        self.start_pos = start_pos
-        self.end_pos = end_pos
-        self.progress = 0.0  # 0 to 1
-        
-        # Calculate distance and duration
-        dx = end_pos[0] - start_pos[0]
-        dy = end_pos[1] - start_pos[1]
-        self.distance = math.sqrt(dx*dx + dy*dy)
-        self.duration = C.SECONDS_PER_MONTH  # Takes one month cycle
-        self.elapsed = 0.0
-    
-    def update(self, dt):
-        """Update cart position"""
-        self.elapsed += dt
-        self.progress = min(1.0, self.elapsed / self.duration)
-        
-        # Linear interpolation
-        self.position[0] = self.start_pos[0] + (self.end_pos[0] - self.start_pos[0]) * self.progress
-        self.position[1] = self.start_pos[1] + (self.end_pos[1] - self.start_pos[1]) * self.progress
-        
-        return self.progress >= 1.0  # Returns True when arrived
+FLOW_EPSILON = 1e-9
+CART_ARRAYS = ('start', 'end', 'leg_start', 'leg_end', 'resource', 'amount', 'source', 'destination', 'active')
+
+class CartFleet:
+    """Every trade cart in flight, stored as parallel arrays
+    
+    A cart is a slot index. Arrived carts are released and their slots
+    reused, so the arrays only grow when more carts are in flight at once
+    than ever before. start and end are the ends of the road a cart is on
+    now, which it drives from time leg_start to time leg_end on the
+    scheduler's clock; a cart crossing several roads keeps the rest in
+    legs. Nothing is stored per cart per tick: positions are worked out
+    from the clock when they are drawn.
+    """
+    def __init__(self, capacity=64, scheduler=None):
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.start = np.zeros((capacity, 2))
+        self.end = np.zeros((capacity, 2))
+        self.leg_start = np.zeros(capacity)
+        self.leg_end = np.zeros(capacity)
+        self.resource = np.zeros(capacity, dtype=np.int64)  # Index into C.RESOURCES
+        self.amount = np.zeros(capacity)
+        self.source = np.zeros(capacity, dtype=np.int64)  # Village indices
+        self.destination = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        
+        self.free = list(range(capacity - 1, -1, -1))
+        self.count = 0
+        self.legs = {}  # slot -> [(end point, arrival time)] of the roads still ahead, last first
+        self.version = 0  # Bumped whenever a cart sets off, turns onto a new road or is released
+    
+    def __len__(self):
+        return self.count
+    
+    @property
+    def now(self):
+        return self.scheduler.now
+    
+    def copy(self):
+        """An independent copy of every cart, e.g. to hand to another thread
+        
+        The copy gets a clock of its own stopped at now, with nothing scheduled.
+        """
+        fleet = CartFleet.__new__(CartFleet)
+        fleet.scheduler = Scheduler(self.now)
+        for name in CART_ARRAYS:
+            setattr(fleet, name, getattr(self, name).copy())
+        fleet.free = list(self.free)
+        fleet.count = self.count
+        fleet.legs = {slot: list(legs) for slot, legs in self.legs.items()}
+        fleet.version = self.version
+        return fleet
+    
+    def _grow(self):
+        capacity = len(self.active)
+        for name in CART_ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros((capacity * 2,) + array.shape[1:], dtype=array.dtype)
+            grown[:capacity] = array
+            setattr(self, name, grown)
+        self.free.extend(range(capacity * 2 - 1, capacity - 1, -1))
+    
+    def launch(self, source, destination, resource, amount, start_pos, end_pos, duration=C.SECONDS_PER_MONTH,
+               waypoints=None):
+        """Put a cart on the road now and return its slot
+        
+        waypoints, if given, are the points the cart drives through after
+        start_pos, ending at end_pos; duration is shared between the roads
+        in proportion to their length, and the cart still arrives after
+        exactly duration.
+        """
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        
+        now = self.now
+        arrival = now + duration  # Takes one month cycle by default
+        if waypoints and len(waypoints) > 1:
+            points = [start_pos] + list(waypoints)
+            runs = list(itertools.accumulate(max(math.dist(a, b), 1e-6) for a, b in zip(points, points[1:])))
+            arrivals = [now + duration * run / runs[-1] for run in runs]
+            arrivals[-1] = arrival
+            self.legs[slot] = list(zip(points[:1:-1], arrivals[:0:-1]))
+            end_pos, arrival = points[1], arrivals[0]
+        
+        self.start[slot] = start_pos
+        self.end[slot] = end_pos
+        self.leg_start[slot] = now
+        self.leg_end[slot] = arrival
+        self.resource[slot] = resource
+        self.amount[slot] = amount
+        self.source[slot] = source
+        self.destination[slot] = destination
+        self.active[slot] = True
+        
+        self.count += 1
+        self.version += 1
+        return slot
+    
+    def slots(self):
+        """Slots of every cart in flight"""
+        return np.flatnonzero(self.active)
+    
+    def turn(self, slot):
+        """Put a cart at the end of its road onto the next one; False if it was the last"""
+        legs = self.legs.get(slot)
+        if not legs:
+            return False
+        
+        self.leg_start[slot] = self.leg_end[slot]
+        self.start[slot] = self.end[slot]
+        self.end[slot], self.leg_end[slot] = legs.pop()
+        if not legs:
+            del self.legs[slot]
+        self.version += 1
+        return True
+    
+    def positions(self, slots, lead=0.0):
+        """Where the carts in slots are lead seconds from now"""
+        leg_start = self.leg_start[slots]
+        progress = np.minimum(1.0, (self.now + lead - leg_start) / (self.leg_end[slots] - leg_start))
+        return self.start[slots] + (self.end[slots] - self.start[slots]) * progress[:, None]
+    
+    def release(self, slots):
+        self.active[slots] = False
+        self.free.extend(slots.tolist())
+        self.count -= len(slots)
+        self.version += 1
+        if self.legs:
+            for slot in slots.tolist():
+                self.legs.pop(slot, None)
+
+
+def min_cost_flow(supply, demand, arcs, arc_limit=None):
+    """Min-cost flow for a transportation problem
+    
+    supply and demand map node -> amount, arcs maps (source, sink) -> cost,
+    and arc_limit optionally caps how much a source may put on one arc.
+    Ships as much as possible at the lowest total cost and returns
+    {(source, sink): amount} for every arc that carries flow.
+    """
+    arc_limit = arc_limit or {}
+    nodes = {node: i for i, node in enumerate(dict.fromkeys(itertools.chain(supply, demand)))}
+    supplies = np.zeros(len(nodes))
+    demands = np.zeros(len(nodes))
+    supplies[[nodes[s] for s in supply]] = list(supply.values())
+    demands[[nodes[d] for d in demand]] = list(demand.values())
+    
+    keys = [(s, d) for s, d in arcs if s in supply and d in demand]
+    amounts = _transport(
+        supplies, demands,
+        np.array([nodes[s] for s, _ in keys], dtype=np.int64),
+        np.array([nodes[d] for _, d in keys], dtype=np.int64),
+        np.array([arcs[key] for key in keys], dtype=float),
+        np.array([arc_limit.get(s, math.inf) for s, _ in keys], dtype=float),
+    )
+    return {key: amount for key, amount in zip(keys, amounts.tolist()) if amount > FLOW_EPSILON}
+
+
+def _transport(supply, demand, tails, heads, costs, limits):
+    """min_cost_flow on arrays: the amount on each arc tails[k] -> heads[k]
+    
+    supply and demand are indexed by node, and arc k costs costs[k] a
+    unit and carries at most limits[k]. Arcs are filled cheapest first,
+    which is optimal, or nearly so, when every sink's arcs are its few
+    nearest sources, as in calculate_trades. That start is then proved
+    optimal, or put right, by cancelling negative cycles in the residual
+    network. An arc back from the super sink to the super source that
+    costs less than any path makes shippable supply a negative cycle too,
+    so one search finds flows that are too small or too dear.
+    """
+    amounts = [0.0] * len(costs)
+    remaining_supply = supply.tolist()
+    remaining_demand = demand.tolist()
+    sources, sinks, limited = tails.tolist(), heads.tolist(), limits.tolist()
+    for k in np.argsort(costs, kind='stable').tolist():
+        s, d = sources[k], sinks[k]
+        amount = min(remaining_supply[s], remaining_demand[d], limited[k])
+        if amount > FLOW_EPSILON:
+            amounts[k] = amount
+            remaining_supply[s] -= amount
+            remaining_demand[d] -= amount
+    flow = np.array(amounts)
+    
+    # With a single source or sink, cheapest-first filling is already optimal
+    if not len(costs) or (tails == tails[0]).all() or (heads == heads[0]).all():
+        return flow
+    
+    # Super arcs: super source -> each source, each sink -> super sink, and
+    # the return arc from the super sink to the super source
+    n = len(supply)
+    hub_in, hub_out = n, n + 1
+    sources, sinks = np.unique(tails), np.unique(heads)
+    big = (n + 2) * (costs.max() + 1)  # Dearer than any path is cheap
+    arc_tails = np.concatenate((tails, np.full(len(sources), hub_in), sinks, [hub_out]))
+    arc_heads = np.concatenate((heads, sources, np.full(len(sinks), hub_out), [hub_in]))
+    arc_costs = np.concatenate((costs, np.zeros(len(sources) + len(sinks)), [-big]))
+    capacity = np.concatenate((limits, supply[sources], demand[sinks], [math.inf]))
+    flow = np.concatenate((flow, np.bincount(tails, flow, n)[sources], np.bincount(heads, flow, n)[sinks],
+                           [flow.sum()]))
+    
+    while True:
+        forward = np.flatnonzero(flow < capacity - FLOW_EPSILON)
+        backward = np.flatnonzero(flow > FLOW_EPSILON)
+        cycle = _negative_cycle(
+            n + 2,
+            np.concatenate((arc_tails[forward], arc_heads[backward])),
+            np.concatenate((arc_heads[forward], arc_tails[backward])),
+            np.concatenate((arc_costs[forward], -arc_costs[backward])),
+            big * 1e-12,
+        )
+        if cycle is None:
+            return flow[:len(costs)]
+        
+        # Push as much round the cycle as its tightest residual arc allows
+        along = cycle < len(forward)
+        arcs = np.empty(len(cycle), dtype=np.int64)
+        arcs[along] = forward[cycle[along]]
+        arcs[~along] = backward[cycle[~along] - len(forward)]
+        amount = np.where(along, capacity[arcs] - flow[arcs], flow[arcs]).min()
+        flow[arcs] += np.where(along, amount, -amount)
+
+
+def _negative_cycle(count, tails, heads, costs, tolerance):
+    """Positions of the arcs of a negative-cost cycle, in order, or None
+    
+    Bellman-Ford from every node at once, relaxing all arcs together. A
+    cycle among the arcs that last lowered each node's distance is
+    negative; with no negative cycle the distances settle within count
+    rounds, and with one such a cycle eventually appears.
+    """
+    dist = np.zeros(count)
+    pred = np.full(count, -1)
+    for rounds in itertools.count(1):
+        reach = dist[tails] + costs
+        best = dist.copy()
+        np.minimum.at(best, heads, reach)
+        better = best < dist - tolerance
+        if not better.any():
+            return None
+        via = np.flatnonzero(better[heads] & (reach <= best[heads]))
+        pred[heads[via]] = via
+        dist = np.where(better, best, dist)
+        
+        if rounds >= count:
+            for start in np.flatnonzero(better).tolist():
+                seen = {}
+                node = start
+                while node not in seen and pred[node] >= 0:
+                    seen[node] = len(seen)
+                    node = int(tails[pred[node]])
+                if node in seen:
+                    cycle = []
+                    v = node
+                    while True:
+                        cycle.append(int(pred[v]))
+                        v = int(tails[pred[v]])
+                        if v == node:
+                            return np.array(cycle[::-1])
 
 
 class TradeSystem:
-    """Manages resource balancing and trade between villages"""
-    def __init__(self, villages):
-        self.villages = villages
-        self.active_carts = []
+    """Manages resource balancing and trade between villages
     
+    Carts run on scheduler's clock (the engine's, when it has one): the
+    end of each cart's road is scheduled as it sets off, so nothing is
+    done for a cart between leaving, turning and arriving.
+    """
+    def __init__(self, villages, scheduler=None):
+        if not isinstance(villages, VillageRegistry):
+            villages = VillageRegistry(villages)
+        self.registry = villages
+        self.villages = villages.villages
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.fleet = CartFleet(scheduler=self.scheduler)
+        
+        self.routes = RouteGraph(self.villages)
+        self.paths = []  # Village ids along the road of each of this month's trades, in order
+    
+    @timed('trades.calculate')
     def calculate_trades(self):
-        """Main algorithm: balance resources across all villages"""
+        """Main algorithm: balance resources across all villages
+        
+        Each resource is solved as a transportation problem: surplus
+        villages supply their surplus (at most 60% of it per cart), deficit
+        villages demand their shortfall, and a min-cost flow over distances
+        decides who ships to whom. Villages about to die are served first.
+        
+        Goods only travel by road: the candidates for each deficit are the
+        nearest surplus villages by road distance. Flows take the roads
+        nearest first, each cut down to what is left of the capacity of
+        the roads on its path; when one is cut short, the roads that filled
+        up are closed and what is still wanted is solved again, so it goes
+        round by another road or comes from another village.
+        """
         trades = []  # List of (from_village, to_village, resource, amount)
         
         # Build network of alive villages
         alive_villages = [v for v in self.villages if v.is_alive]
+        thresholds = {v: v.calculate_thresholds() for v in alive_villages}
+        
+        # Plague and lightning block a village from sending and receiving
+        blocked = {
+            v for v in alive_villages
+            if v.has_event_type('plague') or v.has_event_type('lightning')
+        }
+        self.routes.refresh({v.id for v in self.villages if not v.is_alive} | {v.id for v in blocked})
+        self.paths = []
         
-        # For each resource type
         for resource in C.RESOURCES:
-            # Calculate surplus and deficit for each village
-            surpluses = []  # (village, surplus_amount)
-            deficits = []   # (village, deficit_amount, urgency)
+            supply = {}    # village id -> surplus it can send
+            arc_limit = {} # village id -> most it sends to any one village
+            critical = {}  # village id -> deficit, below survival threshold
+            deficits = {}  # village id -> deficit, below growth threshold
             
             for village in alive_villages:
-                survival_threshold, growth_threshold = village.calculate_thresholds()
+                survival_threshold, growth_threshold = thresholds[village]
                 current = village.resources[resource]
                 
-                # Check if village is blocked from receiving (plague, lightning)
-                can_receive = not (
-                    village.has_event_type('plague') or
-                    village.has_event_type('lightning')
-                )
-                
-                # Determine if surplus or deficit
                 if current > growth_threshold * 1.5:
-                    # Has surplus
-                    surplus = current - growth_threshold
-                    surpluses.append((village, surplus))
+                    if village not in blocked:
+                        supply[village.id] = current - growth_threshold
+                        arc_limit[village.id] = supply[village.id] * 0.6  # Max 60% of surplus per cart
                 
-                elif current < growth_threshold and can_receive:
-                    # Has deficit
-                    deficit = growth_threshold - current
-                    
-                    # Calculate urgency (closer to death = higher urgency)
-                    if current < survival_threshold:
-                        urgency = 1000  # CRITICAL - city will die
-                    else:
-                        urgency = deficit / growth_threshold
-                    
-                    deficits.append((village, deficit, urgency))
+                elif current < growth_threshold and village not in blocked:
+                    target = critical if current < survival_threshold else deficits
+                    target[village.id] = growth_threshold - current
             
-            # Sort deficits by urgency (most urgent first)
-            deficits.sort(key=lambda x: x[2], reverse=True)
+            if not supply:
+                continue
             
-            # Allocate resources from surplus to deficit
-            for deficit_village, deficit_amount, urgency in deficits:
-                needed = deficit_amount
-                
-                # Find nearest surplus villages
-                surplus_distances = []
-                for surplus_village, surplus_amount in surpluses:
-                    if surplus_amount > 0:
-                        # Calculate distance
-                        dx = surplus_village.position[0] - deficit_village.position[0]
-                        dy = surplus_village.position[1] - deficit_village.position[1]
-                        distance = math.sqrt(dx*dx + dy*dy)
-                        
-                        # Check if route is blocked
-                        route_blocked = (
-                            surplus_village.has_event_type('lightning') or
-                            surplus_village.has_event_type('plague')
-                        )
-                        
-                        if not route_blocked:
-                            surplus_distances.append((surplus_village, surplus_amount, distance))
-                
-                # Sort by distance (nearest first)
-                surplus_distances.sort(key=lambda x: x[2])
+            # Critical villages get first call on the supply
+            for demand in (critical, deficits):
+                if not demand:
+                    continue
                 
-                # Allocate from nearest surplus villages
-                for surplus_village, surplus_amount, distance in surplus_distances:
-                    if needed <= 0:
-                        break
+                cut = True
+                while cut:
+                    sources, sinks, costs = self._candidate_arcs(supply, demand)
+                    amounts = _transport(self._by_id(supply), self._by_id(demand), sources, sinks, costs,
+                                         self._by_id(arc_limit)[sources])
                     
-                    # Calculate how much to send
-                    send_amount = min(needed, surplus_amount, surplus_amount * 0.6)  # Max 60% of surplus
+                    # Only send if meaningful amount. Paths are looked up
+                    # before any road fills up and closes
+                    sent = np.flatnonzero(amounts > C.TRADE_MIN_AMOUNT)
+                    sent = sent[np.argsort(costs[sent], kind='stable')]
+                    flows = [(source, sink, amount, self.routes.path(source, sink)) for source, sink, amount in
+                             zip(sources[sent].tolist(), sinks[sent].tolist(), amounts[sent].tolist())]
                     
-                    if send_amount > 5:  # Only send if meaningful amount
-                        trades.append((surplus_village, deficit_village, resource, send_amount))
-                        
-                        # Update surplus tracking
-                        for i, (v, amt) in enumerate(surpluses):
-                            if v == surplus_village:
-                                surpluses[i] = (v, amt - send_amount)
-                                break
-                        
-                        needed -= send_amount
+                    cut = False
+                    for source, sink, amount, path in flows:
+                        room = self.routes.capacity_left(path)
+                        if room < amount - FLOW_EPSILON:
+                            amount = room
+                            cut = True  # A road on the path is full now
+                        if amount > C.TRADE_MIN_AMOUNT:
+                            self.routes.carry(path, amount)
+                            self.paths.append(path)
+                            trades.append((self.villages[source], self.villages[sink], resource, amount))
+                            supply[source] -= amount
+                            demand[sink] -= amount
         
         return trades
     
+    def _by_id(self, amounts):
+        """A village id -> amount dict as an array indexed by village id"""
+        array = np.zeros(len(self.villages))
+        array[list(amounts)] = list(amounts.values())
+        return array
+    
+    def _candidate_arcs(self, supply, demand):
+        """Arcs from each deficit to its nearest surplus villages by road
+        
+        Returns (sources, sinks, road distances) arrays. Villages with no
+        more than C.TRADE_MIN_AMOUNT to send or take are left out, as no
+        cart would be sent for it.
+        """
+        sinks = [d for d, amount in demand.items() if amount > C.TRADE_MIN_AMOUNT]
+        ids, distances = self.routes.nearby_table(sinks)
+        
+        # The first C.TRADE_MAX_CANDIDATES suppliers along each row; the
+        # padding id -1 lands on the extra entry, never a supplier
+        is_supply = np.zeros(len(self.villages) + 1, dtype=bool)
+        is_supply[[s for s, amount in supply.items() if amount > C.TRADE_MIN_AMOUNT]] = True
+        found = is_supply[ids]
+        found &= np.cumsum(found, axis=1) <= C.TRADE_MAX_CANDIDATES
+        rows, columns = np.nonzero(found)
+        return ids[rows, columns], np.array(sinks, dtype=np.int64)[rows], distances[rows, columns]
+    
+    @timed('trades.execute')
     def execute_trades(self, trades):
-        """Create trade carts for all trades"""
-        for from_village, to_village, resource, amount in trades:
+        """Create trade carts for all trades, as calculate_trades returned them, along their paths"""
+        for (from_village, to_village, resource, amount), path in zip(trades, self.paths):
             # Deduct resources from source
             from_village.resources[resource] -= amount
             
             # Apply trade efficiency
             actual_amount = amount * C.TRADE_EFFICIENCY
             
-            # Create cart
-            cart = TradeCart(
-                from_village.name,
-                to_village.name,
-                {resource: actual_amount},
+            # Create cart, driving village to village along the road
+            slot = self.fleet.launch(
+                from_village.id,
+                to_village.id,
+                C.RESOURCES.index(resource),
+                actual_amount,
                 from_village.position,
-                to_village.position
+                to_village.position,
+                waypoints=path and [self.villages[i].position for i in path[1:]]
             )
-            self.active_carts.append(cart)
-    
-    def update(self, dt):
-        """Update all active trade carts"""
-        completed = []
-        
-        for cart in self.active_carts:
-            if cart.update(dt):
-                completed.append(cart)
-        
-        # Deliver completed carts
-        for cart in completed:
-            # Find destination village
-            for village in self.villages:
-                if village.name == cart.to_village:
-                    # Add resources
-                    for resource, amount in cart.resources.items():
-                        village.resources[resource] += amount
-                    break
-            
-            self.active_carts.remove(cart)
\ No newline at end of file
+            self.scheduler.schedule(float(self.fleet.leg_end[slot]), self._road_done, slot)
+    
+    def schedule_carts(self):
+        """Schedule the end of the current road of every cart in flight, e.g. after a restore"""
+        self.scheduler.cancel(self._road_done)
+        fleet = self.fleet
+        slots = fleet.slots()
+        for slot, leg_end in zip(slots.tolist(), fleet.leg_end[slots].tolist()):
+            self.scheduler.schedule(leg_end, self._road_done, slot)
+    
+    @timed('carts.arrive')
+    def _road_done(self, slot):
+        """A cart reached the end of a road: on to the next one, or deliver"""
+        fleet = self.fleet
+        if fleet.turn(slot):
+            self.scheduler.schedule(float(fleet.leg_end[slot]), self._road_done, slot)
+        else:
+            self._deliver(np.array([slot]))
+    
+    def _deliver(self, slots):
+        fleet = self.fleet
+        for destination, resource, amount in zip(
+            fleet.destination[slots].tolist(), fleet.resource[slots].tolist(), fleet.amount[slots].tolist()
+        ):
+            self.villages[destination].resources[C.RESOURCES[resource]] += amount
+        fleet.release(slots)
+    
+    def deliver_all(self):
+        """Deliver every active cart immediately (headless mode)"""
+        self.scheduler.cancel(self._road_done)
+        self._deliver(self.fleet.slots())
\ No newline at end of file
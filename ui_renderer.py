@@ -1,11 +1,34 @@
-import pygame
 import math
+import numpy as np
+import pygame
 import constants as C
+from assets import AssetBundle
+from cache import LRUCache
+from profiler import profiler, timed
+from profiler_overlay import ProfilerOverlay
+from sprites import SpriteAtlas, surface_bytes
+from text_cache import TextCache
+from timeseries import TimeSeries
+
+def _merge_rects(rects):
+    """Union overlapping rects until none overlap"""
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        while True:
+            hit = rect.collidelist(merged)
+            if hit < 0:
+                break
+            rect.union_ip(merged.pop(hit))
+        merged.append(rect)
+    return merged
+
 
 class UIRenderer:
-    def __init__(self, screen, engine):
+    def __init__(self, screen, engine, clock=None):
         self.screen = screen
         self.engine = engine
+        self.clock = clock  # FixedStepClock driving the engine, for speed keys and interpolation
         self.width = screen.get_width()
         self.height = screen.get_height()
         
@@ -14,6 +37,9 @@ class UIRenderer:
         self.font_medium = pygame.font.Font(None, 32)
         self.font_small = pygame.font.Font(None, 24)
         self.font_tiny = pygame.font.Font(None, 18)
+        self.text = TextCache()
+        self.chart_cache = LRUCache(max_items=C.CHART_CACHE_ITEMS)
+        self.profiler_overlay = ProfilerOverlay(profiler)
         
         self.view_mode = 'map'
         self.selected_village = None
@@ -27,38 +53,57 @@ class UIRenderer:
         self.mouse_down = False
         self.drag_start = None
         
+        # Scaled map backgrounds keyed by pixel size, which is the zoom
+        # level quantized to what actually gets drawn
+        self.bg_cache = LRUCache(max_bytes=C.MAP_CACHE_BYTES, sizeof=surface_bytes)
+        
+        # Map view layers and the keys they were last drawn for
+        self.layers = {}
+        self.layer_keys = {}
+        self.cart_rects = []
+        self.dirty_rects = [screen.get_rect()]
+        self.route_reach = (None, 0.0)  # (village count, longest route)
+        
         self._load_assets()
         
         self.building_menu_open = False
         self.hovered_building = None
     
     def _load_assets(self):
-        self.assets = {}
-        asset_path = 'assets/'
+        # City images are far larger than they are ever drawn, so the bundle
+        # keeps them at their largest on-screen size
+        city_size = int(50 * self.max_zoom)
+        specs = {f'{resource}_icon': (f'{resource}_icon.png', (32, 32)) for resource in C.RESOURCES}
+        for city_data in C.CITIES:
+            specs[f"city_{city_data['name']}"] = (city_data['image'], (city_size, city_size))
+        specs['map_bg'] = ('windsor_essex_map.png', None)  # Loaded on the first map frame
+        self.assets = AssetBundle(specs)
+        
+        images = {}
+        for name in specs:
+            if name != 'map_bg' and name in self.assets:
+                images[name] = self.assets.get(name)
         
         for resource in C.RESOURCES:
-            try:
-                img = pygame.image.load(f'{asset_path}{resource}_icon.png')
-                self.assets[f'{resource}_icon'] = pygame.transform.scale(img, (32, 32))
-            except:
+            if f'{resource}_icon' not in images:
                 surf = pygame.Surface((32, 32), pygame.SRCALPHA)
                 pygame.draw.circle(surf, C.RESOURCE_COLORS[resource], (16, 16), 14)
-                self.assets[f'{resource}_icon'] = surf
-        
-        for city_data in C.CITIES:
-            city_key = city_data['name'].lower().replace("'", "").replace(" ", "_")
-            try:
-                img = pygame.image.load(f'{asset_path}{city_key}.png')
-                self.assets[f'city_{city_key}'] = img
-            except:
-                pass
+                images[f'{resource}_icon'] = surf
         
-        try:
-            self.map_bg = pygame.image.load(f'{asset_path}windsor_essex_map.png')
-        except:
-            self.map_bg = None
+        self.sprites = SpriteAtlas(images)
+        for name in images:
+            self.assets.release(name)
     
     def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.profiler_overlay.toggle()
+            self.layer_keys = {}  # Redraw whatever the panel covered
+            return
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            profiler.export(C.PROFILE_TRACE_PATH + '.json')
+            profiler.export(C.PROFILE_TRACE_PATH + '.csv')
+            return
+        
         if self.view_mode == 'map':
             self._handle_map_event(event)
         elif self.view_mode == 'city_detail':
@@ -116,6 +161,8 @@ class UIRenderer:
             elif event.key == pygame.K_ESCAPE:
                 if self.engine.simulation_complete:
                     self.view_mode = 'end_summary'
+            elif self.clock and pygame.K_1 <= event.key < pygame.K_1 + len(C.TIME_SCALES):
+                self.clock.set_scale(C.TIME_SCALES[event.key - pygame.K_1])
     
     def _handle_city_detail_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -124,8 +171,9 @@ class UIRenderer:
                 for i, (building_type, building_data) in enumerate(C.BUILDINGS.items()):
                     button_rect = pygame.Rect(1200, building_y_start + i * 90, 350, 70)
                     if button_rect.collidepoint(event.pos):
-                        if self.selected_village and self.selected_village.can_afford_building(building_type):
-                            self.selected_village.build_structure(building_type)
+                        village = self._selected_village()
+                        if village and village.can_afford_building(building_type):
+                            self.engine.build_structure(village, building_type)
         
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE or event.key == pygame.K_BACKSPACE:
@@ -137,15 +185,13 @@ class UIRenderer:
                 self.view_mode = 'map'
     
     def _get_city_at_pos(self, pos):
-        for village in self.engine.villages:
-            screen_x = village.position[0] * self.zoom + self.camera_x
-            screen_y = village.position[1] * self.zoom + self.camera_y
-            
-            dist = math.sqrt((pos[0] - screen_x)**2 + (pos[1] - screen_y)**2)
-            
-            radius = 20 * self.zoom
-            if dist < radius:
-                return village
+        # A 20 * zoom pixel radius on screen is 20 units in world space
+        world_x = (pos[0] - self.camera_x) / self.zoom
+        world_y = (pos[1] - self.camera_y) / self.zoom
+        
+        hits = self.engine.geometry.within((world_x, world_y), 20)
+        if hits:
+            return self.engine.villages[hits[0]]
         
         return None
     
@@ -154,67 +200,256 @@ class UIRenderer:
         screen_y = world_y * self.zoom + self.camera_y
         return (screen_x, screen_y)
     
+    @timed('render')
     def render(self):
+        """Draw the current view; dirty_rects lists what changed on screen"""
         if self.view_mode == 'map':
             self._render_map_view()
-        elif self.view_mode == 'city_detail':
-            self._render_city_detail()
-        elif self.view_mode == 'end_summary':
-            self._render_end_summary()
+        else:
+            if self.view_mode == 'city_detail':
+                self._render_city_detail()
+            elif self.view_mode == 'end_summary':
+                self._render_end_summary()
+            
+            self.dirty_rects = [self.screen.get_rect()]
+            self.layer_keys = {}
+        
+        # Drawn straight onto the screen over the finished view
+        panel = self.profiler_overlay.draw(self.screen, len(self.engine.trade_system.fleet))
+        if panel:
+            self.dirty_rects.append(panel)
+    
+    def _draw_layer(self, name, key, draw, flags=0):
+        """Redraw a full-screen layer through draw() only when key changes"""
+        if self.layer_keys.get(name) == key:
+            return False
+        
+        layer = self.layers.get(name)
+        if layer is None:
+            layer = pygame.Surface((self.width, self.height), flags)
+            self.layers[name] = layer
+        if flags & pygame.SRCALPHA:
+            layer.fill((0, 0, 0, 0))
+        
+        screen = self.screen
+        self.screen = layer
+        try:
+            draw()
+        finally:
+            self.screen = screen
         
-        if self.engine.simulation_complete and self.view_mode == 'map':
-            self._render_completion_message()
+        self.layer_keys[name] = key
+        return True
     
+    @timed('render.map_view')
     def _render_map_view(self):
+        """Composite the map from cached layers and push only dirty rectangles
+        
+        background: fill, map and routes; redrawn when the camera moves or
+                    the month changes (dead villages, lightning routes)
+        cities:     city sprites and labels; same triggers
+        overlay:    sidebar, pause banner and completion message; also
+                    redrawn when the cart count or pause state changes
+        Carts are the only per-frame drawing and sit between background
+        and cities. At far zoom the background also carries the cart flow
+        lines, so it is redrawn whenever a cart sets off, turns or arrives.
+        """
+        camera = (self.camera_x, self.camera_y, self.zoom)
+        tier = self._lod()
+        flows = self.engine.trade_system.fleet.version if tier == 'far' else None
+        world = (camera, self.engine.version, tier, flows)
+        
+        changed = self._draw_layer('background', world, self._render_background)
+        changed |= self._draw_layer('cities', world, self._render_cities, pygame.SRCALPHA)
+        overlay_key = (self.engine.version, len(self.engine.trade_system.fleet), self.engine.is_paused,
+                       self.engine.simulation_complete, self.clock and self.clock.scale)
+        changed |= self._draw_layer('overlay', overlay_key, self._render_overlay_layer, pygame.SRCALPHA)
+        
+        marks = self._cart_marks()
+        if changed:
+            self.screen.blit(self.layers['background'], (0, 0))
+            self._render_trade_carts(marks)
+            self.screen.blit(self.layers['cities'], (0, 0))
+            self.screen.blit(self.layers['overlay'], (0, 0))
+            self.dirty_rects = [self.screen.get_rect()]
+            self.cart_rects = self._cart_rects(marks)
+            return
+        
+        # Only carts moved: recomposite where they were and where they are.
+        # The upper layers are translucent, so each pixel must be composited
+        # exactly once: overlapping rects are merged first
+        cart_rects = self._cart_rects(marks)
+        dirty = self.cart_rects + cart_rects
+        if len(dirty) > C.MAX_DIRTY_RECTS:
+            dirty = [dirty[0].unionall(dirty)]
+        else:
+            dirty = _merge_rects(dirty)
+        
+        for rect in dirty:
+            self.screen.blit(self.layers['background'], rect, rect)
+        self._render_trade_carts(marks)
+        for rect in dirty:
+            self.screen.blit(self.layers['cities'], rect, rect)
+            self.screen.blit(self.layers['overlay'], rect, rect)
+        self.cart_rects = cart_rects
+        self.dirty_rects = dirty
+    
+    def _render_overlay_layer(self):
+        self._render_ui_overlay()
+        if self.engine.simulation_complete:
+            self._render_completion_message()
+    
+    @timed('render.background')
+    def _render_background(self):
         self.screen.fill(C.COLOR_BG)
         
-        if self.map_bg:
-            bg_width = int(self.map_bg.get_width() * self.zoom)
-            bg_height = int(self.map_bg.get_height() * self.zoom)
-            scaled_bg = pygame.transform.scale(self.map_bg, (bg_width, bg_height))
-            self.screen.blit(scaled_bg, (self.camera_x, self.camera_y))
+        map_bg = self.assets.get('map_bg')
+        if map_bg:
+            bg_size = (int(map_bg.get_width() * self.zoom), int(map_bg.get_height() * self.zoom))
+            scaled_bg = self.bg_cache.get_or_create(bg_size, lambda: pygame.transform.scale(map_bg, bg_size))
+            
+            # Blit only the part of the map inside the window
+            visible = pygame.Rect(-self.camera_x, -self.camera_y, self.width, self.height).clip(scaled_bg.get_rect())
+            if visible.width and visible.height:
+                self.screen.blit(scaled_bg, (self.camera_x + visible.x, self.camera_y + visible.y), visible)
         
         self._render_trade_routes()
-        self._render_trade_carts()
-        self._render_cities()
-        self._render_ui_overlay()
+        if self._lod() == 'far':
+            self._render_cart_flows()
+    
+    def _lod(self):
+        """Level of detail for the current zoom: 'far', 'mid' or 'near'"""
+        if self.zoom < C.LOD_FAR_ZOOM:
+            return 'far'
+        if self.zoom > C.LOD_NEAR_ZOOM:
+            return 'near'
+        return 'mid'
+    
+    def _visible_world_rect(self, margin=0):
+        """World-space box (x0, y0, x1, y1) under the window, grown by margin world units"""
+        x0 = -self.camera_x / self.zoom - margin
+        y0 = -self.camera_y / self.zoom - margin
+        x1 = (self.width - self.camera_x) / self.zoom + margin
+        y1 = (self.height - self.camera_y) / self.zoom + margin
+        return x0, y0, x1, y1
+    
+    def _route_reach(self):
+        """Longest trade route in world units; routes this close to the window may cross it"""
+        villages = self.engine.villages
+        if self.route_reach[0] != len(villages):
+            reach = max((math.dist(village.position, villages[j].position)
+                         for village in villages for j in village.connected_routes), default=0.0)
+            self.route_reach = (len(villages), reach)
+        return self.route_reach[1]
     
+    @timed('render.trade_routes')
     def _render_trade_routes(self):
-        for village in self.engine.villages:
+        villages = self.engine.villages
+        view = self.screen.get_rect()
+        width = max(1, int(2 * self.zoom))
+        
+        for i in self.engine.geometry.in_rect(*self._visible_world_rect(self._route_reach())):
+            village = villages[i]
             if not village.is_alive:
                 continue
             
-            for connected_name in village.connected_routes:
-                for other in self.engine.villages:
-                    if other.name == connected_name and other.is_alive:
-                        color = C.COLOR_ROUTE
-                        if village.has_event_type('lightning') or other.has_event_type('lightning'):
-                            color = (200, 200, 200)
-                        
-                        start_pos = self.world_to_screen(village.position[0], village.position[1])
-                        end_pos = self.world_to_screen(other.position[0], other.position[1])
-                        
-                        pygame.draw.line(self.screen, color, start_pos, end_pos, max(1, int(2 * self.zoom)))
-                        break
+            for connected_id in village.connected_routes:
+                other = villages[connected_id]
+                if other.is_alive:
+                    start_pos = self.world_to_screen(village.position[0], village.position[1])
+                    end_pos = self.world_to_screen(other.position[0], other.position[1])
+                    if not view.clipline(start_pos, end_pos):
+                        continue
+                    
+                    color = C.COLOR_ROUTE
+                    if village.has_event_type('lightning') or other.has_event_type('lightning'):
+                        color = (200, 200, 200)
+                    
+                    pygame.draw.line(self.screen, color, start_pos, end_pos, width)
     
-    def _render_trade_carts(self):
-        for cart in self.engine.trade_system.active_carts:
-            screen_pos = self.world_to_screen(cart.position[0], cart.position[1])
-            
-            radius = max(4, int(6 * self.zoom))
+    @timed('render.cart_flows')
+    def _render_cart_flows(self):
+        """Far zoom: one line per road with carts on it, thicker the busier it is"""
+        fleet = self.engine.trade_system.fleet
+        slots = fleet.slots()
+        if not len(slots):
+            return
+        
+        view = self.screen.get_rect()
+        roads, counts = np.unique(np.column_stack([fleet.start[slots], fleet.end[slots]]),
+                                  axis=0, return_counts=True)
+        for (x0, y0, x1, y1), count in zip(roads.tolist(), counts.tolist()):
+            start_pos = self.world_to_screen(x0, y0)
+            end_pos = self.world_to_screen(x1, y1)
+            if view.clipline(start_pos, end_pos):
+                pygame.draw.line(self.screen, C.COLOR_CART, start_pos, end_pos, min(1 + count, 6))
+    
+    def _cart_marks(self):
+        """(screen position, radius, icon name or None) of every cart marker in view
+        
+        Near and mid zoom mark each cart; far zoom marks each route's carts
+        with one dot at their average position, bigger for more carts.
+        """
+        fleet = self.engine.trade_system.fleet
+        slots = fleet.slots()
+        if not len(slots):
+            return []
+        # Carts keep moving between simulation steps
+        lead = self.clock.lag if self.clock and not (self.engine.simulation_complete or self.engine.is_paused) else 0.0
+        positions = fleet.positions(slots, lead)
+        
+        if self._lod() == 'far':
+            routes = fleet.source[slots] * len(self.engine.villages) + fleet.destination[slots]
+            _, group, counts = np.unique(routes, return_inverse=True, return_counts=True)
+            positions = np.column_stack([np.bincount(group, positions[:, 0]),
+                                         np.bincount(group, positions[:, 1])]) / counts[:, None]
+            radii = np.minimum(3 + counts, 8)
+            icons = [None] * len(positions)
+        else:
+            radii = np.full(len(slots), max(4, int(6 * self.zoom)))
+            icons = [None] * len(slots)
+            if self.zoom > 1.2:
+                icons = [f'{C.RESOURCES[r]}_icon' for r in fleet.resource[slots].tolist()]
+                icons = [icon if icon in self.sprites else None for icon in icons]
+        
+        x0, y0, x1, y1 = self._visible_world_rect(C.CULL_MARGIN / self.zoom)
+        visible = np.flatnonzero((positions[:, 0] >= x0) & (positions[:, 0] <= x1)
+                                 & (positions[:, 1] >= y0) & (positions[:, 1] <= y1))
+        return [(self.world_to_screen(positions[k, 0], positions[k, 1]), int(radii[k]), icons[k])
+                for k in visible.tolist()]
+    
+    @timed('render.trade_carts')
+    def _render_trade_carts(self, marks):
+        for screen_pos, radius, icon in marks:
             pygame.draw.circle(self.screen, C.COLOR_CART, screen_pos, radius)
             
-            if cart.resources and self.zoom > 1.2:
-                resource = list(cart.resources.keys())[0]
-                if f'{resource}_icon' in self.assets:
-                    icon = self.assets[f'{resource}_icon']
-                    icon_size = max(12, int(16 * self.zoom))
-                    icon_small = pygame.transform.scale(icon, (icon_size, icon_size))
-                    icon_pos = (screen_pos[0] - icon_size//2, screen_pos[1] - icon_size - 10)
-                    self.screen.blit(icon_small, icon_pos)
+            if icon:
+                icon_size = max(12, int(16 * self.zoom))
+                icon_small = self.sprites.scaled(icon, icon_size)
+                icon_pos = (screen_pos[0] - icon_size//2, screen_pos[1] - icon_size - 10)
+                self.screen.blit(icon_small, icon_pos)
+    
+    def _cart_rects(self, marks):
+        """Screen rects covered by _render_trade_carts(marks), without drawing"""
+        rects = []
+        screen_rect = self.screen.get_rect()
+        icon_size = max(12, int(16 * self.zoom))
+        for (x, y), radius, icon in marks:
+            rects.append(pygame.Rect(x - radius - 1, y - radius - 1, 2 * radius + 2, 2 * radius + 2))
+            if icon:
+                rects.append(pygame.Rect(x - icon_size//2, y - icon_size - 10, icon_size, icon_size))
+        
+        rects = [rect.clip(screen_rect) for rect in rects]
+        return [rect for rect in rects if rect.width and rect.height]
 
+    @timed('render.cities')
     def _render_cities(self):
-        for village in self.engine.villages:
+        """Draw the villages in view; far zoom drops the icons around each city"""
+        tier = self._lod()
+        villages = self.engine.villages
+        margin = C.CITY_EXTENT + C.CULL_MARGIN / self.zoom
+        for i in self.engine.geometry.in_rect(*self._visible_world_rect(margin)):
+            village = villages[i]
             screen_pos = self.world_to_screen(village.position[0], village.position[1])
             
             if not village.is_alive:
@@ -226,16 +461,13 @@ class UIRenderer:
                                (screen_pos[0]+size, screen_pos[1]-size),
                                (screen_pos[0]-size, screen_pos[1]+size), max(2, int(3 * self.zoom)))
                 
-                dead_text = self.font_tiny.render("DEAD", True, (100, 100, 100))
+                dead_text = self.text.render(self.font_tiny, "DEAD", True, (100, 100, 100))
                 self.screen.blit(dead_text, (screen_pos[0] - 15, screen_pos[1] - 40))
                 continue
             
-            city_key = village.name.lower().replace("'", "").replace(" ", "_")
-            city_image = self.assets.get(f'city_{city_key}')
-            
-            if city_image:
+            if f'city_{village.name}' in self.sprites:
                 img_size = int(50 * self.zoom)
-                scaled_city = pygame.transform.scale(city_image, (img_size, img_size))
+                scaled_city = self.sprites.scaled(f'city_{village.name}', img_size)
                 img_pos = (int(screen_pos[0] - img_size // 2), int(screen_pos[1] - img_size // 2))
                 self.screen.blit(scaled_city, img_pos)
                 
@@ -248,76 +480,84 @@ class UIRenderer:
                 pygame.draw.circle(self.screen, color, screen_pos, radius)
                 pygame.draw.circle(self.screen, (0, 0, 0), screen_pos, radius, max(1, int(2 * self.zoom)))
             
-            name_text = self.font_small.render(village.name, True, C.COLOR_TEXT)
+            name_text = self.text.render(self.font_small, village.name, True, C.COLOR_TEXT)
             name_rect = name_text.get_rect(center=(screen_pos[0], screen_pos[1] - int(35 * self.zoom)))
             self.screen.blit(name_text, name_rect)
             
+            # Far zoom: city, name and disasters only
+            if tier == 'far':
+                self._render_city_events(village, screen_pos)
+                continue
+            
             if village.produces:
-                icon = self.assets.get(f'{village.produces}_icon')
-                if icon:
+                if f'{village.produces}_icon' in self.sprites:
                     icon_size = int(24 * self.zoom)
-                    icon_scaled = pygame.transform.scale(icon, (icon_size, icon_size))
+                    icon_scaled = self.sprites.scaled(f'{village.produces}_icon', icon_size)
                     icon_pos = (int(screen_pos[0] + 30 * self.zoom), int(screen_pos[1] - 12 * self.zoom))
                     self.screen.blit(icon_scaled, icon_pos)
             
-            gold_icon = self.assets.get('gold_icon')
-            if gold_icon:
+            if 'gold_icon' in self.sprites:
                 gold_size = int(20 * self.zoom)
-                gold_scaled = pygame.transform.scale(gold_icon, (gold_size, gold_size))
+                gold_scaled = self.sprites.scaled('gold_icon', gold_size)
                 gold_pos = (int(screen_pos[0] + 30 * self.zoom), int(screen_pos[1] + 12 * self.zoom))
                 self.screen.blit(gold_scaled, gold_pos)
             
-            if self.zoom > 1.8:
+            if tier == 'near':
                 production = village.calculate_production()
                 y_offset = 35
                 prod_x = int(screen_pos[0] + 50 * self.zoom)
                 
                 for resource, amount in production.items():
-                    amount_text = self.font_tiny.render(f"+{int(amount)}", True, (0, 150, 0))
+                    amount_text = self.text.render(self.font_tiny, f"+{int(amount)}", True, (0, 150, 0), slot=(resource, village.id))
                     self.screen.blit(amount_text, (prod_x, int(screen_pos[1] + y_offset * self.zoom)))
                     y_offset += 18
                 
-                pop_text = self.font_tiny.render(f"Pop: {village.population}", True, C.COLOR_TEXT)
+                pop_text = self.text.render(self.font_tiny, f"Pop: {village.population}", True, C.COLOR_TEXT, slot=('pop', village.id))
                 self.screen.blit(pop_text, (int(screen_pos[0] - 30 * self.zoom), int(screen_pos[1] + 40 * self.zoom)))
                 
                 growth_color = (0, 150, 0) if village.growth_rate > 0 else (150, 0, 0)
-                growth_text = self.font_tiny.render(f"{village.growth_rate*100:.1f}%", True, growth_color)
+                growth_text = self.text.render(self.font_tiny, f"{village.growth_rate*100:.1f}%", True, growth_color, slot=('growth', village.id))
                 self.screen.blit(growth_text, (int(screen_pos[0] - 30 * self.zoom), int(screen_pos[1] + 55 * self.zoom)))
             
-            if village.active_events:
-                event_x = int(screen_pos[0] - 15 * self.zoom)
-                for i, (event_type, duration) in enumerate(village.active_events):
-                    event_data = C.EVENT_TYPES[event_type]
-                    event_text = self.font_medium.render(event_data['icon'], True, event_data['color'])
-                    event_pos = (event_x, int(screen_pos[1] - (60 + i * 30) * self.zoom))
-                    self.screen.blit(event_text, event_pos)
+            self._render_city_events(village, screen_pos)
             
             if village.buildings:
                 building_x = int(screen_pos[0] + 30 * self.zoom)
                 for i, building_type in enumerate(village.buildings):
                     building_data = C.BUILDINGS[building_type]
-                    building_text = self.font_small.render(building_data['icon'], True, building_data['color'])
+                    building_text = self.text.render(self.font_small, building_data['icon'], True, building_data['color'])
                     building_pos = (building_x + int(i * 25 * self.zoom), int(screen_pos[1] + 30 * self.zoom))
                     self.screen.blit(building_text, building_pos)
     
+    @timed('render.city_events')
+    def _render_city_events(self, village, screen_pos):
+        event_x = int(screen_pos[0] - 15 * self.zoom)
+        for i, (event_type, duration) in enumerate(village.active_events):
+            event_data = C.EVENT_TYPES[event_type]
+            event_text = self.text.render(self.font_medium, event_data['icon'], True, event_data['color'])
+            event_pos = (event_x, int(screen_pos[1] - (60 + i * 30) * self.zoom))
+            self.screen.blit(event_text, event_pos)
+    
+    @timed('render.ui_overlay')
     def _render_ui_overlay(self):
         sidebar_rect = pygame.Rect(0, 0, 250, self.height)
-        sidebar_surface = pygame.Surface((250, self.height))
-        sidebar_surface.set_alpha(220)
-        sidebar_surface.fill((50, 40, 30))
+        # Per-pixel alpha, so the overlay layer keeps it translucent rather
+        # than blending it twice
+        sidebar_surface = pygame.Surface((250, self.height), pygame.SRCALPHA)
+        sidebar_surface.fill((50, 40, 30, 220))
         self.screen.blit(sidebar_surface, sidebar_rect)
         
-        time_text = self.font_large.render(self.engine.get_time_string(), True, (255, 255, 255))
+        time_text = self.text.render(self.font_large, self.engine.get_time_string(), True, (255, 255, 255))
         self.screen.blit(time_text, (15, 15))
         
         progress = self.engine.get_progress_percent()
         pygame.draw.rect(self.screen, (100, 100, 100), (15, 70, 220, 25))
         pygame.draw.rect(self.screen, (100, 200, 100), (15, 70, int(220 * progress / 100), 25))
-        progress_text = self.font_small.render(f"{progress:.1f}%", True, (255, 255, 255))
+        progress_text = self.text.render(self.font_small, f"{progress:.1f}%", True, (255, 255, 255))
         self.screen.blit(progress_text, (100, 72))
         
         sus_y = 120
-        sus_label = self.font_medium.render("Sustainability", True, (255, 255, 255))
+        sus_label = self.text.render(self.font_medium, "Sustainability", True, (255, 255, 255))
         self.screen.blit(sus_label, (15, sus_y))
         
         sus_score = self.engine.sustainability_score
@@ -334,11 +574,11 @@ class UIRenderer:
         pygame.draw.rect(self.screen, (80, 80, 80), (15, sus_y + 35, 50, sus_height))
         pygame.draw.rect(self.screen, bar_color, (15, sus_y + 35 + sus_height - sus_filled, 50, sus_filled))
         
-        sus_text = self.font_small.render(f"{sus_score}/1000", True, (255, 255, 255))
+        sus_text = self.text.render(self.font_small, f"{sus_score}/1000", True, (255, 255, 255))
         self.screen.blit(sus_text, (75, sus_y + 35 + sus_height // 2))
         
         stats_y = sus_y + sus_height + 60
-        stats_label = self.font_medium.render("Kingdom Stats", True, (255, 255, 255))
+        stats_label = self.text.render(self.font_medium, "Kingdom Stats", True, (255, 255, 255))
         self.screen.blit(stats_label, (15, stats_y))
         
         alive_cities = sum(1 for v in self.engine.villages if v.is_alive)
@@ -347,35 +587,44 @@ class UIRenderer:
         stats = [
             f"Cities: {alive_cities}/{len(self.engine.villages)}",
             f"Pop: {total_pop:,}",
-            f"Carts: {len(self.engine.trade_system.active_carts)}",
+            f"Carts: {len(self.engine.trade_system.fleet)}",
             f"Trades: {self.engine.total_trades}",
         ]
+        if self.clock:
+            stats.append(f"Speed: {self.clock.scale_label()}")
         
         for i, stat in enumerate(stats):
-            stat_text = self.font_small.render(stat, True, (255, 255, 255))
+            stat_text = self.text.render(self.font_small, stat, True, (255, 255, 255))
             self.screen.blit(stat_text, (15, stats_y + 35 + i * 28))
         
         if self.engine.is_paused:
-            pause_text = self.font_large.render("PAUSED", True, (255, 100, 100))
+            pause_text = self.text.render(self.font_large, "PAUSED", True, (255, 100, 100))
             pause_rect = pause_text.get_rect(center=(self.width // 2, 50))
             self.screen.blit(pause_text, pause_rect)
         
-        hint_text = self.font_tiny.render("SPACE: Pause | Drag: Pan | Scroll: Zoom | Click City: Details", True, (200, 200, 200))
+        hint_text = self.text.render(self.font_tiny, "SPACE: Pause | 1-4: Speed | Drag: Pan | Scroll: Zoom | Click City: Details | F3: Profiler", True, (200, 200, 200))
         self.screen.blit(hint_text, (self.width - 550, self.height - 25))
     
+    def _selected_village(self):
+        """The selected village as the engine (or latest worker frame) has it now"""
+        if self.selected_village is None:
+            return None
+        return self.engine.villages[self.selected_village.id]
+    
+    @timed('render.city_detail')
     def _render_city_detail(self):
         if not self.selected_village:
             self.view_mode = 'map'
             return
         
-        village = self.selected_village
+        village = self._selected_village()
         
         self.screen.fill(C.COLOR_BG)
         
-        title_text = self.font_large.render(village.name, True, C.COLOR_TEXT)
+        title_text = self.text.render(self.font_large, village.name, True, C.COLOR_TEXT)
         self.screen.blit(title_text, (40, 25))
         
-        back_text = self.font_small.render("Press ESC to return to map", True, (100, 100, 100))
+        back_text = self.text.render(self.font_small, "Press ESC to return to map", True, (100, 100, 100))
         self.screen.blit(back_text, (40, 75))
         
         bars_x = 40
@@ -385,17 +634,16 @@ class UIRenderer:
         
         survival_threshold, growth_threshold = village.calculate_thresholds()
         
-        bar_label = self.font_medium.render("Resource Reserves", True, C.COLOR_TEXT)
+        bar_label = self.text.render(self.font_medium, "Resource Reserves", True, C.COLOR_TEXT)
         self.screen.blit(bar_label, (bars_x, bars_y - 35))
         
         for i, resource in enumerate(C.RESOURCES):
             y = bars_y + i * (bar_height + 18)
             
-            icon = self.assets.get(f'{resource}_icon')
-            if icon:
-                self.screen.blit(icon, (bars_x, y + 10))
+            if f'{resource}_icon' in self.sprites:
+                self.screen.blit(self.sprites.get(f'{resource}_icon'), (bars_x, y + 10))
             
-            res_name = self.font_small.render(resource.capitalize(), True, C.COLOR_TEXT)
+            res_name = self.text.render(self.font_small, resource.capitalize(), True, C.COLOR_TEXT)
             self.screen.blit(res_name, (bars_x + 38, y + 18))
             
             bar_rect = pygame.Rect(bars_x + 130, y, bar_width, bar_height)
@@ -415,60 +663,70 @@ class UIRenderer:
             if growth_x < bars_x + 130 + bar_width:
                 pygame.draw.line(self.screen, (255, 255, 0), (growth_x, y), (growth_x, y + bar_height), 3)
             
-            amount_text = self.font_small.render(f"{int(current)}", True, C.COLOR_TEXT)
+            amount_text = self.text.render(self.font_small, f"{int(current)}", True, C.COLOR_TEXT)
             self.screen.blit(amount_text, (bars_x + 640, y + 18))
             
             pygame.draw.rect(self.screen, C.COLOR_TEXT, bar_rect, 2)
         
         legend_y = bars_y + len(C.RESOURCES) * (bar_height + 18) + 15
         pygame.draw.line(self.screen, (255, 0, 0), (bars_x, legend_y), (bars_x + 25, legend_y), 3)
-        legend1 = self.font_tiny.render("Death Threshold", True, C.COLOR_TEXT)
+        legend1 = self.text.render(self.font_tiny, "Death Threshold", True, C.COLOR_TEXT)
         self.screen.blit(legend1, (bars_x + 32, legend_y - 7))
         
         pygame.draw.line(self.screen, (255, 255, 0), (bars_x + 160, legend_y), (bars_x + 185, legend_y), 3)
-        legend2 = self.font_tiny.render("Growth Threshold", True, C.COLOR_TEXT)
+        legend2 = self.text.render(self.font_tiny, "Growth Threshold", True, C.COLOR_TEXT)
         self.screen.blit(legend2, (bars_x + 192, legend_y - 7))
         
-        self._render_mini_chart(750, 130, 380, 180, village.population_history, "Population", (100, 100, 200))
-        self._render_mini_chart(750, 350, 380, 180, village.growth_history, "Growth Rate", (100, 200, 100))
+        self._render_mini_chart(750, 130, 380, 180, village.id, village.population_history, "Population", (100, 100, 200))
+        self._render_mini_chart(750, 350, 380, 180, village.id, village.growth_history, "Growth Rate", (100, 200, 100))
         
         log_y = 570
-        log_label = self.font_medium.render("Event Log", True, C.COLOR_TEXT)
+        log_label = self.text.render(self.font_medium, "Event Log", True, C.COLOR_TEXT)
         self.screen.blit(log_label, (40, log_y))
         
-        recent_events = village.event_log[-8:]
+        recent_events = list(village.event_log)[-8:]
         for i, event in enumerate(recent_events):
-            event_text = self.font_small.render(f"• {event}", True, C.COLOR_TEXT)
+            event_text = self.text.render(self.font_small, f"• {event}", True, C.COLOR_TEXT)
             self.screen.blit(event_text, (40, log_y + 35 + i * 24))
         
         self._render_building_menu(1150, 130, village)
     
-    def _render_mini_chart(self, x, y, width, height, data, title, color):
-        chart_rect = pygame.Rect(x, y, width, height)
-        pygame.draw.rect(self.screen, (240, 240, 240), chart_rect)
-        pygame.draw.rect(self.screen, C.COLOR_TEXT, chart_rect, 2)
+    @timed('render.mini_chart')
+    def _render_mini_chart(self, x, y, width, height, village_id, data, title, color):
+        """Blit a chart of data; it is only redrawn when data gets a new month"""
+        if not isinstance(data, TimeSeries):
+            data = TimeSeries(data)
+        
+        key = (village_id, title, data.total, width, height)
+        chart = self.chart_cache.get_or_create(key, lambda: self._draw_chart(width, height, data, title, color))
+        self.screen.blit(chart, (x, y))
+    
+    def _draw_chart(self, width, height, data, title, color):
+        chart = pygame.Surface((width, height))
+        chart_rect = chart.get_rect()
+        pygame.draw.rect(chart, (240, 240, 240), chart_rect)
+        pygame.draw.rect(chart, C.COLOR_TEXT, chart_rect, 2)
         
-        title_text = self.font_small.render(title, True, C.COLOR_TEXT)
-        self.screen.blit(title_text, (x + 8, y + 8))
+        title_text = self.text.render(self.font_small, title, True, C.COLOR_TEXT)
+        chart.blit(title_text, (8, 8))
         
-        if not data or len(data) < 2:
-            return
+        if len(data) < 2:
+            return chart
         
-        min_val = min(data)
-        max_val = max(data)
+        min_val = data.min()
+        max_val = data.max()
         range_val = max_val - min_val if max_val != min_val else 1
         
-        points = []
-        for i, val in enumerate(data):
-            px = x + 8 + (i / len(data)) * (width - 16)
-            py = y + height - 15 - ((val - min_val) / range_val) * (height - 35)
-            points.append((px, py))
-        
-        if len(points) > 1:
-            pygame.draw.lines(self.screen, color, False, points, 2)
+        # At most two points per pixel column, however long the history
+        xs, ys = data.downsample(width - 16)
+        px = 8 + (xs / len(data)) * (width - 16)
+        py = height - 15 - ((ys - min_val) / range_val) * (height - 35)
+        pygame.draw.lines(chart, color, False, np.column_stack((px, py)).tolist(), 2)
+        return chart
     
+    @timed('render.building_menu')
     def _render_building_menu(self, x, y, village):
-        menu_label = self.font_medium.render("Build Projects", True, C.COLOR_TEXT)
+        menu_label = self.text.render(self.font_medium, "Build Projects", True, C.COLOR_TEXT)
         self.screen.blit(menu_label, (x, y))
         
         button_y = y + 45
@@ -487,31 +745,32 @@ class UIRenderer:
             pygame.draw.rect(self.screen, button_color, button_rect)
             pygame.draw.rect(self.screen, C.COLOR_TEXT, button_rect, 2)
             
-            icon_text = self.font_medium.render(building_data['icon'], True, building_data['color'])
+            icon_text = self.text.render(self.font_medium, building_data['icon'], True, building_data['color'])
             self.screen.blit(icon_text, (x + 8, button_y + 8))
             
-            name_text = self.font_small.render(building_data['name'], True, C.COLOR_TEXT)
+            name_text = self.text.render(self.font_small, building_data['name'], True, C.COLOR_TEXT)
             self.screen.blit(name_text, (x + 42, button_y + 8))
             
             cost_str = ", ".join([f"{amt} {res}" for res, amt in building_data['cost'].items()])
-            cost_text = self.font_tiny.render(f"Cost: {cost_str}", True, C.COLOR_TEXT)
+            cost_text = self.text.render(self.font_tiny, f"Cost: {cost_str}", True, C.COLOR_TEXT)
             self.screen.blit(cost_text, (x + 42, button_y + 32))
             
             if has_building:
-                status_text = self.font_tiny.render("BUILT", True, (0, 100, 0))
+                status_text = self.text.render(self.font_tiny, "BUILT", True, (0, 100, 0))
             elif can_afford:
-                status_text = self.font_tiny.render("Click to build", True, (0, 0, 100))
+                status_text = self.text.render(self.font_tiny, "Click to build", True, (0, 0, 100))
             else:
-                status_text = self.font_tiny.render("Cannot afford", True, (100, 0, 0))
+                status_text = self.text.render(self.font_tiny, "Cannot afford", True, (100, 0, 0))
             
             self.screen.blit(status_text, (x + 42, button_y + 50))
             
             button_y += 90
     
+    @timed('render.end_summary')
     def _render_end_summary(self):
         self.screen.fill(C.COLOR_BG)
         
-        title_text = self.font_large.render("Simulation Complete - Kingdom Summary", True, C.COLOR_TEXT)
+        title_text = self.text.render(self.font_large, "Simulation Complete - Kingdom Summary", True, C.COLOR_TEXT)
         title_rect = title_text.get_rect(center=(self.width // 2, 40))
         self.screen.blit(title_text, title_rect)
         
@@ -525,18 +784,18 @@ class UIRenderer:
             f"Final Cities Alive: {len(alive_cities)} / {len(self.engine.villages)}",
             f"Total Population: {total_pop:,}",
             f"Total Trades Completed: {self.engine.total_trades}",
-            f"Total Events: {len(self.engine.event_system.event_history)}",
+            f"Total Events: {self.engine.event_system.event_count}",
             f"",
             f"Final Sustainability Score: {self.engine.sustainability_score} / 1000",
         ]
         
         for i, stat in enumerate(stats):
-            stat_text = self.font_medium.render(stat, True, C.COLOR_TEXT)
+            stat_text = self.text.render(self.font_medium, stat, True, C.COLOR_TEXT)
             stat_rect = stat_text.get_rect(center=(self.width // 2, stats_y + i * 38))
             self.screen.blit(stat_text, stat_rect)
         
         breakdown_y = stats_y + len(stats) * 38 + 40
-        breakdown_label = self.font_medium.render("City Status:", True, C.COLOR_TEXT)
+        breakdown_label = self.text.render(self.font_medium, "City Status:", True, C.COLOR_TEXT)
         self.screen.blit(breakdown_label, (80, breakdown_y))
         
         for i, village in enumerate(self.engine.villages):
@@ -544,27 +803,27 @@ class UIRenderer:
             status = "ALIVE" if village.is_alive else "DESTROYED"
             status_color = (0, 150, 0) if village.is_alive else (150, 0, 0)
             
-            city_text = self.font_small.render(f"{village.name}: {status}", True, status_color)
+            city_text = self.text.render(self.font_small, f"{village.name}: {status}", True, status_color)
             self.screen.blit(city_text, (80, city_y))
             
             if village.is_alive:
-                pop_text = self.font_small.render(f"Population: {village.population:,}", True, C.COLOR_TEXT)
+                pop_text = self.text.render(self.font_small, f"Population: {village.population:,}", True, C.COLOR_TEXT)
                 self.screen.blit(pop_text, (350, city_y))
         
-        hint_text = self.font_medium.render("Press ESC to return to map", True, (100, 100, 100))
+        hint_text = self.text.render(self.font_medium, "Press ESC to return to map", True, (100, 100, 100))
         hint_rect = hint_text.get_rect(center=(self.width // 2, self.height - 40))
         self.screen.blit(hint_text, hint_rect)
     
+    @timed('render.completion_message')
     def _render_completion_message(self):
-        overlay = pygame.Surface((self.width, 180))
-        overlay.set_alpha(220)
-        overlay.fill((50, 50, 50))
+        overlay = pygame.Surface((self.width, 180), pygame.SRCALPHA)
+        overlay.fill((50, 50, 50, 220))
         self.screen.blit(overlay, (0, self.height // 2 - 90))
         
-        msg_text = self.font_large.render("Simulation Complete!", True, (255, 255, 100))
+        msg_text = self.text.render(self.font_large, "Simulation Complete!", True, (255, 255, 100))
         msg_rect = msg_text.get_rect(center=(self.width // 2, self.height // 2 - 25))
         self.screen.blit(msg_text, msg_rect)
         
-        hint_text = self.font_medium.render("Press ESC to view final summary", True, (255, 255, 255))
+        hint_text = self.text.render(self.font_medium, "Press ESC to view final summary", True, (255, 255, 255))
         hint_rect = hint_text.get_rect(center=(self.width // 2, self.height // 2 + 25))
         self.screen.blit(hint_text, hint_rect)
\ No newline at end of file
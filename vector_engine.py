@@ -0,0 +1,560 @@
+"""
+Vectorized kingdom state - struct-of-arrays backing for Village objects
+"""
+
+from collections import deque
+import numpy as np
+import constants as C
+from geometry import nearest_sites
+from timeseries import TimeSeries
+from village import Village
+from game_engine import GameEngine
+
+RESOURCE_INDEX = {res: i for i, res in enumerate(C.RESOURCES)}
+EVENT_TYPES = list(C.EVENT_TYPES.keys())
+EVENT_INDEX = {evt: i for i, evt in enumerate(EVENT_TYPES)}
+BUILDING_TYPES = list(C.BUILDINGS.keys())
+BUILDING_INDEX = {b: i for i, b in enumerate(BUILDING_TYPES)}
+MAX_EVENT_DURATION = max(evt['duration'] for evt in C.EVENT_TYPES.values())
+SCRATCH_FLOATS = ('pop', 'amount', 'gold', 'consumption', 'tax', 'delta',
+                  'rate', 'surplus', 'deficit', 'diff', 'part', 'threshold')
+SCRATCH_FLAGS = ('active', 'hit', 'starving')
+
+# Per-village arrays: name -> (shape of one village's row, dtype)
+VILLAGE_ARRAYS = {
+    'positions': ((2,), np.float64),
+    'is_capital': ((), bool),
+    'produces': ((), np.int64),  # Index into C.RESOURCES, -1 for none
+    'population': ((), np.int64),
+    'growth_rate': ((), np.float64),
+    'resources': ((len(C.RESOURCES),), np.float64),
+    'alive': ((), bool),
+    'events': ((len(EVENT_TYPES), MAX_EVENT_DURATION), np.int16),
+    'buildings': ((len(BUILDING_TYPES),), bool),
+    'history_length': ((), np.int64),
+    'history_start': ((), np.int64),
+    '_producer_mask': ((len(C.RESOURCES),), np.float64),  # 1.0 where a village produces the resource
+    '_drought_sensitive': ((), bool),
+    '_strike_sensitive': ((), bool),
+    '_grain_producer': ((), bool),
+}
+COLUMN_MAJOR = ('resources', 'events', '_producer_mask')  # Walked a column at a time
+HISTORY_LOGS = {'population_log': np.int64, 'growth_log': np.float64}
+
+
+class KingdomState:
+    """Holds every village's numbers as NumPy arrays shaped (n_villages, ...)
+    
+    events[i, e, d] counts active events of type e on village i with d + 1
+    months remaining, so stacked events of the same type behave like the
+    list of tuples in Village.active_events. population_log and
+    growth_log are rings of the last C.HISTORY_CAPACITY months, one row per
+    month and one column per village, whose rows start at
+    C.HISTORY_START_CAPACITY and double as the months come; history_length[i]
+    counts the months village i has logged in all, the first of them month
+    history_start[i]. Villages step together, so their histories end at the
+    same month until one is stepped alone with step_village().
+    
+    The arrays are views of the first n rows of storage sized capacity,
+    which doubles when add() runs out of room, so founding villages one at
+    a time costs amortized O(1) copies each. Views taken before an add()
+    may be left on the old storage; read them from the state again.
+    
+    With runs > 1 the city layout is repeated once per independent kingdom
+    and per_run() exposes any array with a leading run axis.
+    """
+    def __init__(self, cities, runs=1, record_history=True):
+        self.runs = runs
+        self.n_cities = len(cities)
+        self.record_history = record_history
+        
+        cities = list(cities) * runs
+        self.n = 0
+        self.capacity = 0
+        self.names = []
+        self.months = 0  # months stepped
+        self.log_months = min(C.HISTORY_CAPACITY, C.HISTORY_START_CAPACITY)  # rows of the history logs
+        self.staggered = False  # a village was stepped alone, so histories end at different months
+        self.storage = {}
+        self._reserve(len(cities))
+        self._add_rows(cities)
+        self._assign_tax_capitals()
+    
+    def _reserve(self, capacity):
+        """Move every array into storage for capacity villages"""
+        storage = {}
+        for name, (shape, dtype) in VILLAGE_ARRAYS.items():
+            order = 'F' if name in COLUMN_MAJOR else 'C'
+            storage[name] = np.zeros((capacity,) + shape, dtype=dtype, order=order)
+        if self.record_history:
+            for name, dtype in HISTORY_LOGS.items():
+                storage[name] = np.zeros((self.log_months, capacity), dtype=dtype)
+        
+        for name in VILLAGE_ARRAYS:
+            if name in self.storage:
+                storage[name][:self.n] = self.storage[name][:self.n]
+        for name in HISTORY_LOGS:
+            if name in self.storage:
+                storage[name][:, :self.n] = self.storage[name][:, :self.n]
+        
+        # Scratch arrays step_month works in, so a month allocates next to nothing
+        storage.update((name, np.empty(capacity)) for name in SCRATCH_FLOATS)
+        storage.update((name, np.empty(capacity, dtype=bool)) for name in SCRATCH_FLAGS)
+        
+        self.storage = storage
+        self.capacity = capacity
+        self._bind()
+    
+    def _reserve_months(self, months):
+        """Grow the history logs to hold months rows, at least doubling, up to C.HISTORY_CAPACITY"""
+        if not self.record_history or months <= self.log_months:
+            return
+        months = min(max(months, 2 * self.log_months), C.HISTORY_CAPACITY)
+        # The rings haven't wrapped yet, so the rows keep their places
+        for name, dtype in HISTORY_LOGS.items():
+            grown = np.zeros((months, self.capacity), dtype=dtype)
+            grown[:self.log_months] = self.storage[name]
+            self.storage[name] = grown
+        self.log_months = months
+        self._bind()
+    
+    def _bind(self):
+        """Point the public arrays at the first n rows of storage"""
+        n = self.n
+        for name in VILLAGE_ARRAYS:
+            setattr(self, name, self.storage[name][:n])
+        for name in HISTORY_LOGS:
+            setattr(self, name, self.storage[name][:, :n] if self.record_history else None)
+        self._scratch = {name: self.storage[name][:n] for name in SCRATCH_FLOATS + SCRATCH_FLAGS}
+    
+    def _add_rows(self, cities):
+        """Fill the next len(cities) rows of storage with new villages"""
+        rows = slice(self.n, self.n + len(cities))
+        self.n += len(cities)
+        self._bind()
+        
+        self.names.extend(c['name'] for c in cities)
+        self.positions[rows] = np.array([c['pos'] for c in cities], dtype=np.float64).reshape(-1, 2)
+        is_capital = self.is_capital[rows]
+        is_capital[:] = [c.get('is_capital', False) for c in cities]
+        produces = self.produces[rows]
+        produces[:] = [RESOURCE_INDEX[c['produces']] if c['produces'] else -1 for c in cities]
+        
+        self.population[rows] = np.where(is_capital, C.CAPITAL_INITIAL_POPULATION, C.INITIAL_POPULATION)
+        self.resources[rows] = np.where(is_capital, C.CAPITAL_INITIAL_RESOURCES, C.INITIAL_RESOURCES)[:, None]
+        self.alive[rows] = True
+        self.history_start[rows] = self.months
+        
+        producers = np.flatnonzero((produces >= 0) & ~is_capital)
+        self._producer_mask[rows][producers, produces[producers]] = 1.0
+        self._drought_sensitive[rows] = np.isin(produces, [RESOURCE_INDEX['livestock'], RESOURCE_INDEX['grain']])
+        self._strike_sensitive[rows] = np.isin(produces, [RESOURCE_INDEX['wood'], RESOURCE_INDEX['iron']])
+        self._grain_producer[rows] = produces == RESOURCE_INDEX['grain']
+    
+    def _assign_tax_capitals(self):
+        """Tax goes to the nearest capital; with one per kingdom that is a plain per-run sum"""
+        self._capital_rows = None
+        self._tax_rows = None
+        capitals = np.flatnonzero(self.is_capital[:self.n_cities])
+        if len(capitals):
+            offsets = np.arange(self.runs)[:, None] * self.n_cities
+            self._capital_rows = (offsets + capitals).ravel()
+            if len(capitals) > 1:
+                layout = self.positions[:self.n_cities]
+                region = capitals[nearest_sites(layout, layout[capitals])]
+                self._tax_rows = (offsets + region).ravel()
+    
+    def add(self, city):
+        """Found a village from a city definition and return its index"""
+        if self.runs != 1:
+            raise ValueError("Villages can only be added to a single kingdom")
+        if self.n == self.capacity:
+            self._reserve(max(1, 2 * self.capacity))
+        
+        self._add_rows([city])
+        self.n_cities = self.n
+        self._assign_tax_capitals()
+        return self.n - 1
+    
+    def per_run(self, array):
+        """View an (n_villages, ...) array as (runs, n_cities, ...)"""
+        return array.reshape(self.runs, self.n_cities, *array.shape[1:])
+    
+    def calculate_thresholds(self):
+        survival = C.MINIMUM_SURVIVAL_BASE + self.population * C.MINIMUM_SURVIVAL_PER_CAPITA
+        growth = C.GROWTH_THRESHOLD_BASE + self.population * C.GROWTH_THRESHOLD_PER_CAPITA
+        return survival, growth
+    
+    def event_active(self, event_type):
+        return self.events[:, EVENT_INDEX[event_type]].any(axis=1)
+    
+    def _production(self):
+        """Each village's production of its own resource (amount) and of gold, as scratch arrays"""
+        w = self._scratch
+        pop, amount, gold, hit = w['pop'], w['amount'], w['gold'], w['hit']
+        buildings = self.buildings
+        
+        np.multiply(pop, C.PRODUCTION_PER_CAPITA, out=amount)
+        amount += C.BASE_PRODUCTION
+        np.multiply(amount, 1.05, out=amount, where=buildings[:, BUILDING_INDEX['camp']])
+        
+        if np.logical_and(self.event_active('drought'), self._drought_sensitive, out=hit).any():
+            granary = self._grain_producer & buildings[:, BUILDING_INDEX['granary']]
+            np.multiply(amount, 0.5, out=amount, where=hit & granary)
+            np.copyto(amount, 0.0, where=hit & ~granary)
+        if np.logical_and(self.event_active('strike'), self._strike_sensitive, out=hit).any():
+            np.copyto(amount, 0.0, where=hit)
+        
+        np.multiply(pop, C.GOLD_PER_CAPITA, out=gold)
+        gold += C.GOLD_BASE_PRODUCTION
+        np.multiply(gold, 1.05, out=gold, where=buildings[:, BUILDING_INDEX['hotel']])
+        return amount, gold
+    
+    def calculate_growth_rate(self):
+        """Growth rate per village; also marks villages below survival as dead
+        
+        Both arrays returned are scratch space, overwritten by the next call.
+        """
+        w = self._scratch
+        pop, rate, surplus, deficit = w['pop'], w['rate'], w['surplus'], w['deficit']
+        diff, part, threshold, starving = w['diff'], w['part'], w['threshold'], w['starving']
+        np.copyto(pop, self.population)
+        
+        # Lowest stock against the survival threshold
+        np.minimum(self.resources[:, 0], self.resources[:, 1], out=part)
+        for column in self.resources.T[2:]:
+            np.minimum(part, column, out=part)
+        np.multiply(pop, C.MINIMUM_SURVIVAL_PER_CAPITA, out=threshold)
+        threshold += C.MINIMUM_SURVIVAL_BASE
+        np.less(part, threshold, out=starving)
+        
+        np.multiply(pop, C.GROWTH_THRESHOLD_PER_CAPITA, out=threshold)
+        threshold += C.GROWTH_THRESHOLD_BASE
+        
+        # resources is column-major, so walking the five columns is cheaper
+        # than reducing along axis 1
+        for r, column in enumerate(self.resources.T):
+            np.subtract(column, threshold, out=diff)
+            if r == 0:
+                np.maximum(diff, 0.0, out=surplus)
+                np.minimum(diff, 0.0, out=deficit)
+                np.negative(deficit, out=deficit)
+            else:
+                surplus += np.maximum(diff, 0.0, out=part)
+                deficit -= np.minimum(diff, 0.0, out=diff)
+        
+        threshold *= len(C.RESOURCES)
+        np.divide(surplus, threshold, out=rate)
+        np.minimum(rate, C.MAX_GROWTH_RATE, out=rate)
+        # -deficit / scale, where anything is short
+        np.negative(deficit, out=part)
+        part /= threshold
+        np.maximum(part, C.MAX_DECLINE_RATE, out=part)
+        np.copyto(rate, part, where=deficit != 0)
+        np.copyto(rate, -1.0, where=starving)
+        return rate, starving
+    
+    def step_month(self):
+        """Vectorized equivalent of GameEngine._update_villages
+        
+        Works a resource column at a time in preallocated scratch arrays;
+        dead villages are masked out rather than filtered.
+        """
+        w = self._scratch
+        active, consumption, tax, delta = w['active'], w['consumption'], w['tax'], w['delta']
+        np.copyto(active, self.alive)
+        everyone = active.all()
+        np.copyto(w['pop'], self.population)
+        
+        amount, gold = self._production()
+        np.multiply(w['pop'], C.CONSUMPTION_PER_CAPITA, out=consumption)
+        
+        np.multiply(gold, C.CAPITAL_TAX_RATE, out=tax)
+        np.copyto(tax, 0.0, where=self.is_capital | ~active)
+        
+        gold_index = RESOURCE_INDEX['gold']
+        for r, column in enumerate(self.resources.T):
+            if r == gold_index:
+                np.subtract(gold, consumption, out=delta)
+                delta -= tax
+            else:
+                np.multiply(self._producer_mask[:, r], amount, out=delta)
+                delta -= consumption
+            if everyone:
+                column += delta
+            else:
+                np.add(column, delta, out=column, where=active)
+        
+        rate, starving = self.calculate_growth_rate()
+        np.copyto(self.growth_rate, rate, where=active)
+        self.alive &= ~starving
+        
+        grown = w['part']
+        np.add(self.growth_rate, 1.0, out=grown)
+        grown *= w['pop']
+        np.maximum(grown, 100, out=grown)
+        np.copyto(self.population, grown, casting='unsafe', where=active & self.alive)
+        
+        # Dead villages never see their events again, so shift every row
+        self.events[:, :, :-1] = self.events[:, :, 1:]
+        self.events[:, :, -1] = 0
+        
+        plague = self.events[:, EVENT_INDEX['plague']]
+        plague_count = plague[:, 0].copy()
+        for column in plague.T[1:]:
+            plague_count += column
+        plague_count *= active
+        rows = np.flatnonzero(plague_count)
+        if len(rows):
+            plague_count = plague_count[rows]
+            survivors = np.where(self.buildings[rows, BUILDING_INDEX['wall']], 1 - 0.10 * 0.70, 1 - 0.10)
+            population = self.population[rows]
+            for k in range(int(plague_count.max())):
+                population = np.where(plague_count > k, (population * survivors).astype(np.int64), population)
+            self.population[rows] = population
+        
+        if self._capital_rows is not None:
+            rows = self._capital_rows
+            if self._tax_rows is None:
+                run_tax = self.per_run(tax).sum(axis=1)
+            else:
+                run_tax = np.bincount(self._tax_rows, weights=tax, minlength=self.n)[rows]
+            self.resources[rows, gold_index] += np.where(self.alive[rows], run_tax, 0.0)
+        
+        self.months += 1
+        if not self.record_history:
+            return
+        
+        # Villages that started the month alive log it, as Village.update_month does
+        if self.staggered:
+            self._log(np.flatnonzero(active))
+            return
+        slot = (self.months - 1) % C.HISTORY_CAPACITY
+        self._reserve_months(slot + 1)
+        if everyone:
+            self.population_log[slot] = self.population
+            self.growth_log[slot] = self.growth_rate
+        else:
+            np.copyto(self.population_log[slot], self.population, where=active)
+            np.copyto(self.growth_log[slot], self.growth_rate, where=active)
+        self.history_length += active
+    
+    def step_village(self, index, production, consumption, tax=0):
+        """Village.update_month for village index alone
+        
+        The month goes into the village's own history; the rest of the
+        kingdom, and months, stay where they are.
+        """
+        stock = self.resources[index]
+        for resource, amount in production.items():
+            stock[RESOURCE_INDEX[resource]] += amount
+        for resource, amount in consumption.items():
+            stock[RESOURCE_INDEX[resource]] -= amount
+        if not self.is_capital[index] and tax > 0:
+            stock[RESOURCE_INDEX['gold']] -= tax
+        
+        population = int(self.population[index])
+        survival = C.MINIMUM_SURVIVAL_BASE + population * C.MINIMUM_SURVIVAL_PER_CAPITA
+        threshold = C.GROWTH_THRESHOLD_BASE + population * C.GROWTH_THRESHOLD_PER_CAPITA
+        amounts = stock.tolist()
+        if not self.alive[index] or min(amounts) < survival:
+            self.alive[index] = False
+            rate = -1.0
+        else:
+            surplus = sum(a - threshold for a in amounts if a >= threshold)
+            deficit = sum(threshold - a for a in amounts if a < threshold)
+            if deficit == 0:
+                rate = min(C.MAX_GROWTH_RATE, surplus / (threshold * len(C.RESOURCES)))
+            else:
+                rate = max(C.MAX_DECLINE_RATE, -deficit / (threshold * len(C.RESOURCES)))
+            population = max(100, int(population * (1 + rate)))
+        self.growth_rate[index] = rate
+        
+        events = self.events[index]
+        events[:, :-1] = events[:, 1:]
+        events[:, -1] = 0
+        death_rate = 0.10 * 0.70 if self.buildings[index, BUILDING_INDEX['wall']] else 0.10
+        for _ in range(int(events[EVENT_INDEX['plague']].sum())):
+            population = int(population * (1 - death_rate))
+        self.population[index] = population
+        
+        if self.record_history:
+            self.staggered = True
+            self._log(np.array([index]))
+    
+    def _log(self, rows):
+        """Log this month of each village in rows at the end of its own history"""
+        ends = self.history_start[rows] + self.history_length[rows]
+        if len(rows):
+            self._reserve_months(int(ends.max()) + 1)
+        slots = ends % C.HISTORY_CAPACITY
+        self.population_log[slots, rows] = self.population[rows]
+        self.growth_log[slots, rows] = self.growth_rate[rows]
+        self.history_length[rows] += 1
+    
+    def history(self, log, index, dtype=np.float64):
+        """Village index's months in log as a TimeSeries, oldest first"""
+        total = int(self.history_length[index])
+        start = int(self.history_start[index])
+        kept = np.arange(start + max(0, total - C.HISTORY_CAPACITY), start + total) % C.HISTORY_CAPACITY
+        series = TimeSeries(dtype=dtype)
+        series.load(log[kept, index].tolist(), total)
+        return series
+
+
+class ResourceRow:
+    """Dict-like view over one village's row of KingdomState.resources"""
+    def __init__(self, state, index):
+        self.state = state
+        self.index = index
+    
+    def __getitem__(self, resource):
+        return float(self.state.resources[self.index, RESOURCE_INDEX[resource]])
+    
+    def __setitem__(self, resource, amount):
+        self.state.resources[self.index, RESOURCE_INDEX[resource]] = amount
+    
+    def __iter__(self):
+        return iter(C.RESOURCES)
+    
+    def __len__(self):
+        return len(C.RESOURCES)
+    
+    def __contains__(self, resource):
+        return resource in RESOURCE_INDEX
+    
+    def keys(self):
+        return list(C.RESOURCES)
+    
+    def values(self):
+        return [float(v) for v in self.state.resources[self.index]]
+    
+    def items(self):
+        return list(zip(C.RESOURCES, self.values()))
+    
+    def get(self, resource, default=None):
+        return self[resource] if resource in RESOURCE_INDEX else default
+
+
+class VillageView(Village):
+    """Village whose numbers live in one row of a KingdomState"""
+    def __init__(self, state, index):
+        self.state = state
+        self.index = index
+        
+        self.id = index
+        self.name = state.names[index]
+        self.produces = C.RESOURCES[state.produces[index]] if state.produces[index] >= 0 else None
+        self.position = tuple(state.positions[index])
+        self.is_capital = bool(state.is_capital[index])
+        
+        self.resources = ResourceRow(state, index)
+        
+        self.event_log = deque(maxlen=C.EVENT_LOG_CAPACITY)
+        self.connected_routes = []
+        self.histories = {}  # log name -> (start, total, TimeSeries) last built
+    
+    @property
+    def population(self):
+        return int(self.state.population[self.index])
+    
+    @population.setter
+    def population(self, value):
+        self.state.population[self.index] = value
+    
+    @property
+    def growth_rate(self):
+        return float(self.state.growth_rate[self.index])
+    
+    @growth_rate.setter
+    def growth_rate(self, value):
+        self.state.growth_rate[self.index] = value
+    
+    @property
+    def is_alive(self):
+        return bool(self.state.alive[self.index])
+    
+    @is_alive.setter
+    def is_alive(self, value):
+        self.state.alive[self.index] = value
+    
+    @property
+    def buildings(self):
+        return [BUILDING_TYPES[b] for b in np.flatnonzero(self.state.buildings[self.index])]
+    
+    @property
+    def active_events(self):
+        counts = self.state.events[self.index]
+        return [
+            (EVENT_TYPES[e], d + 1)
+            for e, d in zip(*np.nonzero(counts))
+            for _ in range(counts[e, d])
+        ]
+    
+    def _history(self, name, dtype):
+        """The village's log as a TimeSeries, rebuilt only when it has logged a month since"""
+        state, i = self.state, self.index
+        key = (int(state.history_start[i]), int(state.history_length[i]))
+        cached = self.histories.get(name)
+        if cached is None or cached[:2] != key:
+            cached = self.histories[name] = key + (state.history(getattr(state, name), i, dtype),)
+        return cached[2]
+    
+    @property
+    def population_history(self):
+        return self._history('population_log', int)
+    
+    @property
+    def growth_history(self):
+        return self._history('growth_log', np.float64)
+    
+    def has_event_type(self, event_type):
+        return bool(self.state.events[self.index, EVENT_INDEX[event_type]].any())
+    
+    def add_event(self, event_type):
+        duration = C.EVENT_TYPES[event_type]['duration']
+        self.state.events[self.index, EVENT_INDEX[event_type], duration - 1] += 1
+        
+        self.event_log.append(C.EVENT_TYPES[event_type]['name'])
+        
+        if event_type == 'pirates':
+            self.state.resources[self.index] *= 0.5
+    
+    def build_structure(self, building_type):
+        if not self.can_afford_building(building_type):
+            return False
+        
+        costs = C.BUILDINGS[building_type]['cost']
+        for resource, amount in costs.items():
+            self.resources[resource] -= amount
+        
+        self.state.buildings[self.index, BUILDING_INDEX[building_type]] = True
+        self.event_log.append(f"Built {C.BUILDINGS[building_type]['name']}")
+        return True
+    
+    def update_month(self, production, consumption, tax=0):
+        self.state.step_village(self.index, production, consumption, tax)
+
+
+class VectorGameEngine(GameEngine):
+    """GameEngine whose villages are views over a shared KingdomState"""
+    def _create_villages(self, cities):
+        self.state = KingdomState(cities)
+        return [VillageView(self.state, i) for i in range(self.state.n)]
+    
+    def _update_villages(self):
+        state = self.state
+        was_alive = state.alive.copy()
+        state.step_month()
+        
+        for i in np.flatnonzero(was_alive & ~state.alive):
+            self.scorer.village_died(self.villages[i])
+        
+        alive = state.alive
+        self.scorer.resource_totals = dict(zip(C.RESOURCES, state.resources[alive].sum(axis=0).tolist()))
+        self.scorer.growth_sum = float(state.growth_rate[alive].sum())
+    
+    def _new_village(self, city_data):
+        if self.registry.get(city_data['name']) is not None:
+            raise ValueError(f"Duplicate village name: {city_data['name']}")
+        return VillageView(self.state, self.state.add(city_data))
\ No newline at end of file
@@ -1,7 +1,10 @@
+from collections import deque
 import constants as C
+from timeseries import TimeSeries
 
 class Village:
     def __init__(self, name, produces, position, is_capital=False):
+        self.id = None  # Assigned by VillageRegistry
         self.name = name
         self.produces = produces
         self.position = position
@@ -17,9 +20,9 @@ class Village:
         
         self.active_events = []
         
-        self.population_history = []
-        self.growth_history = []
-        self.event_log = []
+        self.population_history = TimeSeries(dtype=int)  # Last C.HISTORY_CAPACITY months
+        self.growth_history = TimeSeries()
+        self.event_log = deque(maxlen=C.EVENT_LOG_CAPACITY)
         
         self.connected_routes = []
         
@@ -162,4 +165,39 @@ class Village:
         
         self.buildings.append(building_type)
         self.event_log.append(f"Built {C.BUILDINGS[building_type]['name']}")
-        return True
\ No newline at end of file
+        return True
+
+
+class VillageRegistry:
+    """Stable integer ids for villages, with O(1) lookup by id or name
+    
+    A village's id is its index in registry.villages, which is also its
+    index in the shared geometry and in the cart fleet.
+    """
+    def __init__(self, villages=()):
+        self.villages = []
+        self.by_name = {}
+        for village in villages:
+            self.add(village)
+    
+    def add(self, village):
+        """Register a village and return its new id"""
+        if village.name in self.by_name:
+            raise ValueError(f"Duplicate village name: {village.name}")
+        
+        village.id = len(self.villages)
+        self.villages.append(village)
+        self.by_name[village.name] = village
+        return village.id
+    
+    def __getitem__(self, village_id):
+        return self.villages[village_id]
+    
+    def __len__(self):
+        return len(self.villages)
+    
+    def __iter__(self):
+        return iter(self.villages)
+    
+    def get(self, name, default=None):
+        return self.by_name.get(name, default)
\ No newline at end of file